@@ -0,0 +1,75 @@
+"""
+Time the parsing of bestfightodds fighter odds tables from saved pages, in bouts per second.
+
+Compares the typed, single pass row parser in OddsScrapeAndProcess against the previous parser, which serialized each
+row several times and kept the odds as strings.
+
+Usage:
+    python benchmarks/bench_odds_parser.py path/to/saved/pages
+"""
+import glob
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from mmai.data.odds import ODDS_COLUMNS, OddsScrapeAndProcess
+
+
+def legacy_parse(odds, content):
+    soup = odds.make_soup(content, only_tables=True)
+    t = soup.find_all("table")[0]
+    rows = t.find_all("tr")
+    rows = [r for r in rows if "event-header" not in str(r)]
+    rows = rows[1:]
+    row_sets = [(rows[i], rows[i + 1]) for i in range(0, len(rows), 2)]
+    row_sets = [r for r in row_sets if "Future Event" not in str(r[0])]
+    row_sets = [r for r in row_sets if "n/a" not in str(r[0])]
+    row_sets = [r for r in row_sets if "n/a" not in str(r[1])]
+    data = []
+    for rs in row_sets:
+        bout_data = []
+        for row in rs:
+            info = []
+            for cell in row.find_all("td"):
+                months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+                if any([m + " " in str(cell) for m in months]):
+                    info.append(cell.contents[0])
+                else:
+                    inner_span = cell.find("span")
+                    if inner_span:
+                        contents = inner_span.contents[0]
+                        if "–" not in contents and "%" not in contents:
+                            info.append(contents)
+            fighter = row.find("th").find("a").find("div").contents[0]
+            bout_data += [fighter] + info
+        data.append(bout_data)
+    return pd.DataFrame(columns=ODDS_COLUMNS, data=data)
+
+
+def current_parse(odds, content):
+    return odds.get_fighter_record_betting_odds_from_html(content)
+
+
+def time_parsing(parse, odds, pages):
+    n_bouts = 0
+    t0 = time.perf_counter()
+    for content in pages:
+        n_bouts += len(parse(odds, content))
+    return n_bouts, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    pages_dir = sys.argv[1]
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(filename, "rb") as f:
+            pages.append(f.read())
+
+    warnings.simplefilter("ignore")
+    odds = OddsScrapeAndProcess()
+    for label, parse in (("Before", legacy_parse), ("After", current_parse)):
+        n_bouts, elapsed = time_parsing(parse, odds, pages)
+        print(f"{label}: {n_bouts} bouts from {len(pages)} pages in {elapsed:.3f}s ({n_bouts / elapsed:.0f} bouts/s)")
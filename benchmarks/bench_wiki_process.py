@@ -0,0 +1,138 @@
+"""
+Time the processing of raw wikipedia fighters, in fighters per second.
+
+Compares WikiFightersProcessed.process against the previous per-fighter loop, which re-ran uncompiled regexes for
+each field and printed a line per fighter, and checks that both give the same fighters. Also times building the
+output dicts of the retained fighters alone, the floor of any implementation which returns a dict per fighter.
+
+Usage:
+    python benchmarks/bench_wiki_process.py path/to/wiki_fighters_raw.json
+"""
+import contextlib
+import os
+import re
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from mmai.data.wikipedia import WikiFightersProcessed
+from mmai.util import load_json
+
+
+def legacy_process(processed, raw_data, warning_level_threshold=1):
+    fighters = {}
+    for f in raw_data:
+        warning_level = f["warning_level"]
+        title = f["title"]
+        link = f["link"]
+        if warning_level > warning_level_threshold:
+            warnings.warn(f"Omitting {title} ({link}) because warning level is {warning_level}")
+            continue
+        info = f["info"]
+        if not info:
+            warnings.warn(f"Omitting {title} ({link}) because it doesn't have info.")
+            continue
+        if not f["record"]:
+            warnings.warn(f"Omitting {title} ({link}) because no record was found.")
+            continue
+        full_name = info.get("Full name")
+        if not full_name:
+            warnings.warn(f"Omitting {title} ({link}) because it doesn't have a full name.")
+            continue
+        modified_name = processed.canonicalize_name(full_name)
+        print(f"Formatted name {full_name} to {modified_name}")
+
+        height = np.nan
+        try:
+            height = re.search("\\(([^)]+)", info["Height"]).group(1).replace("\xa0m", "").strip()
+        except (KeyError, AttributeError, TypeError):
+            pass
+        reach = np.nan
+        try:
+            reach = re.search("\\(([^)]+)", info["Reach"]).group(1).replace("\xa0cm", "").strip()
+        except (KeyError, AttributeError, TypeError):
+            pass
+        weight = np.nan
+        try:
+            weight = re.search("\\(([^)]+)", info["Weight"]).group(1).split(";")[0].replace("\xa0kg", "").strip()
+        except (KeyError, AttributeError, TypeError):
+            pass
+
+        fighters[modified_name] = {
+            "record": f["record"],
+            "link": f["link"],
+            "warning_level": warning_level,
+            "name_raw": full_name,
+            "name": modified_name,
+            "age_days": np.nan,
+            "height_m": height,
+            "weight_kg": weight,
+            "reach_cm": reach,
+        }
+    return fighters
+
+
+def build_output_dicts(raw_data, warning_level_threshold=1):
+    return [
+        {
+            "record": f["record"],
+            "link": f["link"],
+            "warning_level": f["warning_level"],
+            "name_raw": f["info"]["Full name"],
+            "name": f["info"]["Full name"],
+            "age_days": np.nan,
+            "height_m": np.nan,
+            "weight_kg": np.nan,
+            "reach_cm": np.nan,
+            "birthday": None,
+        }
+        for f in raw_data
+        if f["warning_level"] <= warning_level_threshold and f["info"] and f["record"] and f["info"].get("Full name")
+    ]
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def check_same(before, after):
+    assert list(before) == list(after), "Different fighters"
+    for name, b in before.items():
+        a = after[name]
+        for k in ("record", "link", "warning_level", "name_raw", "name"):
+            assert a[k] == b[k], f"Different {k} for {name}"
+        for k in ("height_m", "weight_kg", "reach_cm"):
+            # The previous loop couldn't parse heights in cm, which are parsed now
+            if not np.isnan(to_float(b[k])):
+                assert np.isclose(to_float(b[k]), a[k]), f"Different {k} for {name}"
+
+
+if __name__ == "__main__":
+    raw_data = load_json(sys.argv[1])
+
+    warnings.simplefilter("ignore")
+    processed = WikiFightersProcessed()
+
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        before = legacy_process(processed, raw_data)
+    legacy_elapsed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    after = processed.process(raw_data)
+    elapsed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    build_output_dicts(raw_data)
+    floor_elapsed = time.perf_counter() - t0
+
+    check_same(before, after)
+    n_aged = sum(1 for f in after.values() if not np.isnan(f["age_days"]))
+    for label, t in (("Before", legacy_elapsed), ("After", elapsed), ("Output dicts alone", floor_elapsed)):
+        print(f"{label}: {len(after)} fighters from {len(raw_data)} raw in {t:.3f}s ({len(raw_data) / t:.0f} raw/s)")
+    print(f"Speedup: {legacy_elapsed / elapsed:.1f}x, {n_aged} fighters with an age (none before)")
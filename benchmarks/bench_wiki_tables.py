@@ -0,0 +1,74 @@
+"""
+Time the extraction of fighter records and infos from saved wikipedia fighter pages.
+
+Compares the single-pass table classification in WikiFightersRaw against the previous approach, which serialized
+every table (and the whole page, once per table) to look for substrings, and compares the available parser backends.
+
+Usage:
+    python benchmarks/bench_wiki_tables.py path/to/saved/pages
+"""
+import glob
+import os
+import sys
+import time
+import warnings
+
+from bs4 import BeautifulSoup
+
+from mmai.data.parsing import is_parser_available
+from mmai.data.wikipedia import WikiFightersRaw
+
+
+def legacy_extract(wikir, content):
+    soup = BeautifulSoup(content, features="html.parser")
+    records = []
+    infos = []
+    for table in soup.find_all("table"):
+        record = None
+        if "Location" in str(table):
+            try:
+                record = wikir.get_record_from_table(table)
+            except AttributeError:
+                break
+        info = None
+        if 'class="infobox vcard"' in str(soup):
+            for tb in soup.find_all("tbody"):
+                if 'class="fn"' in str(tb):
+                    info = tb
+        if record:
+            records.append(record)
+        if info:
+            infos.append(info)
+    return records, infos
+
+
+def current_extract(wikir, content):
+    return wikir.get_fighter_record_and_info_from_html(content, "", silent=True)
+
+
+def time_extraction(extract, wikir, pages):
+    t0 = time.perf_counter()
+    for content in pages:
+        extract(wikir, content)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    pages_dir = sys.argv[1]
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(filename, "rb") as f:
+            pages.append(f.read())
+
+    warnings.simplefilter("ignore")
+    legacy = time_extraction(legacy_extract, WikiFightersRaw(), pages)
+    print(f"Pages: {len(pages)}")
+    print(f"Before: {legacy:.3f}s ({legacy / len(pages) * 1000:.1f} ms/page)")
+    for parser in ["html.parser", "html5lib", "lxml"]:
+        if not is_parser_available(parser):
+            continue
+        current = time_extraction(current_extract, WikiFightersRaw(parser=parser), pages)
+        print(
+            f"After ({parser}): {current:.3f}s ({current / len(pages) * 1000:.1f} ms/page), "
+            f"speedup {legacy / current:.1f}x"
+        )
@@ -0,0 +1,63 @@
+"""
+Load test a running prediction service (python -m mmai.serve) on localhost, in requests and fights per second, with
+latency percentiles.
+
+Matchups are random pairs of fighters from the saved bout table, sent by concurrent clients in batches of batch_size
+(a batch size of 1 sends single matchup requests).
+
+Usage:
+    python benchmarks/load_test_predict.py [url] [n_requests] [concurrency] [batch_size]
+"""
+import json
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from mmai.data.bouts import BoutTable
+
+
+def make_bodies(names, n_requests, batch_size, seed=0):
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for _ in range(n_requests):
+        pairs = rng.choice(len(names), size=(batch_size, 2))
+        fights = [{"fighter_a": names[a], "fighter_b": names[b], "date": "2019-11-07"} for a, b in pairs]
+        bodies.append(json.dumps(fights[0] if batch_size == 1 else {"fights": fights}).encode())
+    return bodies
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+        status = response.status
+    return time.perf_counter() - t0, status
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    batch_size = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    bout_table = BoutTable()
+    bout_table.load()
+    bodies = make_bodies(bout_table.data["fighters"]["name"], n_requests, batch_size)
+    predict_url = url.rstrip("/") + "/predict"
+    post(predict_url, bodies[0])
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda body: post(predict_url, body), bodies))
+    elapsed = time.perf_counter() - t0
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    n_errors = sum(1 for _, status in results if status != 200)
+    print(f"{n_requests} requests of {batch_size} fights, {concurrency} clients: {elapsed:.2f}s, {n_errors} errors")
+    print(f"Throughput: {n_requests / elapsed:.0f} requests/s, {n_requests * batch_size / elapsed:.0f} fights/s")
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"Latency: p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms, max {latencies.max():.1f}ms")
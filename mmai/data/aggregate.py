@@ -1,7 +1,5 @@
 import string
-import requests
 
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 
 from mmai.data.base import DataBase
@@ -9,21 +7,29 @@ from mmai.data.base import DataBase
 
 class AggregateStatsScraper(DataBase):
 
-    def __init__(self):
+    default_parser = "html5lib"
+
+    def __init__(self, cache=None, session=None, parser=None):
+        """
+        Args:
+            cache (mmai.data.cache.ResponseCache, None): An on-disk cache to fetch pages through. If None, every page
+                is downloaded.
+            session (requests.Session, None): The session to fetch pages with. If None, a new one is made.
+            parser (str, None): The BeautifulSoup tree builder to parse pages with. If None, uses lxml if it is
+                installed and html5lib otherwise.
+        """
+        super().__init__(cache=cache, session=session, parser=parser)
         self.data = None
         self.data_filename = None
 
         self.base_link = "http://ufcstats.com"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:70.0) Gecko/20100101 Firefox/70.0"
-        }
 
     def get_all_links_from_table(self):
         all_links = []
         for char in tqdm(string.ascii_lowercase):
             src = f"http://ufcstats.com/statistics/fighters?char={char}&page=all"
-            r = requests.get(src, headers=self.headers).content
-            soup = BeautifulSoup(r, features="html5lib")
+            r = self.fetch(src).content
+            soup = self.make_soup(r)
 
             for l in soup.findAll('a', class_="b-link b-link_style_black", href=True):
                 href = l["href"]
@@ -34,10 +40,35 @@ class AggregateStatsScraper(DataBase):
         all_links = [s.replace(self.base_link, "") for s in all_links]
         return all_links
 
+    def get_all_names_from_table(self):
+        """
+        Get the names of all the fighters listed on ufcstats, for matching them with other sources.
+
+        Returns:
+            (dict): The names in {relative link: "First Last"} format.
+        """
+        names = {}
+        for char in tqdm(string.ascii_lowercase):
+            src = f"http://ufcstats.com/statistics/fighters?char={char}&page=all"
+            r = self.fetch(src).content
+            soup = self.make_soup(r)
+
+            # Each row links the first name, last name, and nickname cells to the fighter's page
+            for row in soup.findAll("tr"):
+                parts = []
+                href = None
+                for l in row.findAll('a', class_="b-link b-link_style_black", href=True)[:2]:
+                    if "fighter-details" in l["href"]:
+                        href = l["href"].replace(self.base_link, "")
+                        parts.append(l.text.strip())
+                if href:
+                    names[href] = " ".join(p for p in parts if p)
+        return names
+
     def get_fighter_aggregate_stats_from_relative_link(self, relative_link):
         src = self.base_link + relative_link
-        r = requests.get(src, headers=self.headers).content
-        soup = BeautifulSoup(r, features="html5lib")
+        r = self.fetch(src).content
+        soup = self.make_soup(r)
 
         print(soup.prettify())
 
@@ -1,24 +1,100 @@
-import json
+import hashlib
 import os
+import threading
+from urllib.parse import urlparse
 
-from mmai.util import load_json
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from mmai.data.journal import Journal
+from mmai.data.manifest import get_manifest
+from mmai.data.parsing import get_parser_backend, make_soup
+from mmai.data.storage import LazyJsonlMapping, read_columnar_table, write_columnar_table, write_jsonl
+from mmai.util import dump_json, load_json, strip_compression_extension
 
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:70.0) Gecko/20100101 Firefox/70.0"
+}
+
+
+def make_session(pool_maxsize=8, retries=3, backoff_factor=0.5):
+    """
+    Make a requests session with pooled keep-alive connections and a retry policy, for sharing between scrapers.
+
+    Args:
+        pool_maxsize (int): The maximum number of connections kept alive per host.
+        retries (int): The number of times to retry a request on a connection error, a reset, or a 5xx response.
+        backoff_factor (float): Retries wait backoff_factor * 2 ** (retry number - 1) seconds.
+
+    Returns:
+        (requests.Session): The session, sending DEFAULT_HEADERS with each request.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        status_forcelist=(500, 502, 503, 504),
+        backoff_factor=backoff_factor,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 class DataBase:
     """
     A base class for data operations onighter data.
+
+    Attrs:
+        max_per_host (int): The maximum number of concurrent requests made to any one host by fetch.
+        cache (mmai.data.cache.ResponseCache, None): If not None, the on-disk cache all fetches go through.
+        session (requests.Session): The session all fetches go through. Pass the same session to several scrapers to
+            share their connection pools. If none is given, one is made on first use, so subclasses which only save
+            and load data never make one.
+        parser (str): The BeautifulSoup tree builder pages are parsed with.
     """
 
-    def __init__(self):
+    # The tree builder used when no parser is given and lxml is not installed
+    default_parser = "html.parser"
+
+    def __init__(self, max_per_host=8, cache=None, session=None, parser=None):
         self.data = None
         self.data_filename = None
+        self.max_per_host = max_per_host
+        self.cache = cache
+        self._session = session
+        self._session_lock = threading.Lock()
+        self.parser = get_parser_backend(parser, fallback=self.default_parser)
+        self._host_semaphores = {}
+        self._host_semaphores_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        The session all fetches go through, made on first use if none was given.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = make_session(pool_maxsize=self.max_per_host)
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
 
     def load(self):
         """
-        Load the raw scraped data from a static file.
+        Load the raw scraped data from a static file, decompressing it if data_filename ends in .gz or .zst.
 
         Returns:
             [dict]: a list of raw fighter data dicts
@@ -30,11 +106,199 @@ class DataBase:
 
     def save(self):
         """
-        Saves the raw scraped data list to a file.
+        Saves the raw scraped data list to a file, compressed with gzip or zstd if data_filename ends in .gz or .zst.
+
+        The file is replaced atomically, so a crash mid-save leaves the previous file intact, and the content hash of
+        the data is recorded in the manifest next to it.
+
+        Returns:
+            None
+        """
+        manifest = self.get_manifest()
+        previous = manifest.get_hash(self.data_filename)
+        sha256, size = dump_json(self.data, self.data_filename)
+        manifest.record(self.data_filename, sha256, size)
+        status = "unchanged" if sha256 == previous else "changed"
+        print(f"File dumped to {self.data_filename}! ({status}, sha256 {sha256[:12]})")
+
+    def get_manifest(self):
+        """
+        Get the manifest of content hashes of the artifacts saved next to the data file, shared with every other
+        class saving to the same directory.
+
+        Returns:
+            (mmai.data.manifest.Manifest): The manifest.
+        """
+        return get_manifest(os.path.join(os.path.dirname(os.path.abspath(self.data_filename)), "manifest.json"))
+
+    def get_content_hash(self):
+        """
+        Get the content hash the data was last saved with, to tell whether it changed without reading it.
+
+        Returns:
+            (str, None): The sha256 hex digest of the uncompressed json saved with save, or if that was never saved,
+                of the columnar tables saved with save_columnar. None if neither was saved with a hash.
+        """
+        manifest = self.get_manifest()
+        return manifest.get_hash(self.data_filename) or manifest.get_hash(self.get_columnar_dirname())
+
+    def to_tables(self):
+        """
+        Flatten the data into flat tables for columnar storage. Implemented by subclasses whose data can be stored that
+        way.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} data can't be stored in columnar format.")
+
+    def save_columnar(self):
+        """
+        Save the data as flat columnar tables of NumPy arrays, next to data_filename, for fast partial loading with
+        load_columnar. The content hash of all the tables is recorded in the manifest under the directory's name.
 
         Returns:
             None
         """
-        with open(self.data_filename, "w") as f:
-            json.dump(self.data, f)
-        print(f"File dumped to {self.data_filename}!")
+        directory = self.get_columnar_dirname()
+        digest = hashlib.sha256()
+        size = 0
+        for name, table in self.to_tables().items():
+            table_sha256, table_size = write_columnar_table(os.path.join(directory, name), table)
+            digest.update(f"{name}:{table_sha256}\n".encode("utf-8"))
+            size += table_size
+
+        manifest = self.get_manifest()
+        previous = manifest.get_hash(directory)
+        sha256 = digest.hexdigest()
+        manifest.record(directory, sha256, size)
+        status = "unchanged" if sha256 == previous else "changed"
+        print(f"Columnar tables dumped to {directory}! ({status}, sha256 {sha256[:12]})")
+
+    def load_columnar(self, table, columns=None, mmap=True, as_frame=True):
+        """
+        Load (some of the columns of) one of the tables saved with save_columnar. Does not change the data attr.
+
+        Args:
+            table (str): The name of the table, e.g., "fighters" or "records".
+            columns ([str], None): The columns to load. If None, all columns are loaded.
+            mmap (bool): If True, memory maps the arrays instead of reading them into memory.
+            as_frame (bool): If True, returns a DataFrame. Otherwise returns a dict of numpy arrays and
+                pd.Categoricals.
+
+        Returns:
+            (pd.DataFrame, dict): The table.
+        """
+        directory = os.path.join(self.get_columnar_dirname(), table)
+        return read_columnar_table(directory, columns=columns, mmap=mmap, as_frame=as_frame)
+
+    def get_columnar_dirname(self):
+        """
+        Get the directory the columnar tables are saved in.
+
+        Returns:
+            (str): The directory.
+        """
+        return os.path.splitext(strip_compression_extension(self.data_filename))[0] + "_columnar"
+
+    def save_jsonl(self):
+        """
+        Save the data as line-delimited json with one entry per line, next to data_filename, plus an index of the
+        byte offset of each entry, for on-demand access with load_lazy.
+
+        Entries of dict data are keyed by their keys, entries of list data by their (string) position in the list.
+
+        Returns:
+            None
+        """
+        if isinstance(self.data, dict):
+            items = self.data.items()
+        else:
+            items = ((str(i), v) for i, v in enumerate(self.data))
+        filename = self.get_jsonl_filename()
+        write_jsonl(filename, items)
+        print(f"File dumped to {filename}!")
+
+    def load_lazy(self, cache_size=256):
+        """
+        Get a read-only mapping over the data saved with save_jsonl, which reads and decodes entries only as they are
+        accessed, keeping the cache_size most recently used ones in memory. Does not change the data attr. Entries
+        are shared with the mapping's cache, so copy them before modifying them.
+
+        Args:
+            cache_size (int): The maximum number of decoded entries kept in memory.
+
+        Returns:
+            (mmai.data.storage.LazyJsonlMapping): The mapping, e.g., {fighter name: fighter data} for processed data.
+        """
+        return LazyJsonlMapping(self.get_jsonl_filename(), cache_size=cache_size)
+
+    def get_jsonl_filename(self):
+        """
+        Get the path the line-delimited json data is saved to.
+
+        Returns:
+            (str): The path.
+        """
+        return os.path.splitext(strip_compression_extension(self.data_filename))[0] + ".jsonl"
+
+    def get_journal(self):
+        """
+        Get the journal of completed work for resumable scrapes, kept next to the data file.
+
+        Returns:
+            (mmai.data.journal.Journal): The journal.
+        """
+        return Journal(self.data_filename + ".journal")
+
+    def fetch(self, url, **kwargs):
+        """
+        Fetch a url, blocking while max_per_host requests to the same host are already in flight.
+
+        If the cache attr is set, the url is served from (and stored to) the on-disk cache, revalidating cached pages
+        with conditional requests. Safe to call from multiple threads.
+
+        Args:
+            url (str): The full url to fetch.
+            **kwargs: Passed to the session's get, e.g., headers.
+
+        Returns:
+            (requests.Response, mmai.data.cache.CachedResponse): The response.
+        """
+        if self.cache:
+            return self.cache.fetch(url, self._fetch_from_network, **kwargs)
+        return self._fetch_from_network(url, **kwargs)
+
+    def _fetch_from_network(self, url, **kwargs):
+        with self.get_host_semaphore(url):
+            return self.session.get(url, **kwargs)
+
+    def make_soup(self, content, only_tables=False):
+        """
+        Parse html content with this scraper's parser.
+
+        Args:
+            content (bytes, str): The raw html.
+            only_tables (bool): If True, only <table> elements are kept, which is faster for pages where nothing
+                outside of tables is needed.
+
+        Returns:
+            (BeautifulSoup): The parsed page.
+        """
+        return make_soup(content, self.parser, only_tables=only_tables)
+
+    def get_host_semaphore(self, url):
+        """
+        Get the semaphore limiting concurrent requests to the host of a url.
+
+        Args:
+            url (str): The full url.
+
+        Returns:
+            (threading.BoundedSemaphore): The semaphore shared by all urls on the same host.
+        """
+        host = urlparse(url).netloc
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
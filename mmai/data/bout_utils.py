@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+
+# Result codes, from the point of view of fighter_1, and each code from fighter_2's point of view (indexed by code, with
+# -1 for unknown results last). Defined here rather than in mmai.data.bouts, which imports them from here, so that
+# bouts can use these helpers too.
+RESULTS = ["Win", "Loss", "Draw", "NC"]
+WIN, LOSS, DRAW, NC = range(len(RESULTS))
+FLIPPED_RESULTS = np.array([LOSS, WIN, DRAW, NC, -1], dtype=np.int8)
+
+# Fighter ids are shifted past the days since 1970 in fighter-date keys, which are offset to be non-negative
+DAY_BITS = 32
+DAY_OFFSET = 1 << (DAY_BITS - 1)
+
+
+def flip_results(results):
+    """
+    Get results from the other fighter's point of view, e.g., fighter_2's results from fighter_1's. Wins and losses
+    are swapped, and draws, no contests, and unknown results (-1) are unchanged.
+
+    Args:
+        results (np.ndarray): The int8 result codes into RESULTS.
+
+    Returns:
+        (np.ndarray): The flipped int8 result codes.
+    """
+    return FLIPPED_RESULTS[results]
+
+
+def interleave(first, second):
+    """
+    Interleave two arrays of the same length, e.g., [a0, a1] and [b0, b1] -> [a0, b0, a1, b1].
+
+    Args:
+        first (np.ndarray): The values at even positions.
+        second (np.ndarray): The values at odd positions.
+
+    Returns:
+        (np.ndarray): The interleaved values.
+    """
+    return np.stack([first, second], axis=1).ravel()
+
+
+def get_dated_bout_index(bout_table, start=0):
+    """
+    Get the indexes of the bouts of a bout table from start on which have a date, in date order (in table order for
+    bouts on the same date).
+
+    Args:
+        bout_table (mmai.data.bouts.BoutTable): The bout table.
+        start (int): The index of the first bout.
+
+    Returns:
+        (np.ndarray): The int64 bout indexes.
+    """
+    dates = bout_table.data["bouts"]["date"]
+    index = np.arange(start, len(dates))
+    index = index[~np.isnat(dates[index])]
+    return index[np.argsort(dates[index], kind="stable")]
+
+
+def get_fighter_rows(bout_table, index):
+    """
+    Get bouts as two rows each, the bout as seen by fighter_1 and then by fighter_2, interleaved so the rows stay in
+    the order of the bouts.
+
+    Args:
+        bout_table (mmai.data.bouts.BoutTable): The bout table.
+        index (np.ndarray): The indexes of the bouts, e.g., from get_dated_bout_index.
+
+    Returns:
+        (dict): The rows in {column: np.ndarray} format, with columns bout (int32 index in the bout table), fighter and
+            opponent (int32 ids), date (datetime64[D]), and result (int8, from the fighter's point of view).
+    """
+    bouts = bout_table.data["bouts"]
+    fighter_1 = bouts["fighter_1"][index]
+    fighter_2 = bouts["fighter_2"][index]
+    result = bouts["result"][index]
+    return {
+        "bout": np.repeat(index, 2).astype(np.int32),
+        "fighter": interleave(fighter_1, fighter_2).astype(np.int32),
+        "opponent": interleave(fighter_2, fighter_1).astype(np.int32),
+        "date": np.repeat(bouts["date"][index], 2),
+        "result": interleave(result, flip_results(result)).astype(np.int8),
+    }
+
+
+def get_fighter_date_keys(fighter_ids, dates):
+    """
+    Encode (fighter, date) pairs as int64 keys which sort by fighter, then date, for binary searches over the bouts of
+    many fighters at once.
+
+    Args:
+        fighter_ids (np.ndarray): The fighter ids.
+        dates (np.ndarray): The datetime64[D] dates.
+
+    Returns:
+        (np.ndarray): The int64 keys.
+    """
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    return (np.asarray(fighter_ids).astype(np.int64) << DAY_BITS) + (days + DAY_OFFSET)
+
+
+def get_fighter_date_index(fighter_ids, dates):
+    """
+    Sort rows by their (fighter, date) keys, for point-in-time lookups with search_fighter_date_index.
+
+    Args:
+        fighter_ids (np.ndarray): The fighter id of each row.
+        dates (np.ndarray): The datetime64[D] date of each row.
+
+    Returns:
+        (np.ndarray, np.ndarray): The rows in key order (a stable sort, so rows of a fighter on the same date keep
+            their order), and the sorted keys.
+    """
+    keys = get_fighter_date_keys(fighter_ids, dates)
+    order = np.argsort(keys, kind="stable")
+    return order, keys[order]
+
+
+def search_fighter_date_index(index, fighter_ids, dates, before=False):
+    """
+    Find the rows of fighters at dates, all at once, in an index from get_fighter_date_index: the first row of each
+    fighter on or after each date, or with before, the last row of each fighter before each date.
+
+    Args:
+        index ((np.ndarray, np.ndarray)): The output of get_fighter_date_index.
+        fighter_ids (np.ndarray): The fighter ids.
+        dates (np.ndarray): The datetime64[D] dates.
+        before (bool): If True, finds the last row before each date instead.
+
+    Returns:
+        (np.ndarray, np.ndarray): The int64 row of each (fighter, date), and whether there is one. Rows which aren't
+            found are 0.
+    """
+    order, sorted_keys = index
+    fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+    position = np.searchsorted(sorted_keys, get_fighter_date_keys(fighter_ids, dates), side="left")
+    if before:
+        position = position - 1
+        found = position >= 0
+    else:
+        found = position < len(sorted_keys)
+    if not len(sorted_keys):
+        return np.zeros(len(fighter_ids), dtype=np.int64), found
+    row = order[np.clip(position, 0, len(sorted_keys) - 1)]
+    found &= (sorted_keys[np.clip(position, 0, len(sorted_keys) - 1)] >> DAY_BITS) == fighter_ids
+    return np.where(found, row, 0), found
+
+
+def to_dates(dates):
+    """
+    Convert dates to datetime64[D], parsing them only if they aren't datetime64 already.
+
+    Args:
+        dates (list, np.ndarray): The dates (datetime64, or anything pd.to_datetime takes).
+
+    Returns:
+        (np.ndarray): The datetime64[D] dates.
+    """
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    return dates.astype("datetime64[D]")
+
+
+def dates_to_days(dates):
+    """
+    Convert dates to float days since 1970-01-01, for columnar storage.
+
+    Args:
+        dates (np.ndarray): The datetime64 dates.
+
+    Returns:
+        (np.ndarray): The float64 days, NaN for NaT.
+    """
+    days = dates.astype("datetime64[D]")
+    return np.where(np.isnat(days), np.nan, days.astype(np.int64))
+
+
+def days_to_dates(days):
+    """
+    Convert float days since 1970-01-01 back to dates, the inverse of dates_to_days.
+
+    Args:
+        days (list, np.ndarray): The days.
+
+    Returns:
+        (np.ndarray): The datetime64[D] dates, NaT for NaN.
+    """
+    days = np.asarray(days, dtype=np.float64)
+    return np.where(np.isnan(days), np.datetime64("NaT"), days.astype("datetime64[D]")).astype("datetime64[D]")
+
+
+def column_to_list(values):
+    """
+    Convert a column to a list for columnar storage, with dates as float days (see dates_to_days).
+
+    Args:
+        values (np.ndarray): The column.
+
+    Returns:
+        (list): The values.
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        return dates_to_days(values).tolist()
+    return values.tolist()
@@ -0,0 +1,298 @@
+import os
+import re
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import DRAW, LOSS, NC, RESULTS, WIN, dates_to_days, days_to_dates, flip_results
+from mmai.data.names import canonicalize_name, get_join_key
+from mmai.util import parse_wiki_date
+
+
+# The categorical columns of the bout table and the record table headers they are built from
+CATEGORY_COLUMNS = {"method": "Method", "event": "Event", "location": "Location"}
+
+# e.g., " (fighter)" in "/wiki/Tony_Johnson_(fighter)"
+DISAMBIGUATION_REGEX = re.compile(r"\s*\([^)]*\)$")
+TIME_REGEX = re.compile(r"^(\d+):(\d{2})")
+
+
+class BoutTable(DataBase):
+    """
+    A single, deduplicated table of all the bouts in the processed wikipedia records, with interned fighters.
+
+    Every fighter (with a page or only named as an opponent) gets an integer id, which is their position in the
+    fighters table. Each bout is stored once, oriented so that fighter_1 has the lower id, with the result from
+    fighter_1's point of view. Methods, events, and locations are stored as integer codes into their categories.
+
+    Attrs:
+        data (dict): The table in {"bouts": {column: np.ndarray}, "fighters": {"name": [str], "link": [str, None],
+            "birthday": [str, None]}, "method": [str], "event": [str], "location": [str]} format. The bouts columns are
+            fighter_1 and fighter_2 (int32 fighter ids), date (datetime64[D], NaT if unknown), result (int8 code into
+            RESULTS), method, event, and location (int32 codes into their categories, -1 if unknown), round (int8, -1
+            if unknown), and time_s (int16 seconds into the round, -1 if unknown).
+        data_filename (str): A string of the full path where this class's output is saved.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, "static/bouts.json")
+        self._ids = None
+
+    def build(self, processed_data):
+        """
+        Build the bout table from processed wikipedia fighters.
+
+        Opponents are matched to fighters by the join key of their page title or full name, so the same person gets
+        one id no matter which page a bout was listed on. A bout listed on both fighters' pages (same fighters, same
+        date, or same event if the date is unknown) is kept once, from the first page it is listed on.
+
+        Args:
+            processed_data (dict): The output of WikiFightersProcessed.process, in {fighter_name: {data}} format.
+
+        Returns:
+            (dict): The table, also set as the data attr.
+        """
+        names = list(processed_data.keys())
+        links = [fighter["link"] for fighter in processed_data.values()]
+        birthdays = [fighter.get("birthday") for fighter in processed_data.values()]
+        ids = self.get_fighter_ids(names, links)
+
+        fighter_1 = []
+        opponents = []
+        rows = {c: [] for c in ("Res", "Date", "Round", "Time", *CATEGORY_COLUMNS.values())}
+        for fighter_id, fighter in enumerate(processed_data.values()):
+            for fight in fighter["record"]:
+                fighter_1.append(fighter_id)
+                opponents.append(fight.get("Opponent"))
+                for header, values in rows.items():
+                    values.append(fight.get(header))
+
+        # Intern the opponents without pages as new fighters
+        opponent_keys = pd.Series(opponents, dtype=object).map(get_join_key, na_action="ignore")
+        fighter_2 = np.empty(len(opponents), dtype=np.int32)
+        for i, (key, opponent) in enumerate(zip(opponent_keys, opponents)):
+            if not isinstance(key, str) or not key:
+                fighter_2[i] = -1
+                continue
+            if key not in ids:
+                ids[key] = len(names)
+                names.append(canonicalize_name(opponent.strip()))
+                links.append(None)
+                birthdays.append(None)
+            fighter_2[i] = ids[key]
+
+        fighter_1 = np.array(fighter_1, dtype=np.int32)
+        result = self.get_result_codes(rows["Res"])
+        date = self.get_dates(rows["Date"])
+        round_ = pd.to_numeric(pd.Series(rows["Round"], dtype=object), errors="coerce").fillna(-1).to_numpy(np.int8)
+        time_s = self.get_times(rows["Time"])
+        categories = {}
+        codes = {}
+        for column, header in CATEGORY_COLUMNS.items():
+            codes[column], categories[column] = pd.factorize(pd.Series(rows[header], dtype=object))
+            codes[column] = codes[column].astype(np.int32)
+
+        # Orient each bout so fighter_1 has the lower id, then keep the first listing of each bout. Bouts without an
+        # opponent are dropped, before the orientation would swap their -1 into fighter_1.
+        known = fighter_2 >= 0
+        swap = fighter_2 < fighter_1
+        fighter_1, fighter_2 = np.where(swap, fighter_2, fighter_1), np.where(swap, fighter_1, fighter_2)
+        result = np.where(swap, flip_results(result), result).astype(np.int8)
+        # Bouts without a date are told apart by their event instead, with date_known keeping their keys apart from
+        # those of dated bouts
+        date_known = ~np.isnat(date)
+        date_key = np.where(date_known, date.astype(np.int64), codes["event"])
+        keys = pd.DataFrame({"f1": fighter_1, "f2": fighter_2, "date_known": date_known, "date": date_key})
+        keep = known & ~keys.duplicated().to_numpy()
+
+        self.data = {
+            "bouts": {
+                "fighter_1": fighter_1[keep],
+                "fighter_2": fighter_2[keep],
+                "date": date[keep],
+                "result": result[keep],
+                **{column: codes[column][keep] for column in CATEGORY_COLUMNS},
+                "round": round_[keep],
+                "time_s": time_s[keep],
+            },
+            "fighters": {"name": names, "link": links, "birthday": birthdays},
+            **{column: categories[column].tolist() for column in CATEGORY_COLUMNS},
+        }
+        self._ids = ids
+        print(
+            f"Built {int(keep.sum())} bouts between {len(names)} fighters from {len(fighter_1)} record rows "
+            f"({int(known.sum() - keep.sum())} duplicates removed)."
+        )
+        return self.data
+
+    def get_fighter_id(self, name):
+        """
+        Get the id of a fighter by name, page title, or opponent name as written in records.
+
+        Args:
+            name (str): The name, e.g., "Jon Jones".
+
+        Returns:
+            (int, None): The fighter id, or None if the fighter is not in the table.
+        """
+        if self._ids is None:
+            self._ids = self.get_fighter_ids(self.data["fighters"]["name"], self.data["fighters"]["link"])
+        return self._ids.get(get_join_key(name))
+
+    def to_frame(self):
+        """
+        Get the bouts as a DataFrame, with the categorical columns (and fighter names) as pd.Categoricals over the
+        integer codes, which doesn't copy any strings.
+
+        Returns:
+            (pd.DataFrame): The bouts.
+        """
+        bouts = dict(self.data["bouts"])
+        names = self.data["fighters"]["name"]
+        frame = pd.DataFrame(bouts)
+        for column in ("fighter_1", "fighter_2"):
+            frame[column + "_name"] = pd.Categorical.from_codes(bouts[column], categories=names)
+        frame["result"] = pd.Categorical.from_codes(bouts["result"], categories=RESULTS)
+        for column in CATEGORY_COLUMNS:
+            frame[column] = pd.Categorical.from_codes(bouts[column], categories=self.data[column])
+        return frame
+
+    def to_tables(self):
+        """
+        Flatten the bout table into flat tables for columnar storage.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        bouts = dict(self.data["bouts"])
+        bouts["date"] = dates_to_days(bouts["date"])
+        tables = {"bouts": {k: v.tolist() for k, v in bouts.items()}}
+        tables["fighters"] = self.data["fighters"]
+        for column in CATEGORY_COLUMNS:
+            tables[column] = {column: self.data[column]}
+        return tables
+
+    def save(self):
+        """
+        Save the bout table in columnar format, next to data_filename.
+
+        Returns:
+            None
+        """
+        self.save_columnar()
+
+    def load(self):
+        """
+        Load the bout table saved with save.
+
+        Returns:
+            (dict): The table.
+        """
+        bouts = self.load_columnar("bouts", mmap=False, as_frame=False)
+        bouts["date"] = days_to_dates(bouts["date"])
+        for column, dtype in (("fighter_1", np.int32), ("fighter_2", np.int32), ("result", np.int8),
+                              ("round", np.int8), ("time_s", np.int16)):
+            bouts[column] = bouts[column].astype(dtype)
+        for column in CATEGORY_COLUMNS:
+            bouts[column] = bouts[column].astype(np.int32)
+
+        fighters = self.load_columnar("fighters", as_frame=False)
+        self.data = {
+            "bouts": bouts,
+            "fighters": {
+                "name": list(fighters["name"].astype(object)),
+                **{
+                    column: [None if pd.isna(v) else v for v in fighters[column].astype(object)]
+                    for column in ("link", "birthday")
+                },
+            },
+        }
+        for column in CATEGORY_COLUMNS:
+            self.data[column] = list(self.load_columnar(column, as_frame=False)[column].astype(object))
+        self._ids = None
+        return self.data
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_fighter_ids(self, names, links):
+        """
+        Map the join keys of fighters' names and page titles to their ids.
+
+        Args:
+            names ([str]): The fighter names, in id order.
+            links ([str, None]): The fighters' wikipedia relative links, in id order.
+
+        Returns:
+            (dict): The ids in {join key: fighter id} format.
+        """
+        ids = {}
+        for fighter_id, name in enumerate(names):
+            ids.setdefault(get_join_key(name), fighter_id)
+        # Opponents are usually written like the page title rather than the full name, so titles take precedence
+        for fighter_id, link in enumerate(links):
+            if link:
+                ids[get_join_key(self.get_title_from_link(link))] = fighter_id
+        return ids
+
+    def get_title_from_link(self, link):
+        """
+        Get the page title of a wikipedia relative link, without disambiguation, e.g., "/wiki/Tony_Johnson_(fighter)"
+        -> "Tony Johnson".
+
+        Args:
+            link (str): The relative link.
+
+        Returns:
+            (str): The title.
+        """
+        title = unquote(link.split("/wiki/")[-1].split("#")[0]).replace("_", " ")
+        return DISAMBIGUATION_REGEX.sub("", title)
+
+    def get_result_codes(self, results):
+        """
+        Convert record results (e.g., "Win", "Loss", "Draw", "NC") to result codes.
+
+        Args:
+            results ([str]): The results.
+
+        Returns:
+            (np.ndarray): The int8 codes into RESULTS, -1 if unknown.
+        """
+        lookup = {r.lower(): i for i, r in enumerate(RESULTS)}
+        series = pd.Series(results, dtype=object).str.strip().str.lower()
+        return series.map(lookup).fillna(-1).to_numpy(np.int8)
+
+    def get_dates(self, dates):
+        """
+        Parse record dates, parsing each unique date once.
+
+        Args:
+            dates ([str]): The dates as written in the records, e.g., "July 13, 2019".
+
+        Returns:
+            (np.ndarray): The datetime64[D] dates, NaT if they could not be parsed.
+        """
+        series = pd.Series(dates, dtype=object)
+        uniques = pd.unique(series.dropna())
+        parsed = {d: parse_wiki_date(d) for d in uniques}
+        return pd.to_datetime(series.map(parsed)).to_numpy().astype("datetime64[D]")
+
+    def get_times(self, times):
+        """
+        Parse record times into the round (e.g., "4:20") to seconds.
+
+        Args:
+            times ([str]): The times.
+
+        Returns:
+            (np.ndarray): The int16 seconds, -1 if unknown.
+        """
+        parts = pd.Series(times, dtype=object).str.extract(TIME_REGEX)
+        seconds = pd.to_numeric(parts[0], errors="coerce") * 60 + pd.to_numeric(parts[1], errors="coerce")
+        return seconds.fillna(-1).to_numpy(np.int16)
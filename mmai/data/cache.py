@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "static/http_cache"
+)
+
+
+class CacheMissError(Exception):
+    """
+    Raised when a url is requested in cache-only mode but is not in the cache.
+    """
+
+    pass
+
+
+class CachedResponse:
+    """
+    A minimal stand-in for requests.Response for pages served from the cache.
+
+    Attrs:
+        url (str): The url the page was fetched from.
+        content (bytes): The raw page content.
+        status_code (int): The status code of the original response.
+        headers (dict): The cache validators (ETag, Last-Modified) of the original response.
+        from_cache (bool): Always True.
+    """
+
+    def __init__(self, url, content, status_code=200, headers=None):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """
+    A persistent, size-bounded on-disk cache for HTTP responses, shared by all the scrapers.
+
+    Page bodies are stored content-addressed (by sha256) in cache_dir/blobs, so identical pages under different urls are
+    stored once. Each url has a small json entry in cache_dir/entries holding the blob hash and the ETag/Last-Modified
+    validators used to revalidate it. The modification time of an entry file is its last access time; when the total
+    size of the blobs exceeds max_bytes, the least recently used entries are evicted. A blob is deleted as soon as no
+    entry points to it any more, once its entries are replaced or evicted, and blobs left without an entry by a crash
+    are deleted when the cache is opened.
+
+    Attrs:
+        cache_dir (str): The directory the cache lives in.
+        max_bytes (int): The maximum total size of the cached page bodies, in bytes.
+        cache_only (bool): If True, never touch the network; urls missing from the cache raise CacheMissError.
+        revalidate (bool): If True, cached pages are revalidated with a conditional request. If False, any cached page
+            is returned as-is.
+    """
+
+    def __init__(
+            self,
+            cache_dir=DEFAULT_CACHE_DIR,
+            max_bytes=4 * 1024 ** 3,
+            cache_only=False,
+            revalidate=True,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.revalidate = revalidate
+
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.entries_dir = os.path.join(cache_dir, "entries")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._blob_sizes = {}
+        self._blob_refs = {}
+        self._size = 0
+        self._load_entries()
+
+    def fetch(self, url, get, **kwargs):
+        """
+        Fetch a url through the cache.
+
+        Args:
+            url (str): The full url to fetch.
+            get (callable): Called as get(url, **kwargs) to fetch the url from the network, e.g., requests.get.
+            **kwargs: Passed to get. Conditional request headers are added to any headers given here.
+
+        Returns:
+            (requests.Response, CachedResponse): The fresh response from the network, or the cached one if the cached
+                one is still valid (or the cache is in cache-only mode).
+        """
+        entry = self.get_entry(url)
+
+        if self.cache_only or (entry and not self.revalidate):
+            if not entry:
+                raise CacheMissError(f"{url} is not in the cache at {self.cache_dir}.")
+            return self.get_response(url)
+
+        if entry:
+            headers = dict(kwargs.pop("headers", None) or {})
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = headers
+
+        r = get(url, **kwargs)
+
+        if r.status_code == 304 and entry:
+            return self.get_response(url)
+        elif r.status_code == 200:
+            self.put(url, r.content, headers=r.headers)
+        return r
+
+    def get_entry(self, url):
+        """
+        Get the cache entry for a url.
+
+        Args:
+            url (str): The full url.
+
+        Returns:
+            (dict, None): The entry, containing the blob hash and validators, or None if the url is not cached.
+        """
+        with self._lock:
+            return self._entries.get(self._url_key(url))
+
+    def get_response(self, url):
+        """
+        Read a cached page from disk and mark it as recently used.
+
+        Args:
+            url (str): The full url.
+
+        Returns:
+            (CachedResponse, None): The cached response, or None if the url is not cached.
+        """
+        with self._lock:
+            key = self._url_key(url)
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            entry["accessed"] = time.time()
+            os.utime(self._entry_path(key))
+            with open(self._blob_path(entry["blob"]), "rb") as f:
+                content = f.read()
+
+        headers = {}
+        if entry.get("etag"):
+            headers["ETag"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["Last-Modified"] = entry["last_modified"]
+        return CachedResponse(url, content, status_code=entry["status_code"], headers=headers)
+
+    def put(self, url, content, headers=None, status_code=200):
+        """
+        Store a page in the cache, evicting least recently used pages if the cache grows past max_bytes.
+
+        Args:
+            url (str): The full url.
+            content (bytes): The raw page content.
+            headers (dict): The response headers, used for the ETag and Last-Modified validators.
+            status_code (int): The status code of the response.
+
+        Returns:
+            None
+        """
+        headers = headers or {}
+        blob = hashlib.sha256(content).hexdigest()
+        key = self._url_key(url)
+        entry = {
+            "url": url,
+            "blob": blob,
+            "size": len(content),
+            "status_code": status_code,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "accessed": time.time(),
+        }
+
+        with self._lock:
+            blob_path = self._blob_path(blob)
+            if blob not in self._blob_sizes:
+                self._write_atomic(blob_path, content)
+                self._blob_sizes[blob] = len(content)
+                self._size += len(content)
+
+            self._blob_refs[blob] = self._blob_refs.get(blob, 0) + 1
+            old = self._entries.get(key)
+            if old:
+                self._release_blob(old["blob"])
+            self._entries[key] = entry
+            self._write_atomic(self._entry_path(key), json.dumps(entry).encode("utf-8"))
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cached page bodies fit in max_bytes.
+
+        Returns:
+            (int): The number of entries evicted.
+        """
+        with self._lock:
+            if self.size <= self.max_bytes:
+                return 0
+            n_evicted = 0
+            by_access = sorted(self._entries.items(), key=lambda kv: kv[1]["accessed"])
+            for key, entry in by_access:
+                if self.size <= self.max_bytes:
+                    break
+                del self._entries[key]
+                os.remove(self._entry_path(key))
+                self._release_blob(entry["blob"])
+                n_evicted += 1
+            return n_evicted
+
+    @property
+    def size(self):
+        """
+        The total size of the cached page bodies, in bytes.
+        """
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return self.get_entry(url) is not None
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def _load_entries(self):
+        for filename in os.listdir(self.entries_dir):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.entries_dir, filename)
+            try:
+                with open(path, "r") as f:
+                    entry = json.load(f)
+            except ValueError:
+                os.remove(path)
+                continue
+            blob = entry["blob"]
+            if not os.path.exists(self._blob_path(blob)):
+                os.remove(path)
+                continue
+            entry["accessed"] = os.path.getmtime(path)
+            self._entries[filename[:-len(".json")]] = entry
+            if blob not in self._blob_sizes:
+                self._blob_sizes[blob] = entry["size"]
+                self._size += entry["size"]
+            self._blob_refs[blob] = self._blob_refs.get(blob, 0) + 1
+
+        # Blobs no entry points to, e.g., left by a crash between writing a page and its entry, or by a dropped entry,
+        # and temporary files left by a crash mid-write
+        for directory, kept in ((self.blobs_dir, self._blob_refs), (self.entries_dir, ())):
+            for filename in os.listdir(directory):
+                if filename.endswith(".tmp") or (directory == self.blobs_dir and filename not in kept):
+                    os.remove(os.path.join(directory, filename))
+
+    def _release_blob(self, blob):
+        self._blob_refs[blob] -= 1
+        if self._blob_refs[blob] == 0:
+            del self._blob_refs[blob]
+            self._size -= self._blob_sizes.pop(blob)
+            os.remove(self._blob_path(blob))
+
+    def _url_key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, key + ".json")
+
+    def _blob_path(self, blob):
+        return os.path.join(self.blobs_dir, blob)
+
+    def _write_atomic(self, path, content):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
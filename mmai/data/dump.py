@@ -0,0 +1,79 @@
+import bz2
+import gzip
+import json
+import re
+import tarfile
+
+
+# Every "name" key in a line, including those of nested objects (e.g., "namespace" or "is_part_of")
+NAME_REGEX = re.compile(rb'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def open_dump_file(path):
+    """
+    Open a (possibly compressed) dump file for incremental binary reading, picking the compression by extension.
+
+    Args:
+        path (str): The path to a .bz2, .gz, or uncompressed file.
+
+    Returns:
+        A binary file object.
+    """
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    elif path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    else:
+        return open(path, "rb")
+
+
+def iter_html_dump(path, titles=None):
+    """
+    Stream the pages of a wikipedia html dump, holding only one page in memory at a time.
+
+    The dump is in the Wikimedia Enterprise html dump format: newline-delimited json with one article per line, each
+    having a "name" (the page title) and an "article_body" containing the rendered "html". It can be a single .ndjson
+    file (optionally .bz2 or .gz compressed) or a tar archive of them, as distributed by Wikimedia.
+
+    Args:
+        path (str): The path to the dump.
+        titles (set, None): If given, only pages with these titles (with underscores or spaces) are yielded. Pages
+            that are not selected are skipped without decoding their json.
+
+    Yields:
+        (str, str): The title and html of each page.
+    """
+    if titles is not None:
+        titles = {t.replace("_", " ") for t in titles}
+
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                f = tar.extractfile(member)
+                for title, html in _iter_ndjson_pages(f, titles):
+                    yield title, html
+    else:
+        with open_dump_file(path) as f:
+            for title, html in _iter_ndjson_pages(f, titles):
+                yield title, html
+
+
+def _iter_ndjson_pages(f, titles):
+    for line in f:
+        if not line.strip():
+            continue
+        if titles is not None:
+            # Skip unselected pages without decoding the whole article: the article's top level "name" is one of the
+            # "name" keys in the line, so a line with none in titles can't be selected
+            names = (json.loads(b'"' + match.group(1) + b'"') for match in NAME_REGEX.finditer(line))
+            if not any(name in titles for name in names):
+                continue
+        article = json.loads(line)
+        title = article.get("name")
+        if titles is not None and title not in titles:
+            continue
+        html = (article.get("article_body") or {}).get("html")
+        if html:
+            yield title, html
@@ -0,0 +1,319 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import (
+    column_to_list,
+    days_to_dates,
+    get_dated_bout_index,
+    get_fighter_date_index,
+    get_fighter_rows,
+    search_fighter_date_index,
+    to_dates,
+)
+from mmai.data.bouts import DRAW, LOSS, NC, WIN
+
+
+# Cumulative counts kept per fighter, and the result or method flag each one counts
+COUNT_COLUMNS = ["fights", "wins", "losses", "draws", "no_contests", "ko_wins", "submission_wins", "decision_wins"]
+STREAK_COLUMNS = ["win_streak", "loss_streak"]
+STATE_COLUMNS = COUNT_COLUMNS + STREAK_COLUMNS + ["last_date"]
+
+# e.g., "KO (punches)", "TKO (doctor stoppage)", "Technical knockout"
+KO_REGEX = re.compile(r"\bt?ko\b|knockout")
+
+# The point-in-time features of a fighter going into a bout
+FEATURE_COLUMNS = COUNT_COLUMNS + STREAK_COLUMNS + ["finish_rate", "days_since_last", "age_days"]
+
+
+class FeatureStore(DataBase):
+    """
+    Point-in-time fighter features, computed from the bout table without looking ahead.
+
+    Bouts are walked in date order, and each fighter's state going into each bout is computed only from their earlier
+    bouts: their record, ko/submission/decision wins, current win and loss streaks, finish rate, days since their last
+    bout, and age at the bout. Everything is computed with cumulative sums per fighter, so the whole history takes
+    O(bouts) work, and new bouts can be appended by continuing from each fighter's saved final state.
+
+    Attrs:
+        data (dict): In {"features": {column: np.ndarray}, "state": {column: np.ndarray}, "birthday": np.ndarray}
+            format. The features have two rows per bout, one per fighter, with columns bout (the bout's index in the
+            bout table), fighter, opponent, date, result (from the fighter's point of view, the label), and the
+            FEATURE_COLUMNS. The state is each fighter's STATE_COLUMNS after all the bouts so far, indexed by fighter
+            id. birthday is the datetime64[D] birthday of each fighter id.
+        data_filename (str): A string of the full path where this class's output is saved.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, "static/features.json")
+        self._index = None
+
+    def build(self, bout_table):
+        """
+        Compute the features of every bout in a bout table from scratch.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table, built or loaded.
+
+        Returns:
+            (dict): The features and final states, also set as the data attr.
+        """
+        n_fighters = len(bout_table.data["fighters"]["name"])
+        self.data = {
+            "features": {},
+            "state": {
+                **{c: np.zeros(n_fighters, dtype=np.int32) for c in COUNT_COLUMNS + STREAK_COLUMNS},
+                "last_date": np.full(n_fighters, np.datetime64("NaT"), dtype="datetime64[D]"),
+            },
+            "birthday": None,
+        }
+        return self.update(bout_table)
+
+    def update(self, bout_table, start=None):
+        """
+        Compute the features of the bouts appended to a bout table since the last build or update, continuing from
+        each fighter's saved state rather than replaying their history.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table, with the new bouts appended after the ones
+                already computed, and no new bout dated before the last one computed.
+            start (int, None): The index of the first new bout. If None, the first bout not yet computed.
+
+        Returns:
+            (dict): The features and final states, also set as the data attr.
+        """
+        features = self.data["features"]
+        state = self.data["state"]
+        if start is None:
+            start = int(features["bout"].max()) + 1 if len(features.get("bout", ())) else 0
+
+        n_fighters = len(bout_table.data["fighters"]["name"])
+        self._grow(n_fighters, bout_table.data["fighters"]["birthday"])
+
+        new = self.get_fighter_bouts(bout_table, start)
+        if len(new["bout"]) and len(features.get("date", ())):
+            last = features["date"].max()
+            if new["date"].min() < last:
+                raise ValueError(f"New bouts must not be dated before the last bout already computed ({last}).")
+
+        fighter = new["fighter"]
+        for column in COUNT_COLUMNS:
+            flags = new[column]
+            # Counts before each bout: the fighter's saved count plus their earlier new bouts
+            earlier = pd.Series(flags).groupby(fighter).cumsum().to_numpy() - flags
+            new[column] = (state[column][fighter] + earlier).astype(np.int32)
+            state[column] += np.bincount(fighter, weights=flags, minlength=n_fighters).astype(np.int32)
+
+        result = new["result"]
+        for column, code in (("win_streak", WIN), ("loss_streak", LOSS)):
+            new[column], state[column] = self._get_streaks(fighter, result == code, state[column])
+
+        wins = new["wins"].astype(np.float32)
+        finishes = (new["ko_wins"] + new["submission_wins"]).astype(np.float32)
+        new["finish_rate"] = np.where(wins > 0, finishes / np.maximum(wins, 1), np.nan).astype(np.float32)
+
+        date = new["date"]
+        previous = pd.Series(date).groupby(fighter).shift(1).to_numpy().astype("datetime64[D]")
+        previous = np.where(np.isnat(previous), state["last_date"][fighter], previous)
+        new["days_since_last"] = self._days(date - previous)
+        new["age_days"] = self._days(date - self.data["birthday"][fighter])
+        last_index = pd.Series(np.arange(len(fighter))).groupby(fighter).last()
+        state["last_date"][last_index.index.to_numpy()] = date[last_index.to_numpy()]
+
+        for column, values in new.items():
+            features[column] = np.concatenate([features[column], values]) if column in features else values
+        self._index = None
+        print(f"Computed features for {len(np.unique(new['bout']))} bouts, {len(features['bout']) // 2} in total.")
+        return self.data
+
+    def get_state(self, fighter_ids, dates):
+        """
+        Get the state of fighters as of dates, from only their bouts before each date, all at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            dates (np.ndarray): The dates (datetime64, or anything pd.to_datetime takes).
+
+        Returns:
+            (dict): The FEATURE_COLUMNS of each (fighter, date), in {column: np.ndarray} format.
+        """
+        fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+        dates = to_dates(dates)
+        features = self.data["features"]
+        state = self.data["state"]
+        n_rows = len(features.get("fighter", ()))
+
+        # The first bout of a fighter on or after a date has their state going into it, if there is one. Otherwise,
+        # their final state is their state as of the date.
+        found = np.zeros(len(fighter_ids), dtype=bool)
+        row = np.zeros(len(fighter_ids), dtype=np.int64)
+        if n_rows:
+            row, found = search_fighter_date_index(self._get_index(), fighter_ids, dates)
+
+        result = {}
+        for column in COUNT_COLUMNS + STREAK_COLUMNS:
+            from_row = features[column][row] if n_rows else 0
+            result[column] = np.where(found, from_row, state[column][fighter_ids]).astype(np.int32)
+        last_date = state["last_date"][fighter_ids]
+        if n_rows:
+            days_since_last = features["days_since_last"][row]
+            row_last_date = features["date"][row] - np.nan_to_num(days_since_last).astype("timedelta64[D]")
+            row_last_date = np.where(np.isnan(days_since_last), np.datetime64("NaT"), row_last_date)
+            last_date = np.where(found, row_last_date, last_date).astype("datetime64[D]")
+        wins = result["wins"].astype(np.float32)
+        finishes = (result["ko_wins"] + result["submission_wins"]).astype(np.float32)
+        result["finish_rate"] = np.where(wins > 0, finishes / np.maximum(wins, 1), np.nan).astype(np.float32)
+        result["days_since_last"] = self._days(dates - last_date)
+        result["age_days"] = self._days(dates - self.data["birthday"][fighter_ids])
+        return result
+
+    def to_frame(self):
+        """
+        Get the features as a DataFrame.
+
+        Returns:
+            (pd.DataFrame): The features, two rows per bout.
+        """
+        return pd.DataFrame(self.data["features"])
+
+    def to_tables(self):
+        """
+        Flatten the features and states into flat tables for columnar storage.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        tables = {}
+        for name in ("features", "state"):
+            tables[name] = {c: column_to_list(v) for c, v in self.data[name].items()}
+        tables["fighters"] = {"birthday": column_to_list(self.data["birthday"])}
+        return tables
+
+    def save(self):
+        """
+        Cache the features and states in columnar format, next to data_filename.
+
+        Returns:
+            None
+        """
+        self.save_columnar()
+
+    def load(self):
+        """
+        Load the features and states cached with save.
+
+        Returns:
+            (dict): The features and final states.
+        """
+        self.data = {}
+        for name in ("features", "state"):
+            table = self.load_columnar(name, mmap=False, as_frame=False)
+            for column in ("date", "last_date"):
+                if column in table:
+                    table[column] = days_to_dates(table[column])
+            for column in COUNT_COLUMNS + STREAK_COLUMNS + ["bout", "fighter", "opponent"]:
+                if column in table:
+                    table[column] = table[column].astype(np.int32)
+            if "result" in table:
+                table["result"] = table["result"].astype(np.int8)
+            self.data[name] = table
+        self._index = None
+        self.data["birthday"] = days_to_dates(self.load_columnar("fighters", mmap=False, as_frame=False)["birthday"])
+        return self.data
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_fighter_bouts(self, bout_table, start=0):
+        """
+        Get the bouts from start on with dates, as two rows per bout (one per fighter), in date order.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table.
+            start (int): The index of the first bout.
+
+        Returns:
+            (dict): The rows in {column: np.ndarray} format, with columns bout, fighter, opponent, date, result (from
+                the fighter's point of view), and the 0/1 flags each of the COUNT_COLUMNS counts.
+        """
+        index = get_dated_bout_index(bout_table, start)
+        rows = get_fighter_rows(bout_table, index)
+
+        method_kinds = self.get_method_kinds(bout_table.data["method"])
+        method = np.repeat(bout_table.data["bouts"]["method"][index], 2)
+        kind = np.where(method >= 0, method_kinds[np.maximum(method, 0)], "")
+
+        result = rows["result"]
+        win = result == WIN
+        return {
+            **rows,
+            "fights": np.ones(len(result), dtype=np.int32),
+            "wins": win.astype(np.int32),
+            "losses": (result == LOSS).astype(np.int32),
+            "draws": (result == DRAW).astype(np.int32),
+            "no_contests": (result == NC).astype(np.int32),
+            "ko_wins": (win & (kind == "ko")).astype(np.int32),
+            "submission_wins": (win & (kind == "submission")).astype(np.int32),
+            "decision_wins": (win & (kind == "decision")).astype(np.int32),
+        }
+
+    def get_method_kinds(self, methods):
+        """
+        Classify methods as written in records, e.g., "TKO (punches)" or "Decision (unanimous)".
+
+        Args:
+            methods ([str]): The method categories of the bout table.
+
+        Returns:
+            (np.ndarray): "ko", "submission", "decision", or "" for each method (or one "" if there are none).
+        """
+        lower = pd.Series(methods, dtype=object).str.lower()
+        kinds = np.full(max(len(methods), 1), "", dtype=object)
+        kinds[:len(methods)][lower.str.contains("decision", na=False).to_numpy()] = "decision"
+        kinds[:len(methods)][lower.str.contains("submission", na=False).to_numpy()] = "submission"
+        kinds[:len(methods)][lower.str.contains(KO_REGEX, na=False).to_numpy()] = "ko"
+        return kinds
+
+    def _get_streaks(self, fighter, flags, initial):
+        # The streak going into each bout is the run of flags ending at the fighter's previous bout, continuing from
+        # their saved streak until their first new bout that breaks it
+        flags = pd.Series(flags.astype(np.int32))
+        breaks = (1 - flags).groupby(fighter).cumsum()
+        after = flags.groupby([fighter, breaks.to_numpy()]).cumsum().to_numpy()
+        after = np.where(breaks.to_numpy() == 0, after + initial[fighter], after)
+        before = pd.Series(after).groupby(fighter).shift(1).to_numpy()
+        before = np.where(np.isnan(before), initial[fighter], before).astype(np.int32)
+
+        final = initial.copy()
+        last_index = pd.Series(np.arange(len(fighter))).groupby(fighter).last()
+        final[last_index.index.to_numpy()] = after[last_index.to_numpy()]
+        return before, final
+
+    def _get_index(self):
+        # Cached between lookups until rows are added or loaded
+        if self._index is None:
+            self._index = get_fighter_date_index(self.data["features"]["fighter"], self.data["features"]["date"])
+        return self._index
+
+    def _grow(self, n_fighters, birthdays):
+        state = self.data["state"]
+        n = len(state["fights"])
+        if n_fighters > n:
+            for column in COUNT_COLUMNS + STREAK_COLUMNS:
+                state[column] = np.concatenate([state[column], np.zeros(n_fighters - n, dtype=np.int32)])
+            state["last_date"] = np.concatenate(
+                [state["last_date"], np.full(n_fighters - n, np.datetime64("NaT"), dtype="datetime64[D]")]
+            )
+        self.data["birthday"] = pd.to_datetime(
+            pd.Series(birthdays, dtype=object), errors="coerce"
+        ).to_numpy().astype("datetime64[D]")
+
+    def _days(self, timedeltas):
+        timedeltas = timedeltas.astype("timedelta64[D]")
+        return np.where(np.isnat(timedeltas), np.nan, timedeltas.astype(np.int64)).astype(np.float32)
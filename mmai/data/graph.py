@@ -0,0 +1,269 @@
+import os
+
+import numpy as np
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import column_to_list, days_to_dates, flip_results, get_fighter_date_keys, to_dates
+from mmai.data.bouts import WIN
+
+
+class OpponentGraph(DataBase):
+    """
+    The fighters and bouts of the bout table as a graph, in compressed sparse row (CSR) format.
+
+    Fighters are nodes and each bout is two directed edges, one from each fighter to their opponent, with the bout's
+    date and result from the edge's source fighter's point of view. The edges of fighter i are
+    neighbor[indptr[i]:indptr[i + 1]], sorted by date, so "opponents before a date" is one binary search. Queries take
+    arrays of fighters and dates and are answered all at once, with set intersections and breadth first searches over
+    the edges of every query at the same time.
+
+    Attrs:
+        data (dict): In {"indptr": np.ndarray, "neighbor": np.ndarray, "date": np.ndarray, "result": np.ndarray,
+            "bout": np.ndarray} format. indptr (int64) has n_fighters + 1 offsets into the edge arrays: neighbor (int32
+            opponent ids), date (datetime64[D]), result (int8 codes into bouts.RESULTS), and bout (int32 index in the
+            bout table).
+        data_filename (str): A string of the full path where this class's output is saved.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, "static/opponent_graph.json")
+        self._keys = None
+
+    def build(self, bout_table):
+        """
+        Build the graph from the dated bouts of a bout table.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table, built or loaded.
+
+        Returns:
+            (dict): The graph, also set as the data attr.
+        """
+        bouts = bout_table.data["bouts"]
+        n_fighters = len(bout_table.data["fighters"]["name"])
+        index = np.flatnonzero(~np.isnat(bouts["date"]))
+        result_1 = bouts["result"][index]
+        result_2 = flip_results(result_1)
+
+        source = np.concatenate([bouts["fighter_1"][index], bouts["fighter_2"][index]])
+        neighbor = np.concatenate([bouts["fighter_2"][index], bouts["fighter_1"][index]])
+        date = np.concatenate([bouts["date"][index], bouts["date"][index]])
+        order = np.lexsort((date, source))
+
+        self.data = {
+            "indptr": np.concatenate([[0], np.cumsum(np.bincount(source, minlength=n_fighters))]).astype(np.int64),
+            "neighbor": neighbor[order].astype(np.int32),
+            "date": date[order],
+            "result": np.concatenate([result_1, result_2])[order],
+            "bout": np.concatenate([index, index])[order].astype(np.int32),
+        }
+        self._keys = None
+        print(f"Built an opponent graph of {n_fighters} fighters and {len(order)} edges.")
+        return self.data
+
+    def get_opponents(self, fighter_id, before=None, wins_only=False):
+        """
+        Get the opponents of a fighter.
+
+        Args:
+            fighter_id (int): The fighter id.
+            before (str, np.datetime64, None): If given, only bouts before this date are included.
+            wins_only (bool): If True, only the opponents the fighter beat are included.
+
+        Returns:
+            (np.ndarray): The unique int32 opponent ids.
+        """
+        start = self.data["indptr"][fighter_id]
+        end = self.get_ends([fighter_id], None if before is None else [before])[0]
+        neighbor = self.data["neighbor"][start:end]
+        if wins_only:
+            neighbor = neighbor[self.data["result"][start:end] == WIN]
+        return np.unique(neighbor)
+
+    def count_common_opponents(self, fighter_ids, other_ids, dates=None):
+        """
+        Count the opponents that pairs of fighters have both fought, before dates, for all pairs at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            other_ids (np.ndarray): The other fighter ids.
+            dates (np.ndarray, None): If given, only bouts before each pair's date are included.
+
+        Returns:
+            (np.ndarray): The int32 number of common opponents of each pair.
+        """
+        n = len(fighter_ids)
+        codes = self.get_neighbor_codes(fighter_ids, dates)
+        other_codes = self.get_neighbor_codes(other_ids, dates)
+        shared = codes[self._isin_sorted(codes, other_codes)]
+        return np.bincount(shared // self.get_n_fighters(), minlength=n).astype(np.int32)
+
+    def get_common_opponents(self, fighter_id, other_id, before=None):
+        """
+        Get the opponents two fighters have both fought.
+
+        Args:
+            fighter_id (int): The fighter id.
+            other_id (int): The other fighter id.
+            before (str, np.datetime64, None): If given, only bouts before this date are included.
+
+        Returns:
+            (np.ndarray): The sorted int32 ids of the common opponents.
+        """
+        return np.intersect1d(self.get_opponents(fighter_id, before), self.get_opponents(other_id, before))
+
+    def get_win_paths(self, fighter_ids, other_ids, dates=None, max_hops=2):
+        """
+        Find the shortest chains of wins from fighters to other fighters, e.g., A beat C who beat B is 2 hops from A
+        to B, with a breadth first search over the wins before each pair's date, for all pairs at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids the chains start from.
+            other_ids (np.ndarray): The fighter ids the chains end at.
+            dates (np.ndarray, None): If given, only bouts before each pair's date are included.
+            max_hops (int): The longest chain to search for.
+
+        Returns:
+            (np.ndarray): The int8 length of each pair's shortest chain of wins, 0 if there is none within max_hops.
+        """
+        n_fighters = self.get_n_fighters()
+        fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+        other_ids = np.asarray(other_ids, dtype=np.int64)
+        dates = None if dates is None else to_dates(dates)
+        hops = np.zeros(len(fighter_ids), dtype=np.int8)
+
+        # The frontier is (query, fighter) pairs, encoded as query * n_fighters + fighter
+        frontier = np.arange(len(fighter_ids), dtype=np.int64) * n_fighters + fighter_ids
+        visited = frontier
+        for hop in range(1, max_hops + 1):
+            query = frontier // n_fighters
+            query_dates = None if dates is None else dates[query]
+            segment, edges = self.get_edges(frontier % n_fighters, query_dates)
+            wins = self.data["result"][edges] == WIN
+            query = query[segment[wins]]
+            frontier = self._unique(query * n_fighters + self.data["neighbor"][edges[wins]])
+
+            reached = frontier[frontier % n_fighters == other_ids[frontier // n_fighters]] // n_fighters
+            hops[reached] = hop
+            # Queries which reached their target are done, and fighters already visited need no second visit
+            frontier = frontier[(hops[frontier // n_fighters] == 0) & ~self._isin_sorted(frontier, visited)]
+            if not len(frontier):
+                break
+            visited = self._unique(np.concatenate([visited, frontier]))
+        return hops
+
+    def to_tables(self):
+        """
+        Flatten the graph into flat tables for columnar storage.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        edges = {c: column_to_list(self.data[c]) for c in ("neighbor", "date", "result", "bout")}
+        return {"edges": edges, "nodes": {"indptr": self.data["indptr"].tolist()}}
+
+    def save(self):
+        """
+        Save the graph in columnar format, next to data_filename.
+
+        Returns:
+            None
+        """
+        self.save_columnar()
+
+    def load(self):
+        """
+        Load the graph saved with save.
+
+        Returns:
+            (dict): The graph.
+        """
+        edges = self.load_columnar("edges", mmap=False, as_frame=False)
+        self.data = {
+            "indptr": self.load_columnar("nodes", mmap=False, as_frame=False)["indptr"].astype(np.int64),
+            "neighbor": edges["neighbor"].astype(np.int32),
+            "date": days_to_dates(edges["date"]),
+            "result": edges["result"].astype(np.int8),
+            "bout": edges["bout"].astype(np.int32),
+        }
+        self._keys = None
+        return self.data
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_n_fighters(self):
+        """
+        Get the number of fighters (nodes) in the graph.
+
+        Returns:
+            (int): The number of fighters.
+        """
+        return len(self.data["indptr"]) - 1
+
+    def get_ends(self, fighter_ids, dates=None):
+        """
+        Get where the edges of fighters before dates end, with one binary search over all edges.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            dates (np.ndarray, None): The dates. If None, the end of all of each fighter's edges.
+
+        Returns:
+            (np.ndarray): The int64 end offsets into the edge arrays.
+        """
+        fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+        if dates is None:
+            return self.data["indptr"][fighter_ids + 1]
+        if self._keys is None:
+            # Edges are sorted by fighter, then date, so their (fighter, date) keys are sorted too
+            fighters = np.repeat(np.arange(self.get_n_fighters()), np.diff(self.data["indptr"]))
+            self._keys = get_fighter_date_keys(fighters, self.data["date"])
+        return np.searchsorted(self._keys, get_fighter_date_keys(fighter_ids, to_dates(dates)), side="left")
+
+    def get_edges(self, fighter_ids, dates=None):
+        """
+        Get the edges of many fighters before dates at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            dates (np.ndarray, None): The dates. If None, all edges.
+
+        Returns:
+            (np.ndarray, np.ndarray): The index into fighter_ids of each edge, and the edge's index in the edge arrays.
+        """
+        fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+        starts = self.data["indptr"][fighter_ids]
+        counts = np.maximum(self.get_ends(fighter_ids, dates) - starts, 0)
+        segment = np.repeat(np.arange(len(fighter_ids)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return segment, starts[segment] + offsets
+
+    def get_neighbor_codes(self, fighter_ids, dates=None):
+        """
+        Get the unique opponents of many fighters before dates at once, encoded as query index * n_fighters +
+        opponent id.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            dates (np.ndarray, None): The dates. If None, all opponents.
+
+        Returns:
+            (np.ndarray): The sorted, unique int64 codes.
+        """
+        segment, edges = self.get_edges(fighter_ids, dates)
+        return self._unique(segment * np.int64(self.get_n_fighters()) + self.data["neighbor"][edges])
+
+    def _unique(self, codes):
+        # np.unique hashes integers in recent numpy versions, which is many times slower than sorting for these codes
+        codes = np.sort(codes)
+        return codes[np.concatenate([[True], codes[1:] != codes[:-1]])] if len(codes) else codes
+
+    def _isin_sorted(self, codes, sorted_codes):
+        if not len(sorted_codes):
+            return np.zeros(len(codes), dtype=bool)
+        position = np.minimum(np.searchsorted(sorted_codes, codes), len(sorted_codes) - 1)
+        return sorted_codes[position] == codes
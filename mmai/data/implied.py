@@ -0,0 +1,236 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import column_to_list, days_to_dates
+from mmai.data.names import get_join_keys
+from mmai.data.odds import ODDS_COLUMNS
+
+
+# The odds of each fighter in a bout, as (open, closing best, closing worst) in the odds tables
+ODDS_KINDS = ["open", "close_best", "close_worst"]
+VIG_METHODS = ("proportional", "shin")
+
+
+def parse_american_odds(odds):
+    """
+    Parse American odds as ints or strings (e.g., "+150", "-200", or "−200" with a unicode minus) all at once.
+
+    Args:
+        odds (list, np.ndarray, pd.Series): The odds.
+
+    Returns:
+        (np.ndarray): The float64 odds, NaN if they could not be parsed or are not valid American odds (under 100 in
+            absolute value).
+    """
+    try:
+        # Ints, floats, None, and ASCII strings convert directly
+        values = np.asarray(odds, dtype=np.float64)
+    except (TypeError, ValueError):
+        series = pd.Series(np.asarray(odds, dtype=object)).astype(str).str.strip()
+        series = series.str.replace("−", "-", regex=False).str.lstrip("+")
+        values = pd.to_numeric(series, errors="coerce").to_numpy(np.float64)
+    return np.where(np.abs(values) >= 100, values, np.nan)
+
+
+def american_to_probability(odds):
+    """
+    Convert American odds to the probabilities they imply, including the bookmaker's margin, e.g., -200 -> 2/3 and
+    +150 -> 0.4.
+
+    Args:
+        odds (np.ndarray): The float American odds, e.g., from parse_american_odds.
+
+    Returns:
+        (np.ndarray): The float64 implied probabilities, NaN for NaN odds.
+    """
+    odds = np.asarray(odds, dtype=np.float64)
+    magnitude = np.abs(odds)
+    return np.where(odds < 0, magnitude, 100) / (magnitude + 100)
+
+
+def remove_vig_proportional(probabilities_1, probabilities_2):
+    """
+    Remove the bookmaker's margin from the implied probabilities of both sides of bouts by scaling them to sum to 1.
+
+    Args:
+        probabilities_1 (np.ndarray): The implied probabilities of fighter 1.
+        probabilities_2 (np.ndarray): The implied probabilities of fighter 2.
+
+    Returns:
+        (np.ndarray, np.ndarray): The probabilities of fighter 1 and fighter 2 without the margin.
+    """
+    total = probabilities_1 + probabilities_2
+    return probabilities_1 / total, probabilities_2 / total
+
+
+def remove_vig_shin(probabilities_1, probabilities_2):
+    """
+    Remove the bookmaker's margin from the implied probabilities of both sides of bouts with Shin's model, which
+    assumes the margin protects the bookmaker from insider bettors, and so takes more of it from the longshot than
+    proportional removal does.
+
+    Shin's probabilities are p_i = (sqrt(z^2 + 4 (1 - z) pi_i^2 / B) - z) / (2 (1 - z)), where pi_i are the implied
+    probabilities, B their sum, and z the insider share that makes the p_i sum to 1. With two outcomes this has a
+    closed form, p_1 = (1 + pi_1 - pi_2) / 2 and z = 1 - 2 (1 - s) / (1 - d^2), with s and d the sum and difference
+    of the pi_i^2 / B, so no iterative solve is needed.
+
+    Args:
+        probabilities_1 (np.ndarray): The implied probabilities of fighter 1.
+        probabilities_2 (np.ndarray): The implied probabilities of fighter 2.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): The probabilities of fighter 1 and fighter 2 without the margin, and z
+            (0 for bouts without a margin).
+    """
+    probabilities_1 = np.asarray(probabilities_1, dtype=np.float64)
+    probabilities_2 = np.asarray(probabilities_2, dtype=np.float64)
+    booksum = probabilities_1 + probabilities_2
+    square_sum = (probabilities_1 ** 2 + probabilities_2 ** 2) / booksum
+    square_difference = (probabilities_1 ** 2 - probabilities_2 ** 2) / booksum
+    z = np.maximum(1 - 2 * (1 - square_sum) / (1 - square_difference ** 2), 0)
+    p_1 = (1 + probabilities_1 - probabilities_2) / 2
+    return p_1, 1 - p_1, z
+
+
+class ImpliedOdds(DataBase):
+    """
+    The probabilities implied by the scraped bestfightodds odds of every bout, without the bookmaker's margin.
+
+    All odds are converted at once: every fighter's odds records are flattened into columns, parsed, converted, and
+    de-margined with array operations, then deduplicated to one row per bout (the same bout is listed on both
+    fighters' pages). Rows carry both fighters' join keys and the date, ready to be joined with fighter features.
+
+    Attrs:
+        data (dict): The bouts in {column: np.ndarray} format, with columns fighter_1 and fighter_2 (names as written
+            on bestfightodds), fighter_1_key and fighter_2_key (their join keys), date (datetime64[D]), and for each
+            of the ODDS_KINDS, fighter_1_prob_{kind} and fighter_2_prob_{kind} (float32 probabilities without the
+            margin, NaN if the odds are missing) and margin_{kind} (float32 overround, the implied probabilities' sum
+            minus 1).
+        data_filename (str): A string of the full path where this class's output is saved.
+        method (str): How the margin is removed, "proportional" or "shin".
+    """
+
+    def __init__(self, method="shin"):
+        super().__init__()
+        if method not in VIG_METHODS:
+            raise ValueError(f"Unknown vig removal method {method}, expected one of {VIG_METHODS}.")
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, "static/implied_odds.json")
+        self.method = method
+
+    def build(self, odds_data):
+        """
+        Convert the odds of every bout in scraped odds data.
+
+        Args:
+            odds_data (dict): The output of OddsScrapeAndProcess.scrape, in {fighter_name: {"warning_level": int,
+                "odds_record": {column: {row: value}}}} format.
+
+        Returns:
+            (dict): The bouts, also set as the data attr.
+        """
+        odds = self.get_odds_columns(odds_data)
+        fighter_1 = np.array(odds["fighter_1"], dtype=object)
+        fighter_2 = np.array(odds["fighter_2"], dtype=object)
+        bouts = {
+            "fighter_1": fighter_1,
+            "fighter_2": fighter_2,
+            "fighter_1_key": get_join_keys(fighter_1),
+            "fighter_2_key": get_join_keys(fighter_2),
+            "date": pd.to_datetime(pd.Series(odds["date"], dtype=object), errors="coerce").to_numpy().astype(
+                "datetime64[D]"
+            ),
+        }
+        for kind in ODDS_KINDS:
+            implied_1 = american_to_probability(parse_american_odds(odds[f"fighter_1_odds_{kind}"]))
+            implied_2 = american_to_probability(parse_american_odds(odds[f"fighter_2_odds_{kind}"]))
+            if self.method == "shin":
+                p_1, p_2, _ = remove_vig_shin(implied_1, implied_2)
+            else:
+                p_1, p_2 = remove_vig_proportional(implied_1, implied_2)
+            bouts[f"fighter_1_prob_{kind}"] = p_1.astype(np.float32)
+            bouts[f"fighter_2_prob_{kind}"] = p_2.astype(np.float32)
+            bouts[f"margin_{kind}"] = (implied_1 + implied_2 - 1).astype(np.float32)
+
+        # Keep the first listing of each bout, whichever fighter's page it was on
+        first_key = np.where(bouts["fighter_1_key"] <= bouts["fighter_2_key"], bouts["fighter_1_key"],
+                             bouts["fighter_2_key"])
+        second_key = np.where(bouts["fighter_1_key"] <= bouts["fighter_2_key"], bouts["fighter_2_key"],
+                              bouts["fighter_1_key"])
+        keep = ~pd.DataFrame({"a": first_key, "b": second_key, "date": bouts["date"]}).duplicated().to_numpy()
+        self.data = {column: values[keep] for column, values in bouts.items()}
+        print(
+            f"Converted the odds of {int(keep.sum())} bouts from {len(keep)} odds rows "
+            f"({len(keep) - int(keep.sum())} duplicates removed) with {self.method} vig removal."
+        )
+        return self.data
+
+    def to_frame(self):
+        """
+        Get the bouts as a DataFrame.
+
+        Returns:
+            (pd.DataFrame): The bouts.
+        """
+        return pd.DataFrame(self.data)
+
+    def to_tables(self):
+        """
+        Flatten the bouts into a flat table for columnar storage.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        return {"bouts": {column: column_to_list(values) for column, values in self.data.items()}}
+
+    def save(self):
+        """
+        Save the bouts in columnar format, next to data_filename.
+
+        Returns:
+            None
+        """
+        self.save_columnar()
+
+    def load(self):
+        """
+        Load the bouts saved with save.
+
+        Returns:
+            (dict): The bouts.
+        """
+        bouts = self.load_columnar("bouts", mmap=False, as_frame=False)
+        for column in ("fighter_1", "fighter_2", "fighter_1_key", "fighter_2_key"):
+            bouts[column] = np.asarray(bouts[column], dtype=object)
+        bouts["date"] = days_to_dates(bouts["date"])
+        for column in bouts:
+            if "_prob_" in column or column.startswith("margin_"):
+                bouts[column] = bouts[column].astype(np.float32)
+        self.data = bouts
+        return self.data
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_odds_columns(self, odds_data):
+        """
+        Flatten the odds records of every fighter into one set of columns.
+
+        Args:
+            odds_data (dict): The output of OddsScrapeAndProcess.scrape.
+
+        Returns:
+            (dict): The ODDS_COLUMNS in {column: [values]} format, one value per odds record row.
+        """
+        columns = {h: [] for h in ODDS_COLUMNS}
+        for data in odds_data.values():
+            odds_record = data.get("odds_record")
+            if not odds_record:
+                continue
+            for h in ODDS_COLUMNS:
+                columns[h].extend(odds_record[h].values())
+        return columns
@@ -0,0 +1,134 @@
+import difflib
+import os
+import threading
+from collections import Counter
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.names import get_join_key, get_trigrams
+
+
+class FighterNameIndex(DataBase):
+    """
+    A persistent index of fighter names to their bestfightodds relative links, for resolving names without searching.
+
+    Names are matched exactly first, then fuzzily: candidate names are blocked by the character trigrams they share
+    with the query, and only the best few candidates are scored with difflib.
+
+    Attrs:
+        data (dict): The index in {name key: [relative links]} format.
+        data_filename (str): A string of the full path where this class's output is saved.
+        min_ratio (float): The minimum difflib similarity ratio for a fuzzy match.
+        max_candidates (int): The maximum number of blocked candidates scored for a fuzzy match.
+        hits (int): The number of lookups resolved by the index.
+        misses (int): The number of lookups not resolved by the index.
+    """
+
+    def __init__(self, min_ratio=0.9, max_candidates=10):
+        super().__init__()
+        self.data = {}
+        self.data_filename = os.path.join(THIS_DIR, "static/odds_name_index.json")
+        self.min_ratio = min_ratio
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.misses = 0
+        self._trigrams = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Load the index from its static file, if there is one.
+
+        Returns:
+            (dict): The index in {name key: [relative links]} format.
+        """
+        data = {}
+        if os.path.exists(self.data_filename):
+            # Re-key in case the index was saved with an older key format
+            for key, links in super().load().items():
+                key_links = data.setdefault(self.get_name_key(key), [])
+                key_links.extend(link for link in links if link not in key_links)
+        self.data = data
+        self._trigrams = {}
+        for key in self.data:
+            self._add_trigrams(key)
+        return self.data
+
+    def add(self, name, relative_link):
+        """
+        Add a fighter name and their bestfightodds relative link to the index.
+
+        Args:
+            name (str): The fighter name, e.g., "Jon Jones".
+            relative_link (str): The relative link, e.g., "/fighters/Jon-Jones-819".
+
+        Returns:
+            None
+        """
+        key = self.get_name_key(name)
+        if not key:
+            return
+        relative_link = relative_link.lower()
+        with self._lock:
+            if key not in self.data:
+                self.data[key] = []
+                self._add_trigrams(key)
+            if relative_link not in self.data[key]:
+                self.data[key].append(relative_link)
+
+    def lookup(self, name):
+        """
+        Find the relative links for a fighter name, exactly or fuzzily. Counts a hit or miss.
+
+        Args:
+            name (str): The fighter name.
+
+        Returns:
+            ([str]): The relative links for the best matching name in the index, or an empty list on a miss.
+        """
+        key = self.get_name_key(name)
+        with self._lock:
+            links = self.data.get(key) or self._fuzzy_lookup(key)
+            if links:
+                self.hits += 1
+                return list(links)
+            else:
+                self.misses += 1
+                return []
+
+    def get_name_key(self, name):
+        """
+        Get the key a name is indexed under, in the same format as bestfightodds links, e.g., "Jon Jones" -> "jon-jones".
+        See mmai.data.names.get_join_key.
+
+        Args:
+            name (str): The fighter name.
+
+        Returns:
+            (str): The key.
+        """
+        return get_join_key(name)
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def _fuzzy_lookup(self, key):
+        shared = Counter()
+        for trigram in get_trigrams(key):
+            shared.update(self._trigrams.get(trigram, ()))
+
+        best_ratio = 0.0
+        best_key = None
+        for candidate, _ in shared.most_common(self.max_candidates):
+            ratio = difflib.SequenceMatcher(a=key, b=candidate).ratio()
+            if ratio > best_ratio:
+                best_ratio = ratio
+                best_key = candidate
+
+        if best_key and best_ratio >= self.min_ratio:
+            return self.data[best_key]
+        return None
+
+    def _add_trigrams(self, key):
+        for trigram in get_trigrams(key):
+            self._trigrams.setdefault(trigram, set()).add(key)
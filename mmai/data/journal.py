@@ -0,0 +1,74 @@
+import json
+import os
+
+
+class Journal:
+    """
+    An append-only journal of completed scraping work, for resuming a scrape after a crash.
+
+    Each entry is one line of json, [key, value], flushed and fsynced to disk as soon as it is appended. A line left
+    incomplete by a crash mid-write is truncated away when the journal is read back.
+
+    Attrs:
+        filename (str): The path of the journal file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def read(self):
+        """
+        Read all the completed entries from the journal.
+
+        Returns:
+            (dict): The journaled values in {key: value} format, in the order they were appended. If a key was
+                appended more than once, the last value wins.
+        """
+        entries = {}
+        if not os.path.exists(self.filename):
+            return entries
+
+        complete_size = 0
+        with open(self.filename, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_size += len(line)
+                try:
+                    key, value = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    continue
+                entries[key] = value
+
+        if complete_size < os.path.getsize(self.filename):
+            with open(self.filename, "r+b") as f:
+                f.truncate(complete_size)
+        return entries
+
+    def append(self, key, value):
+        """
+        Append a completed entry to the journal and flush it to disk.
+
+        Args:
+            key (str): The key identifying the completed work, e.g., a fighter link or name.
+            value: The json-serializable result of the work.
+
+        Returns:
+            None
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        line = json.dumps([key, value]) + "\n"
+        with open(self.filename, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """
+        Remove the journal file, if it exists.
+
+        Returns:
+            None
+        """
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
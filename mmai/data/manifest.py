@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+
+from mmai.util import dump_json
+
+
+# The manifest of each path, shared by every caller in this process so their read-modify-writes don't interleave
+_MANIFESTS = {}
+_MANIFESTS_LOCK = threading.Lock()
+
+
+def get_manifest(filename):
+    """
+    Get the manifest kept in a file, the same Manifest object for every call with the same path, so that concurrent
+    records in one process (e.g., the saves of several classes into the same directory from different threads) are
+    serialized by its lock.
+
+    Args:
+        filename (str): The path of the manifest file.
+
+    Returns:
+        (Manifest): The manifest.
+    """
+    filename = os.path.abspath(filename)
+    with _MANIFESTS_LOCK:
+        if filename not in _MANIFESTS:
+            _MANIFESTS[filename] = Manifest(filename)
+        return _MANIFESTS[filename]
+
+
+class Manifest:
+    """
+    A record of the content hash of each saved artifact in a directory, so steps downstream of an artifact can tell
+    whether it changed since they last ran without reading it.
+
+    The manifest is a json file of {artifact file name: {"sha256": hex digest, "size": bytes, "saved": unix time}}.
+    Hashes are of the uncompressed json, so they don't depend on the compression an artifact is saved with, or of the
+    schemas and arrays of columnar tables (see mmai.data.storage.write_columnar_table). Use
+    get_manifest rather than the constructor, so all the records to one manifest file share a lock.
+
+    Attrs:
+        filename (str): The path of the manifest file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def read(self):
+        """
+        Read the manifest.
+
+        Returns:
+            (dict): The manifest entries, empty if there is no manifest yet.
+        """
+        if not os.path.exists(self.filename):
+            return {}
+        with open(self.filename, "r") as f:
+            return json.load(f)
+
+    def get(self, datapath):
+        """
+        Get the manifest entry of an artifact.
+
+        Args:
+            datapath (str): The path of the artifact.
+
+        Returns:
+            (dict, None): The entry, or None if the artifact isn't in the manifest.
+        """
+        return self.read().get(os.path.basename(datapath))
+
+    def get_hash(self, datapath):
+        """
+        Get the recorded content hash of an artifact.
+
+        Args:
+            datapath (str): The path of the artifact.
+
+        Returns:
+            (str, None): The sha256 hex digest, or None if the artifact isn't in the manifest.
+        """
+        entry = self.get(datapath)
+        return entry["sha256"] if entry else None
+
+    def record(self, datapath, sha256, size):
+        """
+        Record the content hash of a saved artifact.
+
+        Args:
+            datapath (str): The path of the artifact.
+            sha256 (str): The sha256 hex digest of its uncompressed content.
+            size (int): The size in bytes of its uncompressed content.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            entries = self.read()
+            entries[os.path.basename(datapath)] = {"sha256": sha256, "size": size, "saved": time.time()}
+            dump_json(entries, self.filename)
@@ -0,0 +1,218 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.names import get_join_keys, get_trigrams
+
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+@lru_cache(maxsize=65536)
+def soundex(word):
+    """
+    Get the American soundex code of a word, so that similar sounding spellings get the same code, e.g., "Nurmagomedov"
+    and "Nurmagomedof" -> "N652".
+
+    Args:
+        word (str): The lowercase ASCII word.
+
+    Returns:
+        (str): The 4 character code, or "" for an empty word.
+    """
+    letters = [c for c in word if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES.get(c, "")
+        if digit and digit != previous:
+            code += digit
+        if c not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def get_blocking_keys(key):
+    """
+    Get the blocks a name is compared within: its surname, the phonetic codes of its first name and surname, and its
+    first initial with the phonetic code of its surname.
+
+    Args:
+        key (str): The join key of the name, e.g., "jon-jones".
+
+    Returns:
+        ([str]): The blocking keys.
+    """
+    tokens = [t for t in key.split("-") if t]
+    if not tokens:
+        return []
+    first, last = tokens[0], tokens[-1]
+    return [f"s:{last}", f"p:{soundex(first)}{soundex(last)}", f"i:{first[0]}{soundex(last)}"]
+
+
+class FighterMatcher(DataBase):
+    """
+    Offline entity resolution of fighters between sources, e.g., wikipedia fighters with bestfightodds or ufcstats
+    fighters.
+
+    Names are only compared within blocks of names sharing a surname, phonetic codes, or initials, rather than all
+    pairs. Within blocks, all candidate pairs are scored at once by the Jaccard similarity of their character trigrams,
+    and each name is matched to at most one name of the other source, best scores first.
+
+    Attrs:
+        data (dict): The match tables in {source: [[name, other source's name, score]]} format.
+        data_filename (str): A string of the full path where this class's output is saved.
+        min_score (float): The minimum trigram Jaccard similarity for a match.
+    """
+
+    def __init__(self, min_score=0.5):
+        super().__init__()
+        self.data = {}
+        self.data_filename = os.path.join(THIS_DIR, "static/fighter_matches.json")
+        self.min_score = min_score
+
+    def load(self):
+        """
+        Load the match tables from their static file, if there is one.
+
+        Returns:
+            (dict): The match tables in {source: [[name, other source's name, score]]} format.
+        """
+        if os.path.exists(self.data_filename):
+            super().load()
+        else:
+            self.data = {}
+        return self.data
+
+    def match(self, names, other_names, source):
+        """
+        Match names with the names of another source, and store the matches under the source's name.
+
+        Args:
+            names ([str]): The names to match, e.g., the keys of WikiFightersProcessed.data.
+            other_names ([str]): The names of the other source, e.g., bestfightodds fighter names.
+            source (str): The name the match table is stored under, e.g., "bestfightodds".
+
+        Returns:
+            (pd.DataFrame): The matches, with columns name, other_name, and score (the trigram Jaccard similarity,
+                between min_score and 1).
+        """
+        names = pd.unique(pd.Series(names, dtype=object).dropna())
+        other_names = pd.unique(pd.Series(other_names, dtype=object).dropna())
+        keys = get_join_keys(names)
+        other_keys = get_join_keys(other_names)
+
+        left, right = self.get_candidate_pairs(keys, other_keys)
+        scores = self.score_pairs(keys, other_keys, left, right)
+
+        # Greedily keep the best scoring pairs, with each name matched at most once
+        above = scores >= self.min_score
+        left, right, scores = left[above], right[above], scores[above]
+        order = np.lexsort((right, left, -scores))
+        matched = set()
+        other_matched = set()
+        matches = []
+        for i in order:
+            if left[i] in matched or right[i] in other_matched:
+                continue
+            matched.add(left[i])
+            other_matched.add(right[i])
+            matches.append([names[left[i]], other_names[right[i]], round(float(scores[i]), 4)])
+
+        self.data[source] = matches
+        print(
+            f"Matched {len(matches)}/{len(names)} names with {source} from {len(left)} candidate pairs "
+            f"(all pairs would be {len(names) * len(other_names)})."
+        )
+        return pd.DataFrame(matches, columns=["name", "other_name", "score"])
+
+    def get_matches(self, source):
+        """
+        Get a match table as a mapping.
+
+        Args:
+            source (str): The name the match table is stored under.
+
+        Returns:
+            (dict): The matches in {name: (other source's name, score)} format.
+        """
+        return {name: (other_name, score) for name, other_name, score in self.data.get(source, [])}
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_candidate_pairs(self, keys, other_keys):
+        """
+        Get the pairs of names sharing at least one blocking key.
+
+        Args:
+            keys ([str]): The join keys of the names.
+            other_keys ([str]): The join keys of the other source's names.
+
+        Returns:
+            (np.ndarray, np.ndarray): The indexes of the names and the other names of each unique candidate pair.
+        """
+        blocks = pd.DataFrame(
+            [(block, i) for i, key in enumerate(keys) for block in get_blocking_keys(key)], columns=["block", "left"]
+        )
+        other_blocks = pd.DataFrame(
+            [(block, i) for i, key in enumerate(other_keys) for block in get_blocking_keys(key)],
+            columns=["block", "right"],
+        )
+        pairs = blocks.merge(other_blocks, on="block")[["left", "right"]].drop_duplicates()
+        return pairs["left"].to_numpy(np.int64), pairs["right"].to_numpy(np.int64)
+
+    def score_pairs(self, keys, other_keys, left, right):
+        """
+        Score candidate pairs by the Jaccard similarity of their names' character trigram sets, all at once.
+
+        Args:
+            keys ([str]): The join keys of the names.
+            other_keys ([str]): The join keys of the other source's names.
+            left (np.ndarray): The index of the name of each pair.
+            right (np.ndarray): The index of the other name of each pair.
+
+        Returns:
+            (np.ndarray): The float32 similarity of each pair.
+        """
+        vocabulary = {}
+        indptr, trigrams = self._encode_trigrams(keys, vocabulary)
+        other_indptr, other_trigrams = self._encode_trigrams(other_keys, vocabulary)
+        n_trigrams = len(vocabulary)
+        counts = np.diff(indptr)
+        other_counts = np.diff(other_indptr)
+
+        # Each pair's left trigrams, as (right name, trigram) codes to look up in the set of all right names' codes
+        pair_counts = counts[left]
+        pair_index = np.repeat(np.arange(len(left)), pair_counts)
+        offsets = np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+        pair_trigrams = trigrams[indptr[left][pair_index] + offsets]
+        codes = right[pair_index] * n_trigrams + pair_trigrams
+
+        other_names = np.repeat(np.arange(len(other_keys)), other_counts)
+        other_codes = np.sort(other_names * n_trigrams + other_trigrams)
+        shared = np.isin(codes, other_codes, assume_unique=False)
+        intersection = np.bincount(pair_index, weights=shared, minlength=len(left))
+        union = counts[left] + other_counts[right] - intersection
+        return (intersection / np.maximum(union, 1)).astype(np.float32)
+
+    def _encode_trigrams(self, keys, vocabulary):
+        indptr = [0]
+        trigrams = []
+        for key in keys:
+            trigrams.extend(vocabulary.setdefault(t, len(vocabulary)) for t in get_trigrams(key))
+            indptr.append(len(trigrams))
+        return np.array(indptr, dtype=np.int64), np.array(trigrams, dtype=np.int64)
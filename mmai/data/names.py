@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from functools import lru_cache
+from string import ascii_letters
+
+import numpy as np
+import pandas as pd
+
+
+# The only characters allowed in canonical names
+ALLOWED_NAME_CHARS = ascii_letters + " -`'"
+ALLOWED_NAME_REGEX = re.compile(r"[A-Za-z \-`']*")
+
+# The unicode blocks precomputed in the translation table: Latin-1, Latin Extended A and B, IPA, spacing modifiers,
+# combining marks, and Latin Extended Additional (e.g., Vietnamese). Other characters are translated on the fly.
+TRANSLATED_RANGES = ((0x80, 0x370), (0x1E00, 0x1F00))
+
+
+def _translate_char(char):
+    decomposed = unicodedata.normalize("NFD", char)
+    return "".join(c for c in decomposed if unicodedata.category(c) != "Mn" and c in ALLOWED_NAME_CHARS)
+
+
+def _make_translation_table():
+    table = {}
+    for start, stop in TRANSLATED_RANGES:
+        for codepoint in range(start, stop):
+            table[codepoint] = _translate_char(chr(codepoint))
+    for codepoint in range(0x80):
+        if chr(codepoint) not in ALLOWED_NAME_CHARS:
+            table[codepoint] = ""
+    return str.maketrans(table)
+
+
+# Maps each precomputed character to its ASCII equivalent, e.g., "é" -> "e", or to "" if it has none
+TRANSLATION_TABLE = _make_translation_table()
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_name(full_name):
+    """
+    Turn a name containing foreign characters into a name containing all ASCII chars.
+
+    Accented characters are turned into their ASCII equivalents, and characters with none (e.g., digits or "ø") are
+    removed. Names which are already ASCII are returned as is. Results are memoized.
+
+    Args:
+        full_name (str): The full name with (possibly) foreign characters, e.g., "José Aldo".
+
+    Returns:
+        (str): The ASCII-compatible name, e.g., "Jose Aldo".
+    """
+    if ALLOWED_NAME_REGEX.fullmatch(full_name):
+        return full_name
+    translated = full_name.translate(TRANSLATION_TABLE)
+    if not ALLOWED_NAME_REGEX.fullmatch(translated):
+        # Characters outside the precomputed blocks
+        translated = "".join(_translate_char(c) for c in translated)
+    return translated.strip()
+
+
+def canonicalize_names(full_names):
+    """
+    Canonicalize many names at once, canonicalizing each unique name once.
+
+    Args:
+        full_names (list, np.ndarray, pd.Series): The full names with (possibly) foreign characters.
+
+    Returns:
+        (list, np.ndarray, pd.Series): The ASCII-compatible names, in the same type of container as full_names.
+    """
+    return _map_unique(canonicalize_name, full_names)
+
+
+@lru_cache(maxsize=65536)
+def get_join_key(name):
+    """
+    Get the key names are matched on between sources, in the same format as bestfightodds links, e.g., "José  Aldo"
+    -> "jose-aldo". Results are memoized.
+
+    Args:
+        name (str): The fighter name, from any source.
+
+    Returns:
+        (str): The canonical, lowercase, hyphen-separated key.
+    """
+    return "-".join(canonicalize_name(name).split()).lower()
+
+
+def get_join_keys(names):
+    """
+    Get the join keys of many names at once, computing each unique name's key once.
+
+    Args:
+        names (list, np.ndarray, pd.Series): The fighter names.
+
+    Returns:
+        (list, np.ndarray, pd.Series): The keys, in the same type of container as names.
+    """
+    return _map_unique(get_join_key, names)
+
+
+def get_trigrams(key):
+    """
+    Get the character trigrams of a join key, padded so that its start and end make trigrams of their own, e.g.,
+    "jon" -> {"  j", " jo", "jon", "on "}.
+
+    Args:
+        key (str): The join key, e.g., from get_join_key.
+
+    Returns:
+        (set): The unique trigrams.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _map_unique(function, names):
+    series = names if isinstance(names, pd.Series) else pd.Series(np.asarray(names, dtype=object), dtype=object)
+    uniques = pd.unique(series.dropna())
+    mapped = series.map(dict(zip(uniques, (function(n) for n in uniques))))
+    if isinstance(names, pd.Series):
+        return mapped
+    elif isinstance(names, np.ndarray):
+        return mapped.to_numpy(dtype=object)
+    else:
+        return mapped.tolist()
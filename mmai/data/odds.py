@@ -1,14 +1,37 @@
-import requests
+import re
 import warnings
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
 import os
 from tqdm import tqdm
 import difflib
+from functools import partial
 import time
 import random
 
+import requests
+
 from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.cache import CacheMissError
+from mmai.data.index import FighterNameIndex
+from mmai.data.names import get_join_key
+from mmai.data.pipeline import ScraperMethod, ordered_pipeline
+from mmai.data.storage import records_to_columns
+
+ODDS_COLUMNS = [
+    "fighter_1",
+    "fighter_1_odds_open",
+    "fighter_1_odds_close_best",
+    "fighter_1_odds_close_worst",
+    "fighter_2",
+    "fighter_2_odds_open",
+    "fighter_2_odds_close_best",
+    "fighter_2_odds_close_worst",
+    "date",
+]
+ODDS_DATE_REGEX = re.compile(r"^(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w* (\d{1,2})\w* (\d{4})$")
 
 pd.set_option("display.max_rows", 500)
 pd.set_option("display.max_columns", 500)
@@ -17,24 +40,57 @@ pd.set_option("display.width", 1000)
 
 class OddsScrapeAndProcess(DataBase):
 
-    def __init__(self):
+    default_parser = "html5lib"
+
+    def __init__(self, cache=None, session=None, parser=None, name_index=None):
+        """
+        Args:
+            cache (mmai.data.cache.ResponseCache, None): An on-disk cache to fetch pages through. If None, every page
+                is downloaded.
+            session (requests.Session, None): The session to fetch pages with. If None, a new one is made.
+            parser (str, None): The BeautifulSoup tree builder to parse pages with. If None, uses lxml if it is
+                installed and html5lib otherwise.
+            name_index (FighterNameIndex, None): The index used to resolve fighter names to links without searching.
+                If None, the saved index is loaded when scraping.
+        """
+        super().__init__(cache=cache, session=session, parser=parser)
         self.data = None
         self.data_filename = os.path.join(
             THIS_DIR, "static/odds.json"
         )
         self.base_link = "https://www.bestfightodds.com"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:70.0) Gecko/20100101 Firefox/70.0"
-        }
-
-    def scrape(self, fighter_names, randomized_wait=False, report=True):
+        self.name_index = name_index
+
+    def scrape(
+            self,
+            fighter_names,
+            randomized_wait=False,
+            report=True,
+            resume=False,
+            workers=1,
+            processes=0,
+            use_index=True,
+    ):
         """
         Scrape the betting odds for a list of fighter names (probably from wikipedia).
 
+        Each fighter is appended to a journal next to data_filename as soon as it is scraped, so a crashed scrape can
+        be picked up again with resume=True.
+
+        Fighter names are resolved to links with the name index where possible, and only searched for on
+        bestfightodds when the index misses. Every fighter seen on a scraped odds page or in search results is added
+        to the index, which is saved at the end of the scrape.
+
         Args:
             fighter_names (list): The fighter names.
             randomized_wait: (bool) If True, randomizes a wait time between requests for searches.
-            report: (bool): If Tre,
+            report: (bool): If True, saves a report of the good, bad, and ugly parsings based on warning level.
+            resume (bool): If True, skips fighters already in the journal from a previous scrape and reuses their data.
+                If False, the journal is started over.
+            workers (int): The number of threads searching for and fetching fighter pages concurrently.
+            processes (int): The number of processes parsing the fetched pages. If 0, pages are parsed in the fetching
+                threads.
+            use_index (bool): If True, resolves fighter names with the name index before searching.
 
         Returns:
 
@@ -45,38 +101,45 @@ class OddsScrapeAndProcess(DataBase):
         bad = []  # warning level 1
         ugly = []  # warning level 2
 
-        for name in tqdm(fighter_names):
-            if randomized_wait:
-                wait = random.random() * 3.0
-                time.sleep(wait)
-
-            links = self.get_relative_link_from_fighter_name(name)
-
-            odds_record = None
+        journal = self.get_journal()
+        if resume:
+            done = journal.read()
+            print(f"Resuming scrape with {len(done)} fighters already in the journal.")
+        else:
+            journal.clear()
+            done = {}
+        remaining = [name for name in fighter_names if name not in done]
+
+        if self.name_index is None:
+            self.name_index = FighterNameIndex()
+            self.name_index.load()
+
+        if processes:
+            parse = ScraperMethod(
+                OddsScrapeAndProcess, "get_fighter_odds_from_page", scraper_kwargs={"parser": self.parser}
+            )
+        else:
+            parse = self.get_fighter_odds_from_page
+        fetch = partial(self.fetch_fighter_odds_page, randomized_wait=randomized_wait, use_index=use_index)
+        results = ordered_pipeline(remaining, fetch, parse, io_workers=workers, cpu_workers=processes)
 
-            if len(links) == 0:
-                print(f"No links found for fighter: {name}")
+        for name in tqdm(fighter_names):
+            if name in done:
+                data = done[name]
+            else:
+                data = next(results)
+                for fighter, link in data.pop("fighter_links").items():
+                    self.name_index.add(fighter, link)
+                journal.append(name, data)
+
+            warning_level = data["warning_level"]
+            if warning_level == 0:
+                good.append(name)
+            elif warning_level == 1:
                 bad.append(name)
-                warning_level = 1
                 continue
-            elif len(links) > 1:
-                warnings.warn(f"Too many links found for {name}, keeping the first one ({links[0]}")
-            link = links[0]
-
-            try:
-                odds_record = self.get_fighter_record_betting_odds_from_relative_link(link)
-                good.append(name)
-                warning_level = 0
-            except:
-                warnings.warn(f"Link {link} for fighter {name} was tried but failed.")
+            else:
                 ugly.append(name)
-                warning_level = 2
-
-            data = {
-                "warning_level": warning_level,
-                "odds_record": odds_record.to_dict()
-            }
-
             betting_odds[name] = data
 
         self.data = betting_odds
@@ -86,7 +149,9 @@ class OddsScrapeAndProcess(DataBase):
             f"Links successfully parsed: {len(good)}/{n_fighters}"
             f"\nDidn't find a link: {len(bad)}/{n_fighters}"
             f"\nFound a link but couldn't parse it: {len(ugly)}/{n_fighters}"
+            f"\nLinks found in the name index: {self.name_index.hits}/{self.name_index.hits + self.name_index.misses}"
         )
+        self.name_index.save()
 
         if report:
             with open("odds_scraping_report.txt", "w") as f:
@@ -101,10 +166,99 @@ class OddsScrapeAndProcess(DataBase):
 
         return betting_odds
 
+    def to_tables(self):
+        """
+        Flatten the odds into a "fighters" table of warning levels and an "odds" table with one row per bout.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        fighters = []
+        odds = {"name": [], **{h: [] for h in ODDS_COLUMNS}}
+        for name, data in self.data.items():
+            fighters.append({"name": name, "warning_level": data["warning_level"]})
+            odds_record = data["odds_record"]
+            if not odds_record:
+                continue
+            n_bouts = len(odds_record["fighter_1"])
+            odds["name"] += [name] * n_bouts
+            for h in ODDS_COLUMNS:
+                odds[h] += list(odds_record[h].values())
+        return {"fighters": records_to_columns(fighters), "odds": odds}
+
     ################################################################################################################
     # Auxiliary methods
     ################################################################################################################
 
+    def fetch_fighter_odds_page(self, name, randomized_wait=False, use_index=True):
+        """
+        Find a fighter's links and fetch the odds page of the first one, ready for get_fighter_odds_from_page.
+
+        Args:
+            name (str): The fighter name.
+            randomized_wait: (bool) If True, randomizes a wait time before searching.
+            use_index (bool): If True, resolves the name with the name index before searching.
+
+        Returns:
+            (str, [str], bytes): The fighter name, the relative links found for them, and the raw html of the first
+                link's page (None if no links were found or the page could not be fetched).
+        """
+        links = self.name_index.lookup(name) if use_index and self.name_index else []
+        if not links:
+            if randomized_wait:
+                wait = random.random() * 3.0
+                time.sleep(wait)
+
+            search_links = {}
+            links = self.get_relative_link_from_fighter_name(name, fighter_links=search_links)
+            if self.name_index:
+                for fighter, link in search_links.items():
+                    self.name_index.add(fighter, link)
+        content = None
+        if links:
+            url = self.base_link + links[0]
+            try:
+                content = self.fetch(url).content
+            except (requests.RequestException, CacheMissError) as e:
+                warnings.warn(f"Odds page {url} for fighter {name} could not be fetched: {e!r}")
+        return name, links, content
+
+    def get_fighter_odds_from_page(self, name, links, content):
+        """
+        Get a fighter's betting odds record from the output of fetch_fighter_odds_page.
+
+        Args:
+            name (str): The fighter name.
+            links ([str]): The relative links found for the fighter.
+            content (bytes): The raw html of the first link's page, or None.
+
+        Returns:
+            (dict): Contains the warning_level (0 if parsed, 1 if no link was found, 2 if the page couldn't be parsed),
+                the odds_record, in pd.DataFrame.to_dict format (None unless the warning level is 0), and the
+                fighter_links of every fighter on the page in {name: relative link} format.
+        """
+        fighter_links = {}
+        if len(links) == 0:
+            print(f"No links found for fighter: {name}")
+            return {"warning_level": 1, "odds_record": None, "fighter_links": fighter_links}
+        elif len(links) > 1:
+            warnings.warn(f"Too many links found for {name}, keeping the first one ({links[0]}")
+        link = links[0]
+
+        if content is None:
+            return {"warning_level": 2, "odds_record": None, "fighter_links": fighter_links}
+        try:
+            odds_record = self.get_fighter_record_betting_odds_from_html(content, fighter_links=fighter_links)
+        except (IndexError, KeyError, ValueError, AttributeError) as e:
+            # Pages without an odds table, or with one in an unexpected layout
+            warnings.warn(f"Odds page {self.base_link + link} for fighter {name} could not be parsed: {e!r}")
+            return {"warning_level": 2, "odds_record": None, "fighter_links": fighter_links}
+        return {
+            "warning_level": 0,
+            "odds_record": self.odds_record_to_dict(odds_record),
+            "fighter_links": fighter_links,
+        }
+
     def get_fighter_record_betting_odds_from_relative_link(self, relative_link):
         """
         Get a single fighter's betting odds for all of their fights from a relative link.
@@ -117,9 +271,24 @@ class OddsScrapeAndProcess(DataBase):
 
         """
         src = self.base_link + relative_link
-        r = requests.get(src, headers=self.headers)
-        odds_html = r.content
-        soup = BeautifulSoup(odds_html, features="html5lib")
+        r = self.fetch(src)
+        return self.get_fighter_record_betting_odds_from_html(r.content)
+
+    def get_fighter_record_betting_odds_from_html(self, odds_html, fighter_links=None):
+        """
+        Get a single fighter's betting odds for all of their fights from the html of their odds page.
+
+        Args:
+            odds_html (bytes, str): The raw html of the fighter's page.
+            fighter_links (dict, None): If given, filled with {name: relative link} for every fighter in the table.
+
+        Returns:
+            df (pd.DataFrame): A pandas dataframe of the fighters names for each of the bouts, their opening and closing
+                American odds (as nullable Int32, missing for cells that can't be parsed) and the bout date (as
+                datetime64).
+
+        """
+        soup = self.make_soup(odds_html, only_tables=True)
 
         # print(soup.prettify())
         tables = soup.find_all("table", )
@@ -130,60 +299,126 @@ class OddsScrapeAndProcess(DataBase):
             warnings.warn("No tables found.")
 
         t = tables[0]
-        rows = t.find_all("tr")
-        rows = [r for r in rows if "event-header" not in str(r)]
+        rows = [r for r in t.find_all("tr") if "event-header" not in (r.get("class") or [])]
 
-        # header = rows[0]
-        # columns = ["".join(h.contents) for h in header.find_all("th")]
+        if fighter_links is not None:
+            for row in rows:
+                header = row.find("th")
+                link = header.find("a", href=True) if header else None
+                if link and "/fighters/" in link["href"]:
+                    fighter_links[link.text.strip()] = link["href"]
 
         rows = rows[1:]  # get rid of table header
 
         if len(rows) % 2 != 0:
             raise ValueError("row lengths are now divisible by 2...")
 
-        row_sets = [(rows[i], rows[i + 1]) for i in range(0, len(rows), 2)]
-        row_sets = [r for r in row_sets if "Future Event" not in str(r[0])]
-        row_sets = [r for r in row_sets if "n/a" not in str(r[0])]
-        row_sets = [r for r in row_sets if "n/a" not in str(r[1])]
-
-        # f1_info = [d.find("span").contents for d in rows[3].find_all("td")]
-        headers = [
-            "fighter_1",
-            "fighter_1_odds_open",
-            "fighter_1_odds_close_best",
-            "fighter_1_odds_close_worst",
-            "fighter_2",
-            "fighter_2_odds_open",
-            "fighter_2_odds_close_best",
-            "fighter_2_odds_close_worst",
-            "date"
-        ]
-        data = []
-        for rs in row_sets:
-            bout_data = []
-            for row in rs:
-                info = []
-                for cell in row.find_all("td"):
-                    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-                    if any([m + " " in str(cell) for m in months]):
-                        info.append(cell.contents[0])
-                    else:
-                        inner_span = cell.find("span")
-                        if inner_span:
-                            contents = inner_span.contents[0]
-                            if "–" not in contents and "%" not in contents:
-                                info.append(contents)
+        columns = {h: [] for h in ODDS_COLUMNS}
+        for i in range(0, len(rows), 2):
+            fighter_1 = self.parse_odds_row(rows[i])
+            fighter_2 = self.parse_odds_row(rows[i + 1])
+            if fighter_1 is None or fighter_2 is None or fighter_1["future"]:
+                continue
+            date = fighter_1["date"] or fighter_2["date"]
+            if len(fighter_1["odds"]) != 3 or len(fighter_2["odds"]) != 3 or date is None:
+                warnings.warn(f"Bout between {fighter_1['name']} and {fighter_2['name']} could not be parsed.")
+                continue
 
-                fighter = row.find("th").find("a").find("div").contents[0]
+            for n, fighter in ((1, fighter_1), (2, fighter_2)):
+                columns[f"fighter_{n}"].append(fighter["name"])
+                columns[f"fighter_{n}_odds_open"].append(fighter["odds"][0])
+                columns[f"fighter_{n}_odds_close_best"].append(fighter["odds"][1])
+                columns[f"fighter_{n}_odds_close_worst"].append(fighter["odds"][2])
+            columns["date"].append(date)
+
+        for h in ODDS_COLUMNS:
+            if h == "date":
+                columns[h] = pd.to_datetime(columns[h])
+            elif h.startswith("fighter") and "odds" in h:
+                columns[h] = pd.array(columns[h], dtype="Int32")
+        df = pd.DataFrame(columns, columns=ODDS_COLUMNS)
+        return df
 
-                df_row = [fighter] + info
-                bout_data += df_row
-            data.append(bout_data)
+    def parse_odds_row(self, row):
+        """
+        Parse one fighter's row of a bout in an odds table, visiting each cell once.
 
-        df = pd.DataFrame(columns=headers, data=data)
-        return df
+        Args:
+            row: A BeautifulSoup table row.
+
+        Returns:
+            (dict, None): The fighter's "name", American "odds" as ints (open, closing best, closing worst, each None
+                if its cell can't be parsed), the bout "date" (if it is in this row), and whether the bout is a "future"
+                event. None if the row has no odds (n/a).
+        """
+        name = row.find("th").find("a").find("div").text
+        odds = []
+        date = None
+        future = False
+        for cell in row.find_all("td"):
+            text = cell.text.strip()
+            if "n/a" in text:
+                return None
+            elif "Future Event" in text:
+                future = True
+            date_match = ODDS_DATE_REGEX.match(text)
+            if date_match:
+                day, month, year = date_match.group(2), date_match.group(1), date_match.group(3)
+                date = datetime.strptime(f"{day} {month} {year}", "%d %b %Y")
+            else:
+                inner_span = cell.find("span")
+                if inner_span:
+                    contents = inner_span.text.strip()
+                    if "–" not in contents and "%" not in contents:
+                        odds.append(self.parse_odds_cell(contents))
+        return {"name": name, "odds": odds, "date": date, "future": future}
+
+    def parse_odds_cell(self, contents):
+        """
+        Parse the text of one odds cell, e.g., "+150", "-200", "−200" (with a unicode minus), or "EV" (even odds).
+
+        Args:
+            contents (str): The stripped text of the cell's span.
+
+        Returns:
+            (int, None): The American odds, None if the cell is empty or can't be parsed (e.g., "PK").
+        """
+        if contents.upper() in ("EV", "EVEN"):
+            return 100
+        try:
+            return int(contents.replace("−", "-"))
+        except ValueError:
+            return None
+
+    def odds_record_to_dict(self, odds_record):
+        """
+        Convert an odds record DataFrame to a json-serializable dict of columns, with dates as YYYY-MM-DD strings and
+        missing odds as None.
+
+        Args:
+            odds_record (pd.DataFrame): The output of get_fighter_record_betting_odds_from_html.
 
-    def get_relative_link_from_fighter_name(self, name):
+        Returns:
+            (dict): The odds record in pd.DataFrame.to_dict format.
+        """
+        odds_record = odds_record.assign(date=odds_record["date"].dt.strftime("%Y-%m-%d"))
+        return {
+            column: {i: None if v is pd.NA else v.item() if hasattr(v, "item") else v for i, v in values.items()}
+            for column, values in odds_record.to_dict().items()
+        }
+
+    def get_relative_link_from_fighter_name(self, name, fighter_links=None):
+        """
+        Search bestfightodds for a fighter's relative links.
+
+        Args:
+            name (str): The fighter name.
+            fighter_links (dict, None): If given, filled with {name: relative link} for every fighter in the search
+                results, matching or not.
+
+        Returns:
+            ([str]): The relative links of the matching fighters.
+        """
         # /search?query=Jon+Jones
 
         name_url_query = name.strip().replace(" ", "+")
@@ -192,14 +427,17 @@ class OddsScrapeAndProcess(DataBase):
         # print(search_link)
 
         src = self.base_link + search_link
-        r = requests.get(src, headers=self.headers)
-        soup = BeautifulSoup(r.content, features="html5lib")
+        r = self.fetch(src)
+        soup = self.make_soup(r.content)
         all_links = soup.findAll('a', href=True)
 
-        name_linked = "-".join(name.strip().split(" ")).lower()
+        name_linked = get_join_key(name)
 
         working_links = []
         for link in all_links:
+            if fighter_links is not None and link.parent.name == "td" and "/fighters/" in link["href"]:
+                fighter_links[link.text.strip()] = link["href"]
+
             if link.parent.name == "td":
                 lower_link = str(link).lower()
                 if name_linked in lower_link:
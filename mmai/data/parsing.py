@@ -0,0 +1,56 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+
+FAST_PARSER = "lxml"
+
+
+def is_parser_available(parser):
+    """
+    Determine whether a BeautifulSoup tree builder (e.g., "lxml", "html5lib", "html.parser") is installed.
+
+    Args:
+        parser (str): The name of the tree builder.
+
+    Returns:
+        (bool): True if BeautifulSoup can parse with it.
+    """
+    return builder_registry.lookup(parser) is not None
+
+
+def get_parser_backend(preferred=None, fallback="html.parser"):
+    """
+    Choose the tree builder to parse pages with.
+
+    Args:
+        preferred (str, None): The tree builder to use. If None, the fast lxml builder is used when it is installed.
+        fallback (str): The tree builder to use when preferred is None and lxml is not installed.
+
+    Returns:
+        (str): The name of the tree builder.
+    """
+    if preferred:
+        if not is_parser_available(preferred):
+            raise ValueError(f"Parser {preferred} is not available, is it installed?")
+        return preferred
+    elif is_parser_available(FAST_PARSER):
+        return FAST_PARSER
+    else:
+        return fallback
+
+
+def make_soup(content, parser, only_tables=False):
+    """
+    Parse html content into a BeautifulSoup.
+
+    Args:
+        content (bytes, str): The raw html.
+        parser (str): The name of the tree builder, e.g., from get_parser_backend.
+        only_tables (bool): If True, only <table> elements (and their contents) are kept in the tree, which skips
+            building the rest of the page. Ignored by html5lib, which always builds the whole tree.
+
+    Returns:
+        (BeautifulSoup): The parsed page.
+    """
+    parse_only = SoupStrainer("table") if only_tables and parser != "html5lib" else None
+    return BeautifulSoup(content, features=parser, parse_only=parse_only)
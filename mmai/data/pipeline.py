@@ -0,0 +1,89 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# Scrapers constructed inside pool worker processes, reused across tasks in the same process
+_WORKER_SCRAPERS = {}
+
+
+class ScraperMethod:
+    """
+    A picklable reference to a scraper method, for calling it in a worker process.
+
+    Scrapers hold sessions, caches and locks which can't be sent to other processes, so each worker process instead
+    builds its own scraper (once) and calls the method on that.
+
+    Attrs:
+        scraper_class (type): The DataBase subclass, e.g., WikiFightersRaw.
+        method (str): The name of the method to call.
+        scraper_kwargs (dict): Passed to the scraper_class constructor, e.g., {"parser": "lxml"}.
+        kwargs (dict): Passed to the method on each call.
+    """
+
+    def __init__(self, scraper_class, method, scraper_kwargs=None, **kwargs):
+        self.scraper_class = scraper_class
+        self.method = method
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.kwargs = kwargs
+
+    def __call__(self, *args):
+        key = (self.scraper_class, tuple(sorted(self.scraper_kwargs.items())))
+        if key not in _WORKER_SCRAPERS:
+            _WORKER_SCRAPERS[key] = self.scraper_class(**self.scraper_kwargs)
+        return getattr(_WORKER_SCRAPERS[key], self.method)(*args, **self.kwargs)
+
+
+def ordered_pipeline(items, fetch, parse, io_workers=8, cpu_workers=0, max_pending=64):
+    """
+    Fetch and parse items concurrently, yielding the parsed results in the order of the items.
+
+    fetch runs in a pool of io_workers threads. Its result is handed to parse, which runs in a pool of cpu_workers
+    processes, or in the fetching thread if cpu_workers is 0. At most max_pending items are fetched or parsed ahead of
+    the consumer, so memory stays bounded no matter how many items there are.
+
+    Args:
+        items (iterable): The items to fetch, e.g., relative links.
+        fetch (callable): Called as fetch(item), returning a tuple of arguments for parse. Usually network bound.
+        parse (callable): Called as parse(*fetch(item)). Usually CPU bound. Must be picklable if cpu_workers > 0,
+            e.g., a module level function or a ScraperMethod.
+        io_workers (int): The number of fetching threads.
+        cpu_workers (int): The number of parsing processes. If 0, parsing is done in the fetching threads.
+        max_pending (int): The maximum number of items in flight at once.
+
+    Yields:
+        The parsed result of each item, in order.
+    """
+    max_pending = max(max_pending, io_workers, cpu_workers)
+
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool:
+        if cpu_workers:
+            cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers)
+
+            def stage(item):
+                return cpu_pool.submit(parse, *fetch(item))
+
+            def finish(future):
+                return future.result().result()
+
+        else:
+            cpu_pool = None
+
+            def stage(item):
+                return parse(*fetch(item))
+
+            def finish(future):
+                return future.result()
+
+        try:
+            pending = deque()
+            for item in items:
+                pending.append(io_pool.submit(stage, item))
+                if len(pending) >= max_pending:
+                    yield finish(pending.popleft())
+            while pending:
+                yield finish(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+            if cpu_pool:
+                cpu_pool.shutdown()
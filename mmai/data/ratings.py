@@ -0,0 +1,391 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import (
+    column_to_list,
+    dates_to_days,
+    days_to_dates,
+    get_dated_bout_index,
+    get_fighter_date_index,
+    get_fighter_rows,
+    interleave,
+    search_fighter_date_index,
+    to_dates,
+)
+from mmai.data.bouts import DRAW, LOSS, WIN
+
+
+RATING_METHODS = ("elo", "glicko")
+
+# The score of fighter_1 for each result code, NaN for results which don't update ratings (NC and unknown)
+SCORES = {WIN: 1.0, LOSS: 0.0, DRAW: 0.5}
+
+# Glicko's scale factor, ln(10) / 400
+GLICKO_Q = math.log(10) / 400
+
+
+class RatingEngine(DataBase):
+    """
+    Elo or Glicko ratings of every fighter, updated bout by bout in date order over the bout table.
+
+    Ratings are kept in arrays indexed by fighter id. Wins and losses score 1 and 0, draws score 0.5, and no contests
+    (or unknown results) leave both fighters' ratings unchanged. Each fighter's rating after each of their bouts is
+    kept as a checkpoint, so the rating of any fighter as of any date can be looked up without replaying the history,
+    and new bouts can be appended by continuing from the final ratings.
+
+    With Glicko, each bout is its own rating period, and a fighter's rating deviation grows with the time since their
+    last bout, c * sqrt(days), up to initial_rd.
+
+    Attrs:
+        data (dict): In {"ratings": {column: np.ndarray}, "state": {column: np.ndarray}} format. The ratings have two
+            rows per bout, one per fighter, with columns bout (the bout's index in the bout table), fighter, opponent,
+            date, result (from the fighter's point of view), expected (the fighter's expected score), rating_before,
+            and rating (after the bout), plus rd_before and rd with Glicko. The state is each fighter's rating (and
+            rd) and last_date after all the bouts so far, indexed by fighter id.
+        data_filename (str): A string of the full path where this class's output is saved.
+        method (str): "elo" or "glicko".
+        k (float): The Elo K-factor, the most a rating can change in one bout.
+        initial_rating (float): The rating of fighters without bouts.
+        initial_rd (float): The Glicko rating deviation of fighters without bouts, and the most it can grow to.
+        c (float): How fast the Glicko rating deviation grows with inactivity, per square root of days.
+    """
+
+    def __init__(self, method="elo", k=32.0, initial_rating=1500.0, initial_rd=350.0, c=8.0):
+        super().__init__()
+        if method not in RATING_METHODS:
+            raise ValueError(f"Unknown rating method {method}, expected one of {RATING_METHODS}.")
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, f"static/ratings_{method}.json")
+        self._index = None
+        self.method = method
+        self.k = k
+        self.initial_rating = initial_rating
+        self.initial_rd = initial_rd
+        self.c = c
+
+    def build(self, bout_table):
+        """
+        Rate every bout in a bout table from scratch.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table, built or loaded.
+
+        Returns:
+            (dict): The rating checkpoints and final ratings, also set as the data attr.
+        """
+        self.data = {"ratings": {}, "state": {}}
+        return self.update(bout_table)
+
+    def update(self, bout_table, start=None):
+        """
+        Rate the bouts appended to a bout table since the last build or update, continuing from each fighter's final
+        rating rather than replaying their history.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table, with the new bouts appended after the ones
+                already rated, and no new bout dated before the last one rated.
+            start (int, None): The index of the first new bout. If None, the first bout not yet rated.
+
+        Returns:
+            (dict): The rating checkpoints and final ratings, also set as the data attr.
+        """
+        ratings = self.data["ratings"]
+        if start is None:
+            start = int(ratings["bout"].max()) + 1 if len(ratings.get("bout", ())) else 0
+        self._grow(len(bout_table.data["fighters"]["name"]))
+
+        bouts = bout_table.data["bouts"]
+        index = get_dated_bout_index(bout_table, start)
+        date = bouts["date"][index]
+        if len(index) and len(ratings.get("date", ())):
+            last = ratings["date"].max()
+            if date.min() < last:
+                raise ValueError(f"New bouts must not be dated before the last bout already rated ({last}).")
+
+        fighter_1 = bouts["fighter_1"][index]
+        fighter_2 = bouts["fighter_2"][index]
+        result_1 = bouts["result"][index]
+        score = pd.Series(result_1).map(SCORES).to_numpy(np.float64)
+        if self.method == "elo":
+            before, after, expected = self._rate_elo(fighter_1, fighter_2, score)
+        else:
+            before, after, expected = self._rate_glicko(fighter_1, fighter_2, score, date)
+        self._set_last_dates(fighter_1, fighter_2, date)
+
+        new = get_fighter_rows(bout_table, index)
+        new["expected"] = interleave(expected, 1 - expected).astype(np.float32)
+        for column in self.get_rating_columns():
+            new[column + "_before"] = interleave(*before[column]).astype(np.float32)
+            new[column] = interleave(*after[column]).astype(np.float32)
+
+        for column, values in new.items():
+            ratings[column] = np.concatenate([ratings[column], values]) if column in ratings else values
+        self._index = None
+        print(f"Rated {len(index)} bouts with {self.method}, {len(ratings['bout']) // 2} in total.")
+        return self.data
+
+    def get_ratings(self, fighter_ids, dates):
+        """
+        Get the ratings of fighters as of dates, from only their bouts before each date, all at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            dates (np.ndarray): The dates (datetime64, or anything pd.to_datetime takes).
+
+        Returns:
+            (dict): The rating (and Glicko rd, grown up to the date) of each (fighter, date), in {column: np.ndarray}
+                format.
+        """
+        fighter_ids = np.asarray(fighter_ids, dtype=np.int64)
+        dates = to_dates(dates)
+        ratings = self.data["ratings"]
+        n_rows = len(ratings.get("fighter", ()))
+
+        # The last bout of a fighter before a date has their rating as of the date, if there is one
+        found = np.zeros(len(fighter_ids), dtype=bool)
+        row = np.zeros(len(fighter_ids), dtype=np.int64)
+        if n_rows:
+            row, found = search_fighter_date_index(self._get_index(), fighter_ids, dates, before=True)
+
+        result = {}
+        for column in self.get_rating_columns():
+            initial = self.initial_rating if column == "rating" else self.initial_rd
+            from_row = ratings[column][row] if n_rows else initial
+            result[column] = np.where(found, from_row, initial).astype(np.float32)
+        if self.method == "glicko" and n_rows:
+            days = (dates - ratings["date"][row]).astype(np.int64).astype(np.float64)
+            result["rd"] = np.where(found, self._grow_rd(result["rd"], days), result["rd"]).astype(np.float32)
+        return result
+
+    def get_expected(self, fighter_ids, opponent_ids, dates):
+        """
+        Get the expected scores (win probabilities, counting draws as half a win) of fighters against opponents as of
+        dates, all at once.
+
+        Args:
+            fighter_ids (np.ndarray): The fighter ids.
+            opponent_ids (np.ndarray): The opponent ids.
+            dates (np.ndarray): The dates (datetime64, or anything pd.to_datetime takes).
+
+        Returns:
+            (np.ndarray): The float32 expected scores of the fighters.
+        """
+        fighter = self.get_ratings(fighter_ids, dates)
+        opponent = self.get_ratings(opponent_ids, dates)
+        difference = fighter["rating"].astype(np.float64) - opponent["rating"]
+        if self.method == "glicko":
+            difference = difference * self._g(opponent["rd"].astype(np.float64))
+        return (1 / (1 + 10 ** (-difference / 400))).astype(np.float32)
+
+    def get_log_loss(self):
+        """
+        Get the mean log loss of the expected scores going into each bout with a win, loss, or draw, i.e., how well
+        the ratings predicted the bouts. Lower is better.
+
+        Returns:
+            (float): The log loss.
+        """
+        ratings = self.data["ratings"]
+        # fighter_1's rows
+        result = ratings["result"][::2]
+        expected = np.clip(ratings["expected"][::2].astype(np.float64), 1e-9, 1 - 1e-9)
+        score = pd.Series(result).map(SCORES).to_numpy(np.float64)
+        rated = ~np.isnan(score)
+        losses = -(score * np.log(expected) + (1 - score) * np.log(1 - expected))
+        return float(losses[rated].mean()) if rated.any() else np.nan
+
+    def sweep(self, bout_table, k_factors):
+        """
+        Rate the bout table with each K-factor (Elo) or c (Glicko), and compare how well they predicted the bouts.
+        The data attr is left rated with the last value.
+
+        Args:
+            bout_table (mmai.data.bouts.BoutTable): The bout table.
+            k_factors ([float]): The K-factors, or c values with Glicko.
+
+        Returns:
+            (pd.DataFrame): The log loss of each value, with columns value and log_loss.
+        """
+        parameter = "k" if self.method == "elo" else "c"
+        losses = []
+        for value in k_factors:
+            setattr(self, parameter, value)
+            self.build(bout_table)
+            losses.append(self.get_log_loss())
+        return pd.DataFrame({"value": list(k_factors), "log_loss": losses})
+
+    def to_frame(self):
+        """
+        Get the rating checkpoints as a DataFrame.
+
+        Returns:
+            (pd.DataFrame): The ratings, two rows per bout.
+        """
+        return pd.DataFrame(self.data["ratings"])
+
+    def to_tables(self):
+        """
+        Flatten the rating checkpoints, final ratings, and settings into flat tables for columnar storage.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        tables = {}
+        for name in ("ratings", "state"):
+            tables[name] = {c: column_to_list(v) for c, v in self.data[name].items()}
+        tables["settings"] = {
+            "method": [self.method],
+            "k": [float(self.k)],
+            "initial_rating": [float(self.initial_rating)],
+            "initial_rd": [float(self.initial_rd)],
+            "c": [float(self.c)],
+        }
+        return tables
+
+    def save(self):
+        """
+        Save the rating checkpoints, final ratings, and settings in columnar format, next to data_filename.
+
+        Returns:
+            None
+        """
+        self.save_columnar()
+
+    def load(self):
+        """
+        Load the ratings saved with save, and the settings they were computed with.
+
+        Returns:
+            (dict): The rating checkpoints and final ratings.
+        """
+        settings = self.load_columnar("settings", mmap=False, as_frame=False)
+        self.method = str(settings["method"][0])
+        for name in ("k", "initial_rating", "initial_rd", "c"):
+            setattr(self, name, float(settings[name][0]))
+
+        self.data = {}
+        for name in ("ratings", "state"):
+            table = self.load_columnar(name, mmap=False, as_frame=False)
+            for column in ("date", "last_date"):
+                if column in table:
+                    table[column] = days_to_dates(table[column])
+            for column in ("bout", "fighter", "opponent"):
+                if column in table:
+                    table[column] = table[column].astype(np.int32)
+            if "result" in table:
+                table["result"] = table["result"].astype(np.int8)
+            self.data[name] = table
+        self._index = None
+        return self.data
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_rating_columns(self):
+        """
+        Get the columns each fighter's rating consists of.
+
+        Returns:
+            ([str]): ["rating"] with Elo, ["rating", "rd"] with Glicko.
+        """
+        return ["rating"] if self.method == "elo" else ["rating", "rd"]
+
+    def _rate_elo(self, fighter_1, fighter_2, score):
+        # Ratings are inherently sequential, so walk the bouts over plain lists, which is much faster than indexing
+        # numpy arrays one element at a time
+        rating = self.data["state"]["rating"].tolist()
+        k = self.k
+        n = len(score)
+        before_1, before_2, after_1, after_2, expected = [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n
+        for i, (a, b, s) in enumerate(zip(fighter_1.tolist(), fighter_2.tolist(), score.tolist())):
+            ra, rb = rating[a], rating[b]
+            e = 1 / (1 + 10 ** ((rb - ra) / 400))
+            before_1[i], before_2[i], expected[i] = ra, rb, e
+            if s == s:
+                change = k * (s - e)
+                ra, rb = ra + change, rb - change
+                rating[a], rating[b] = ra, rb
+            after_1[i], after_2[i] = ra, rb
+
+        self.data["state"]["rating"] = np.array(rating, dtype=np.float64)
+        before = {"rating": (np.array(before_1), np.array(before_2))}
+        after = {"rating": (np.array(after_1), np.array(after_2))}
+        return before, after, np.array(expected)
+
+    def _rate_glicko(self, fighter_1, fighter_2, score, date):
+        state = self.data["state"]
+        rating = state["rating"].tolist()
+        rd = state["rd"].tolist()
+        last_day = dates_to_days(state["last_date"]).tolist()
+        day = date.astype(np.int64).tolist()
+        q, q2, pi2 = GLICKO_Q, GLICKO_Q ** 2, math.pi ** 2
+        c2, max_rd = self.c ** 2, self.initial_rd
+        n = len(score)
+        columns = ("rating_1", "rating_2", "rd_1", "rd_2")
+        before = {column: [0.0] * n for column in columns}
+        after = {column: [0.0] * n for column in columns}
+        expected = [0.0] * n
+        for i, (a, b, s, d) in enumerate(zip(fighter_1.tolist(), fighter_2.tolist(), score.tolist(), day)):
+            # Grow the rating deviations with the time since each fighter's last bout
+            rda, rdb = rd[a], rd[b]
+            if last_day[a] == last_day[a]:
+                rda = min(math.sqrt(rda * rda + c2 * (d - last_day[a])), max_rd)
+            if last_day[b] == last_day[b]:
+                rdb = min(math.sqrt(rdb * rdb + c2 * (d - last_day[b])), max_rd)
+            ra, rb = rating[a], rating[b]
+            ga = 1 / math.sqrt(1 + 3 * q2 * rda * rda / pi2)
+            gb = 1 / math.sqrt(1 + 3 * q2 * rdb * rdb / pi2)
+            ea = 1 / (1 + 10 ** (-gb * (ra - rb) / 400))
+            eb = 1 / (1 + 10 ** (-ga * (rb - ra) / 400))
+            before["rating_1"][i], before["rating_2"][i], before["rd_1"][i], before["rd_2"][i] = ra, rb, rda, rdb
+            expected[i] = ea
+            if s == s:
+                variance_a = 1 / (1 / (rda * rda) + q2 * gb * gb * ea * (1 - ea))
+                variance_b = 1 / (1 / (rdb * rdb) + q2 * ga * ga * eb * (1 - eb))
+                ra, rb = ra + q * variance_a * gb * (s - ea), rb + q * variance_b * ga * ((1 - s) - eb)
+                rda, rdb = math.sqrt(variance_a), math.sqrt(variance_b)
+            rating[a], rating[b], rd[a], rd[b] = ra, rb, rda, rdb
+            last_day[a] = last_day[b] = d
+            after["rating_1"][i], after["rating_2"][i], after["rd_1"][i], after["rd_2"][i] = ra, rb, rda, rdb
+
+        state["rating"] = np.array(rating, dtype=np.float64)
+        state["rd"] = np.array(rd, dtype=np.float64)
+        before = {c: (np.array(before[c + "_1"]), np.array(before[c + "_2"])) for c in ("rating", "rd")}
+        after = {c: (np.array(after[c + "_1"]), np.array(after[c + "_2"])) for c in ("rating", "rd")}
+        return before, after, np.array(expected)
+
+    def _set_last_dates(self, fighter_1, fighter_2, date):
+        fighter = interleave(fighter_1, fighter_2)
+        last_index = pd.Series(np.arange(len(fighter))).groupby(fighter).last()
+        self.data["state"]["last_date"][last_index.index.to_numpy()] = np.repeat(date, 2)[last_index.to_numpy()]
+
+    def _get_index(self):
+        # Cached between lookups until rows are added or loaded
+        if self._index is None:
+            self._index = get_fighter_date_index(self.data["ratings"]["fighter"], self.data["ratings"]["date"])
+        return self._index
+
+    def _grow(self, n_fighters):
+        state = self.data["state"]
+        n = len(state.get("rating", ()))
+        if n_fighters > n:
+            grown = {
+                "rating": np.full(n_fighters - n, self.initial_rating),
+                "rd": np.full(n_fighters - n, self.initial_rd),
+                "last_date": np.full(n_fighters - n, np.datetime64("NaT"), dtype="datetime64[D]"),
+            }
+            for column, values in grown.items():
+                if column == "rd" and self.method == "elo":
+                    continue
+                state[column] = np.concatenate([state[column], values]) if column in state else values
+
+    def _grow_rd(self, rd, days):
+        return np.minimum(np.sqrt(rd.astype(np.float64) ** 2 + self.c ** 2 * np.maximum(days, 0)), self.initial_rd)
+
+    def _g(self, rd):
+        return 1 / np.sqrt(1 + 3 * GLICKO_Q ** 2 * rd ** 2 / math.pi ** 2)
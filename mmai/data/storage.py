@@ -0,0 +1,286 @@
+import hashlib
+import json
+import numbers
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from mmai.util import dump_json
+
+
+def write_columnar_table(directory, columns):
+    """
+    Write a flat table to a directory of NumPy arrays, one (or a few) per column, which can be memory mapped.
+
+    Numeric columns are stored as float64 (int64 if there are no missing values) arrays. All other columns are
+    dictionary encoded: an int32 array of codes into a string table of the column's unique values, which is stored as
+    one utf-8 buffer and an array of offsets. Missing values are NaN or code -1.
+
+    Args:
+        directory (str): The directory to write the table to. Created if it doesn't exist.
+        columns (dict): The table in {column name: [values]} format. All columns must have the same length.
+
+    Returns:
+        (str, int): The sha256 hex digest and total size in bytes of the files written (the schema, then each column's
+            arrays in order), which are the same for the same table.
+    """
+    os.makedirs(directory, exist_ok=True)
+    schema = []
+    files = []
+    for i, (name, values) in enumerate(columns.items()):
+        prefix = os.path.join(directory, f"c{i}")
+        if is_numeric_column(values):
+            array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            if not np.isnan(array).any() and all(isinstance(v, numbers.Integral) for v in values):
+                array = array.astype(np.int64)
+            np.save(prefix + ".values.npy", array)
+            files.append(prefix + ".values.npy")
+            schema.append({"name": name, "file": f"c{i}", "kind": "numeric"})
+        else:
+            codes, strings = encode_strings(values)
+            buffer = "".join(strings).encode("utf-8")
+            offsets = np.cumsum([0] + [len(s.encode("utf-8")) for s in strings], dtype=np.int64)
+            np.save(prefix + ".codes.npy", codes)
+            np.save(prefix + ".strings.npy", np.frombuffer(buffer, dtype=np.uint8))
+            np.save(prefix + ".offsets.npy", offsets)
+            files += [prefix + ".codes.npy", prefix + ".strings.npy", prefix + ".offsets.npy"]
+            schema.append({"name": name, "file": f"c{i}", "kind": "string"})
+
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    with open(os.path.join(directory, "schema.json"), "w") as f:
+        json.dump({"n_rows": n_rows, "columns": schema}, f)
+
+    digest = hashlib.sha256()
+    size = 0
+    for filename in [os.path.join(directory, "schema.json")] + files:
+        with open(filename, "rb") as f:
+            content = f.read()
+        digest.update(content)
+        size += len(content)
+    return digest.hexdigest(), size
+
+
+def read_columnar_table(directory, columns=None, mmap=True, as_frame=True):
+    """
+    Read (some of the columns of) a flat table written by write_columnar_table.
+
+    Only the files of the requested columns are opened. With mmap, numeric columns and string codes are memory mapped
+    rather than read, so only the pages actually used are loaded from disk.
+
+    Args:
+        directory (str): The directory the table was written to.
+        columns ([str], None): The names of the columns to read. If None, all columns are read.
+        mmap (bool): If True, memory maps the arrays instead of reading them into memory.
+        as_frame (bool): If True, returns a DataFrame. Otherwise returns a dict of numpy arrays (numeric columns) and
+            pd.Categoricals (string columns), which avoids copying the memory mapped arrays.
+
+    Returns:
+        (pd.DataFrame, dict): The table.
+    """
+    with open(os.path.join(directory, "schema.json"), "r") as f:
+        schema = json.load(f)
+
+    by_name = {c["name"]: c for c in schema["columns"]}
+    if columns is None:
+        columns = list(by_name.keys())
+    missing = [c for c in columns if c not in by_name]
+    if missing:
+        raise KeyError(f"Columns {missing} are not in the table at {directory}.")
+
+    mmap_mode = "r" if mmap else None
+    table = {}
+    for name in columns:
+        prefix = os.path.join(directory, by_name[name]["file"])
+        if by_name[name]["kind"] == "numeric":
+            table[name] = np.load(prefix + ".values.npy", mmap_mode=mmap_mode)
+        else:
+            codes = np.load(prefix + ".codes.npy", mmap_mode=mmap_mode)
+            strings = decode_strings(np.load(prefix + ".strings.npy"), np.load(prefix + ".offsets.npy"))
+            table[name] = pd.Categorical.from_codes(codes, categories=strings)
+
+    if as_frame:
+        return pd.DataFrame(table, columns=columns)
+    return table
+
+
+def is_numeric_column(values):
+    """
+    Determine whether a column of python values can be stored as floats (numbers, with None or NaN as missing).
+
+    Args:
+        values (list): The column.
+
+    Returns:
+        (bool): True if every value is a number (but not a bool) or None.
+    """
+    return all(
+        v is None or (isinstance(v, numbers.Number) and not isinstance(v, bool)) for v in values
+    )
+
+
+def encode_strings(values):
+    """
+    Dictionary encode a column of values as strings.
+
+    Args:
+        values (list): The column. None and NaN values are treated as missing.
+
+    Returns:
+        (np.ndarray, [str]): The int32 codes into the unique strings (-1 for missing), and the unique strings, in order
+            of first appearance.
+    """
+    lookup = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        if v is None or (isinstance(v, float) and np.isnan(v)):
+            codes[i] = -1
+            continue
+        v = str(v)
+        if v not in lookup:
+            lookup[v] = len(lookup)
+        codes[i] = lookup[v]
+    return codes, list(lookup.keys())
+
+
+def decode_strings(buffer, offsets):
+    """
+    Decode a string table stored by write_columnar_table.
+
+    Args:
+        buffer (np.ndarray): The uint8 utf-8 buffer of all the strings.
+        offsets (np.ndarray): The start of each string in the buffer, followed by the end of the last.
+
+    Returns:
+        ([str]): The strings.
+    """
+    raw = buffer.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def records_to_columns(records, columns=None):
+    """
+    Flatten a list of flat dicts to a {column: [values]} table, with None for keys missing from a dict.
+
+    Args:
+        records ([dict]): The rows.
+        columns ([str], None): The columns to keep. If None, all the keys of all the rows, in order of appearance.
+
+    Returns:
+        (dict): The table in {column name: [values]} format.
+    """
+    if columns is None:
+        columns = []
+        seen = set()
+        for r in records:
+            for k in r:
+                if k not in seen:
+                    seen.add(k)
+                    columns.append(k)
+    return {c: [r.get(c) for r in records] for c in columns}
+
+
+def write_jsonl(filename, items):
+    """
+    Write keyed entries as line-delimited json, with a sidecar index of the byte offset of each entry.
+
+    Like util.dump_json, the entries are written to a temporary file which replaces filename only once it is complete
+    and flushed to disk, and the index is then written the same way, so a crash mid-write leaves any previous files
+    intact.
+
+    Args:
+        filename (str): The path of the .jsonl file. The index is written to filename + ".idx.json".
+        items (iterable): The (str key, json-serializable value) pairs to write.
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(filename))
+    index = {}
+    offset = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for key, value in items:
+                line = (json.dumps(value) + "\n").encode("utf-8")
+                f.write(line)
+                index[key] = [offset, len(line)]
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    dump_json(index, filename + ".idx.json")
+
+
+class LazyJsonlMapping(Mapping):
+    """
+    A read-only mapping over a file written by write_jsonl, which decodes entries only when they are accessed.
+
+    Only the index is held in memory. Recently used entries are kept decoded, evicting the least recently used entry
+    once there are more than cache_size of them. Safe to use from multiple threads.
+
+    Cached entries are returned as is, not copied, so the same key gives the same object until it is evicted. Treat
+    them as read-only: changing one changes what later lookups of its key return. Copy an entry (e.g., with
+    copy.deepcopy) before modifying it.
+
+    Attrs:
+        filename (str): The path of the .jsonl file.
+        cache_size (int): The maximum number of decoded entries kept in memory.
+    """
+
+    def __init__(self, filename, cache_size=256):
+        self.filename = filename
+        self.cache_size = cache_size
+        with open(filename + ".idx.json", "r") as f:
+            self._index = json.load(f)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._fd = os.open(filename, os.O_RDONLY)
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        offset, length = self._index[key]
+        value = json.loads(os.pread(self._fd, length, offset).decode("utf-8"))
+
+        with self._lock:
+            self._cache[key] = value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def close(self):
+        """
+        Close the underlying file.
+
+        Returns:
+            None
+        """
+        os.close(self._fd)
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, AttributeError):
+            pass
@@ -0,0 +1,279 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from mmai.data.base import THIS_DIR
+from mmai.data.names import get_join_key
+from mmai.data.odds import ODDS_COLUMNS
+from mmai.util import parse_wiki_date
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fighters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    join_key TEXT,
+    name_raw TEXT,
+    link TEXT,
+    warning_level INTEGER,
+    age_days REAL,
+    height_m REAL,
+    weight_kg REAL,
+    reach_cm REAL
+);
+CREATE TABLE IF NOT EXISTS bouts (
+    id INTEGER PRIMARY KEY,
+    fighter_id INTEGER NOT NULL REFERENCES fighters (id),
+    result TEXT,
+    record TEXT,
+    opponent TEXT,
+    opponent_id INTEGER REFERENCES fighters (id),
+    method TEXT,
+    event TEXT,
+    date TEXT,
+    date_raw TEXT,
+    round INTEGER,
+    time TEXT,
+    location TEXT,
+    notes TEXT
+);
+CREATE TABLE IF NOT EXISTS odds (
+    id INTEGER PRIMARY KEY,
+    fighter_name TEXT NOT NULL,
+    fighter_1 TEXT,
+    fighter_1_odds_open INTEGER,
+    fighter_1_odds_close_best INTEGER,
+    fighter_1_odds_close_worst INTEGER,
+    fighter_2 TEXT,
+    fighter_2_odds_open INTEGER,
+    fighter_2_odds_close_best INTEGER,
+    fighter_2_odds_close_worst INTEGER,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS fighters_join_key ON fighters (join_key);
+CREATE INDEX IF NOT EXISTS fighters_age_days ON fighters (age_days);
+CREATE INDEX IF NOT EXISTS fighters_height_m ON fighters (height_m);
+CREATE INDEX IF NOT EXISTS fighters_weight_kg ON fighters (weight_kg);
+CREATE INDEX IF NOT EXISTS fighters_reach_cm ON fighters (reach_cm);
+CREATE INDEX IF NOT EXISTS bouts_fighter_id ON bouts (fighter_id);
+CREATE INDEX IF NOT EXISTS bouts_opponent ON bouts (opponent);
+CREATE INDEX IF NOT EXISTS bouts_opponent_id ON bouts (opponent_id);
+CREATE INDEX IF NOT EXISTS bouts_date ON bouts (date);
+CREATE INDEX IF NOT EXISTS bouts_event ON bouts (event);
+CREATE INDEX IF NOT EXISTS odds_fighter_name ON odds (fighter_name);
+CREATE INDEX IF NOT EXISTS odds_fighter_1 ON odds (fighter_1);
+CREATE INDEX IF NOT EXISTS odds_fighter_2 ON odds (fighter_2);
+CREATE INDEX IF NOT EXISTS odds_date ON odds (date);
+"""
+
+# Wikipedia record table headers (with the dots removed) for each column of the bouts table
+BOUT_COLUMNS = {
+    "result": "Res",
+    "record": "Record",
+    "opponent": "Opponent",
+    "method": "Method",
+    "event": "Event",
+    "round": "Round",
+    "time": "Time",
+    "location": "Location",
+    "notes": "Notes",
+}
+
+
+class FighterStore:
+    """
+    An embedded SQLite store of fighters, their bouts, and betting odds, with indexes for ad-hoc queries.
+
+    The fighters and bouts tables are filled from the output of WikiFightersProcessed.process, the odds table from
+    the output of OddsScrapeAndProcess.scrape. Bout and odds dates are stored as YYYY-MM-DD text, so they sort and
+    compare correctly, e.g., "SELECT * FROM bouts WHERE date BETWEEN '2018-01-01' AND '2018-12-31'".
+
+    Bout opponents are stored as written on wikipedia (opponent) and resolved to the fighters table by join key
+    (opponent_id, NULL for opponents who aren't in the store), so bouts can be joined on ids, e.g.,
+    "SELECT o.name, o.reach_cm FROM bouts b JOIN fighters o ON o.id = b.opponent_id WHERE b.fighter_id = ?". Both
+    are indexed, so the bouts against an opponent who isn't in the store can be found by name too.
+
+    Attrs:
+        filename (str): The path of the SQLite database file.
+        connection (sqlite3.Connection): The connection to the database.
+    """
+
+    def __init__(self, filename=os.path.join(THIS_DIR, "static/fighters.sqlite")):
+        self.filename = filename
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.connection = sqlite3.connect(filename)
+        self.connection.create_function("join_key", 1, get_join_key, deterministic=True)
+        self.connection.executescript(SCHEMA)
+
+    def insert_processed(self, processed_data, replace=True):
+        """
+        Bulk insert processed wikipedia fighters and their bouts in a single transaction, then resolve the opponents
+        of every bout without an opponent_id, including existing bouts against the newly inserted fighters.
+
+        Args:
+            processed_data (dict): The output of WikiFightersProcessed.process, in {fighter_name: {data}} format.
+            replace (bool): If True, all existing fighters and bouts are deleted first. Otherwise, only existing
+                fighters with the same names (and their bouts) are replaced.
+
+        Returns:
+            (int, int): The number of fighters and bouts inserted.
+        """
+        fighters = []
+        bouts = []
+        for fighter_id, (name, f) in enumerate(processed_data.items(), start=1):
+            fighters.append(
+                (
+                    fighter_id,
+                    name,
+                    get_join_key(name),
+                    f.get("name_raw"),
+                    f.get("link"),
+                    f.get("warning_level"),
+                    to_float(f.get("age_days")),
+                    to_float(f.get("height_m")),
+                    to_float(f.get("weight_kg")),
+                    to_float(f.get("reach_cm")),
+                )
+            )
+            for fight in f["record"]:
+                date = parse_wiki_date(fight.get("Date"))
+                row = {column: fight.get(header) for column, header in BOUT_COLUMNS.items()}
+                row["round"] = to_int(row["round"])
+                bouts.append(
+                    (
+                        fighter_id,
+                        *row.values(),
+                        date.strftime("%Y-%m-%d") if date else None,
+                        fight.get("Date"),
+                    )
+                )
+
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM bouts")
+                self.connection.execute("DELETE FROM fighters")
+            else:
+                names = [(f[1],) for f in fighters]
+                self.connection.executemany(
+                    "DELETE FROM bouts WHERE fighter_id IN (SELECT id FROM fighters WHERE name = ?)", names
+                )
+                self.connection.executemany(
+                    "UPDATE bouts SET opponent_id = NULL WHERE opponent_id IN (SELECT id FROM fighters WHERE name = ?)",
+                    names,
+                )
+                self.connection.executemany("DELETE FROM fighters WHERE name = ?", names)
+
+            offset = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM fighters").fetchone()[0]
+            fighters = [(f[0] + offset, *f[1:]) for f in fighters]
+            bouts = [(b[0] + offset, *b[1:]) for b in bouts]
+            self.connection.executemany("INSERT INTO fighters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", fighters)
+            self.connection.executemany(
+                f"INSERT INTO bouts (fighter_id, {', '.join(BOUT_COLUMNS.keys())}, date, date_raw) "
+                f"VALUES ({', '.join(['?'] * (len(BOUT_COLUMNS) + 3))})",
+                bouts,
+            )
+            self.resolve_opponents()
+        return len(fighters), len(bouts)
+
+    def insert_odds(self, odds_data, replace=True):
+        """
+        Bulk insert scraped betting odds in a single transaction.
+
+        Args:
+            odds_data (dict): The output of OddsScrapeAndProcess.scrape, in {fighter_name: {data}} format.
+            replace (bool): If True, the existing odds are deleted first.
+
+        Returns:
+            (int): The number of odds lines inserted.
+        """
+        lines = []
+        for name, data in odds_data.items():
+            odds_record = data.get("odds_record")
+            if not odds_record:
+                continue
+            columns = [list(odds_record[h].values()) for h in ODDS_COLUMNS]
+            for values in zip(*columns):
+                lines.append((name, *values))
+
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM odds")
+            self.connection.executemany(
+                f"INSERT INTO odds (fighter_name, {', '.join(ODDS_COLUMNS)}) "
+                f"VALUES ({', '.join(['?'] * (len(ODDS_COLUMNS) + 1))})",
+                lines,
+            )
+        return len(lines)
+
+    def resolve_opponents(self):
+        """
+        Set the opponent_id of every bout without one to the id of the fighter with the same join key as the opponent,
+        if there is one. Runs in the current transaction, e.g., the one of insert_processed, without committing.
+
+        Returns:
+            (int): The number of bouts whose opponent was resolved.
+        """
+        count = "SELECT COUNT(*) FROM bouts WHERE opponent_id IS NULL"
+        unresolved = self.connection.execute(count).fetchone()[0]
+        self.connection.execute(
+            "UPDATE bouts SET opponent_id = "
+            "(SELECT MIN(id) FROM fighters WHERE fighters.join_key = join_key(bouts.opponent)) "
+            "WHERE opponent_id IS NULL AND opponent IS NOT NULL"
+        )
+        return unresolved - self.connection.execute(count).fetchone()[0]
+
+    def query(self, sql, params=()):
+        """
+        Run a read query against the store.
+
+        Args:
+            sql (str): The query, e.g., "SELECT * FROM bouts WHERE opponent_id = ?".
+            params (tuple, dict): The query parameters.
+
+        Returns:
+            (pd.DataFrame): The result.
+        """
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def close(self):
+        """
+        Close the connection to the database.
+
+        Returns:
+            None
+        """
+        self.connection.close()
+
+
+def to_float(value):
+    """
+    Convert a value (e.g., a numeric string like "1.93") to a float, or None if it isn't a number.
+
+    Args:
+        value: The value.
+
+    Returns:
+        (float, None): The number.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+def to_int(value):
+    """
+    Convert a value (e.g., a numeric string like "3") to an int, or None if it isn't an integer.
+
+    Args:
+        value: The value.
+
+    Returns:
+        (int, None): The integer.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,18 +1,39 @@
-import requests
+import hashlib
+import itertools
 import json
 import os
+from urllib.parse import unquote
 import re
-from datetime import datetime
+from datetime import date, datetime
+from functools import partial
 import warnings
-from string import ascii_letters
-import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 
-from bs4 import BeautifulSoup
 import pandas as pd
 import tqdm
-import numpy as np
 
 from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.dump import iter_html_dump
+from mmai.data.names import canonicalize_name
+from mmai.data.pipeline import ScraperMethod, ordered_pipeline
+from mmai.data.storage import records_to_columns
+from mmai.util import dump_json, load_json
+
+
+# The metric value and unit in the parentheses of an infobox field, e.g., "1.93" and "m" in "6\xa0ft 4\xa0in
+# (1.93\xa0m)", or "180" and "cm" in "5\xa0ft 11\xa0in (180\xa0cm)"
+HEIGHT_REGEX = re.compile(r"\(\s*([^)\s;]+)\s*(c?m)\s*[;)]")
+WEIGHT_REGEX = re.compile(r"\(\s*([^)\s;]+)\s*(kg)\s*[;)]")
+REACH_REGEX = re.compile(r"\(\s*([^)\s;]+)\s*(c?m)\s*[;)]")
+# The infobox field, regex, and unit of each processed measurement, with the factor converting other units to it
+MEASUREMENTS = {
+    "height_m": ("Height", HEIGHT_REGEX, {"m": 1, "cm": 0.01}),
+    "weight_kg": ("Weight", WEIGHT_REGEX, {"kg": 1}),
+    "reach_cm": ("Reach", REACH_REGEX, {"cm": 1, "m": 100}),
+}
+
+# Incremented whenever the processed fighter format changes, so incremental processing recomputes every fighter
+PROCESSED_VERSION = 2
 
 
 class WikiFightersProcessed(DataBase):
@@ -23,6 +44,9 @@ class WikiFightersProcessed(DataBase):
         data ([dict]): A dict of fighters in {fighter_name: {data}} format.
         data_filename (str): A string of the full path where this class's output is saved
         raw_data: The data which this class cleans and processes.
+        processing_report (dict): A summary of the last processing: the number of raw and processed fighters, the
+            links of the omitted fighters by reason for omission, and the [raw name, canonical name] of each fighter
+            whose name was canonicalized.
     """
 
     def __init__(self):
@@ -31,133 +55,335 @@ class WikiFightersProcessed(DataBase):
 
         Args:
         """
+        super().__init__()
         self.raw_data = None
         self.data = None
         self.data_filename = os.path.join(
             THIS_DIR, "static/wiki_fighters_processed.json"
         )
+        self.processing_report = None
 
-    def process(self, raw_data, warning_level_threshold=1):
+    def process(self, raw_data, warning_level_threshold=1, incremental=False, workers=1, report=False):
         """
         Process the raw wikipedia records.
 
+        The height, weight, and reach of the retained fighters are extracted from their infobox fields with compiled
+        regexes, parsing each distinct field text once, since most fighters share theirs with others.
+
+        In incremental mode, each raw fighter is fingerprinted by its link and a hash of its content, and only the new
+        or changed ones are processed. The rest are reused from the previously saved processed file, and fighters whose
+        links are no longer in raw_data are dropped. The processed file and its fingerprints are then saved.
+
+        Omitted fighters and canonicalized names are summarized in the processing_report attr rather than warned about
+        one by one.
+
         Args:
             raw_data: The output of the WikiFightersRaw class. Use the .data attr.
             warning_level_threshold: Only retain records with this warning level or lower.
+            incremental (bool): If True, reprocess only what changed since the last incremental run, and save.
+            workers (int): The number of processes to process the raw fighters with, in chunks. The output is the same
+                for any number of workers.
+            report (bool): If True, also saves the processing report to wikipedia_processing_report.json.
 
         Returns:
-
+            (dict): The fighters in {fighter_name: {data}} format. age_days, height_m, weight_kg, and reach_cm are
+                floats, NaN where they could not be parsed.
         """
-        raw = raw_data
         self.raw_data = raw_data
-        # fighters = []
+        today = datetime.today()
+        if incremental:
+            processed, fingerprints = self.process_incremental(raw_data, warning_level_threshold, workers, today)
+        else:
+            processed = self.process_fighters_in_parallel(raw_data, warning_level_threshold, workers, today)
+
         fighters = {}
+        omitted = {}
+        canonicalized = []
+        for f, fighter_data in zip(raw_data, processed):
+            if fighter_data:
+                fighters[fighter_data["name"]] = fighter_data
+                if fighter_data["name"] != fighter_data["name_raw"]:
+                    canonicalized.append([fighter_data["name_raw"], fighter_data["name"]])
+            else:
+                reason = self.get_omission_reason(f, warning_level_threshold)
+                omitted.setdefault(reason, []).append(f["link"])
+
+        self.processing_report = {
+            "n_raw": len(raw_data),
+            "n_processed": len(fighters),
+            "omitted": omitted,
+            "canonicalized": canonicalized,
+        }
+        print(f"Processed {len(fighters)}/{len(raw_data)} fighters, canonicalized {len(canonicalized)} names.")
+        for reason, links in omitted.items():
+            print(f"Omitted {len(links)} fighters because {reason}.")
+        if report:
+            dump_json(self.processing_report, "wikipedia_processing_report.json")
 
-        for f in raw:
-            warning_level = f["warning_level"]
-            title = f["title"]
-            link = f["link"]
+        self.data = fighters
+        if incremental:
+            # The fingerprints are saved last, so they never describe a processed file that wasn't saved
+            self.save()
+            dump_json(fingerprints, self.get_fingerprints_filename())
+        return fighters
 
-            if warning_level > warning_level_threshold:
-                warnings.warn(
-                    f"Omitting {title} ({link}) because warning level is {warning_level} > {warning_level_threshold}"
-                )
-                continue
+    def process_fighters(self, raw_fighters, warning_level_threshold=1, today=None):
+        """
+        Process a list of raw fighters.
 
-            info = f["info"]
-            if not info:
-                warnings.warn(
-                    f"Omitting {title} ({link}) because it doesn't have info."
-                )
-                continue
+        The fighters are processed in one loop rather than column by column with pandas string operations: the output
+        is a dict per fighter, and building those dicts alone takes about a third of the loop's time, so a batch path
+        measured slower than the loop with its per-text caches (see benchmarks/bench_wiki_process.py).
 
-            record = f["record"]
-            if not record:
-                warnings.warn(f"Omitting {title} ({link}) because no record was found.")
-                continue
+        Args:
+            raw_fighters ([dict]): Raw fighters, from the output of the WikiFightersRaw class.
+            warning_level_threshold: Only retain records with this warning level or lower.
+            today (datetime, None): The date ages are computed at. If None, today.
 
-            full_name = info["Full name"]
-            if not full_name:
-                warnings.warn(
-                    f"Omitting {title} ({link}) because it doesn't have a full name."
-                )
+        Returns:
+            ([dict, None]): The processed data of each raw fighter, in order, or None for raw fighters which are not
+                retained.
+        """
+        today = (today if today else datetime.today()).date()
+        # {field text: value} of each measurement, shared by all the fighters
+        parsed = {measurement: {} for measurement in MEASUREMENTS}
+        processed = []
+        for f in raw_fighters:
+            if self.get_omission_reason(f, warning_level_threshold) is not None:
+                processed.append(None)
                 continue
+            info = f["info"]
+            fighter_data = {
+                "record": f["record"],
+                "link": f["link"],
+                "warning_level": f["warning_level"],
+                "name_raw": info["Full name"],
+                "name": canonicalize_name(info["Full name"]),
+            }
+            birthday = self.get_birthday(info.get("Formatted birthday"))
+            fighter_data["age_days"] = float((today - birthday).days) if birthday else float("nan")
+            for measurement, (field, regex, units) in MEASUREMENTS.items():
+                text = info.get(field)
+                values = parsed[measurement]
+                if text not in values:
+                    values[text] = self.get_measurement(text, regex, units)
+                fighter_data[measurement] = values[text]
+            fighter_data["birthday"] = birthday.isoformat() if birthday else None
+            processed.append(fighter_data)
+        return processed
+
+    def process_fighters_in_parallel(self, raw_fighters, warning_level_threshold=1, workers=1, today=None):
+        """
+        Process a list of raw fighters in chunks across a pool of processes, with the same output as process_fighters.
 
-                # disambiguate names with foreign characters
-            modified_name = self.canonicalize_name(full_name)
-            print(f"Formatted name {full_name} to {modified_name}")
+        Args:
+            raw_fighters ([dict]): Raw fighters, from the output of the WikiFightersRaw class.
+            warning_level_threshold: Only retain records with this warning level or lower.
+            workers (int): The number of processes. If 1, the fighters are processed in this process.
+            today (datetime, None): The date ages are computed at. If None, today.
 
-            info = f.get("info", np.nan)
-            today = datetime.today()
-            age_days = np.nan
-            try:
-                bday_raw = info["Formatted birthday"]
-                bday = datetime.strptime(bday_raw)
-                diff = today - bday
-                age_days = diff.days
-            except:
-                pass
+        Returns:
+            ([dict, None]): The processed data of each raw fighter, in order, or None for raw fighters which are not
+                retained.
+        """
+        today = today if today else datetime.today()
+        if workers <= 1 or len(raw_fighters) < 2:
+            return self.process_fighters(raw_fighters, warning_level_threshold, today)
+
+        # A few chunks per worker evens out chunks that process slower than others
+        chunk_size = -(-len(raw_fighters) // (workers * 4))
+        chunks = [raw_fighters[i:i + chunk_size] for i in range(0, len(raw_fighters), chunk_size)]
+        process_chunk = ScraperMethod(
+            WikiFightersProcessed, "process_fighters", warning_level_threshold=warning_level_threshold, today=today
+        )
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map yields the chunks in order, so the merge is deterministic
+            return list(itertools.chain.from_iterable(pool.map(process_chunk, chunks)))
 
-            height = np.nan
-            try:
-                height_raw = info["Height"]
-                height_raw = re.search("\(([^)]+)", height_raw).group(1)
-                height = height_raw.replace("\xa0m", "").strip()
-            except KeyError:
-                pass
+    def process_incremental(self, raw_fighters, warning_level_threshold=1, workers=1, today=None):
+        """
+        Process a list of raw fighters, reusing the saved processed data of those unchanged since the last incremental
+        run. Prints how many fighters were reused, recomputed, and removed.
 
-            reach = np.nan
-            try:
-                reach_raw = info["Reach"]
-                reach_raw = re.search("\(([^)]+)", reach_raw)
-                if reach_raw:
-                    reach_raw = reach_raw.group(1)
-                else:
-                    raise AssertionError
-                reach = reach_raw.replace("\xa0cm", "").strip()
-            except (KeyError, AssertionError):
-                # reach_raw = info.get("Reach", "does not have reach")
-                # print(f"REACH FINDING FAILED, the reach raw is {reach_raw}")
-                pass
-
-            weight = np.nan
-            try:
-                weight_raw = info["Weight"]
-                # print("weight raw is ", weight_raw)
-                weight_raw = re.search("\(([^)]+)", weight_raw)
-                if weight_raw:
-                    weight_raw = weight_raw.group(1)
+        Args:
+            raw_fighters ([dict]): Raw fighters, from the output of the WikiFightersRaw class.
+            warning_level_threshold: Only retain records with this warning level or lower.
+            workers (int): The number of processes to process the new and changed fighters with.
+            today (datetime, None): The date ages are computed at. If None, today.
+
+        Returns:
+            ([dict, None], dict): The processed data of each raw fighter, in order, or None for raw fighters which are
+                not retained, and the fingerprints to save for the next incremental run.
+        """
+        today = today if today else datetime.today()
+        previous = self.load_fingerprints()
+        settings = (previous.get("warning_level_threshold"), previous.get("version"))
+        if settings != (warning_level_threshold, PROCESSED_VERSION):
+            previous = {}
+        previous_fingerprints = previous.get("fighters", {})
+        previous_data = {}
+        if previous_fingerprints and os.path.exists(self.data_filename):
+            previous_data = self.load()
+        # Ages were computed at the previous run, so they are shifted by the days since
+        days_since = (today - datetime.strptime(previous["date"], "%Y-%m-%d")).days if previous else 0
+
+        fingerprints = {}
+        processed = [None] * len(raw_fighters)
+        changed = []
+        for i, f in enumerate(raw_fighters):
+            fingerprint = self.get_fingerprint(f)
+            fingerprints[f["link"]] = [fingerprint, None]
+            previous_fingerprint, previous_name = previous_fingerprints.get(f["link"], (None, None))
+            if fingerprint != previous_fingerprint:
+                changed.append(i)
+            elif previous_name is not None:
+                if previous_data.get(previous_name, {}).get("link") != f["link"]:
+                    changed.append(i)
                 else:
-                    raise AssertionError
-                weight = weight_raw.split(";")[0].replace("\xa0kg", "").strip()
-                # print("weight formatted is ", weight)
-            except (KeyError, AssertionError):
-                pass
+                    fighter_data = dict(previous_data[previous_name])
+                    fighter_data["age_days"] = fighter_data["age_days"] + days_since
+                    processed[i] = fighter_data
 
-            fighter_data = {
-                "record": record,
-                "link": f["link"],
-                "warning_level": warning_level,
-                "name_raw": full_name,
-                "name": modified_name,
-                "age_days": age_days,
-                "height_m": height,
-                "weight_kg": weight,
-                "reach_cm": reach,
-            }
+        changed_fighters = [raw_fighters[i] for i in changed]
+        recomputed = self.process_fighters_in_parallel(changed_fighters, warning_level_threshold, workers, today)
+        for i, fighter_data in zip(changed, recomputed):
+            processed[i] = fighter_data
 
-            fighters[modified_name] = fighter_data
+        for f, fighter_data in zip(raw_fighters, processed):
+            if fighter_data:
+                fingerprints[f["link"]][1] = fighter_data["name"]
 
-        self.data = fighters
-        return fighters
+        n_removed = len(set(previous_fingerprints) - set(fingerprints))
+        print(
+            f"Reused {len(raw_fighters) - len(changed)}, recomputed {len(changed)}, and removed {n_removed} fighters."
+        )
+        fingerprints = {
+            "date": today.strftime("%Y-%m-%d"),
+            "warning_level_threshold": warning_level_threshold,
+            "version": PROCESSED_VERSION,
+            "fighters": fingerprints,
+        }
+        return processed, fingerprints
+
+    def load_fingerprints(self):
+        """
+        Load the fingerprints of the raw fighters of the last incremental run.
+
+        Returns:
+            (dict): The date of the run, its warning_level_threshold and PROCESSED_VERSION, and the fingerprints of the
+                fighters in {link: [content hash, processed name or None]} format. Empty if there was no incremental
+                run.
+        """
+        filename = self.get_fingerprints_filename()
+        if not os.path.exists(filename):
+            return {}
+        return load_json(filename)
+
+    def get_fingerprints_filename(self):
+        """
+        Get the path the fingerprints of the last incremental run are saved to, next to the data file.
+
+        Returns:
+            (str): The path.
+        """
+        return self.data_filename + ".fingerprints"
+
+    def get_fingerprint(self, raw_fighter):
+        """
+        Get a hash of the content of a raw fighter, which changes if any of its data changes.
+
+        Args:
+            raw_fighter (dict): A raw fighter, from the output of the WikiFightersRaw class.
+
+        Returns:
+            (str): The sha256 hex digest of the raw fighter's json.
+        """
+        return hashlib.sha256(json.dumps(raw_fighter, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get_omission_reason(self, raw_fighter, warning_level_threshold=1):
+        """
+        Determine whether a raw fighter has the data needed to process it, and why not if it doesn't.
+
+        Args:
+            raw_fighter (dict): A raw fighter, from the output of the WikiFightersRaw class.
+            warning_level_threshold: Only retain records with this warning level or lower.
+
+        Returns:
+            (str, None): The reason the fighter is omitted, or None if it should be processed.
+        """
+        if raw_fighter["warning_level"] > warning_level_threshold:
+            return f"warning level is > {warning_level_threshold}"
+
+        info = raw_fighter["info"]
+        if not info:
+            return "it doesn't have info"
+
+        if not raw_fighter["record"]:
+            return "no record was found"
+
+        if not info.get("Full name"):
+            return "it doesn't have a full name"
+        return None
+
+    def to_tables(self):
+        """
+        Flatten the processed fighters into a "fighters" table and a "records" table with one row per fight.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        fighters = []
+        records = []
+        for name, fighter in self.data.items():
+            fighters.append({k: v for k, v in fighter.items() if k != "record"})
+            for fight in fighter["record"]:
+                records.append({"name": name, **fight})
+        return {"fighters": records_to_columns(fighters), "records": records_to_columns(records)}
 
     ################################################################################################################
     # Auxiliary methods
     ################################################################################################################
 
+    def get_measurement(self, text, regex, units):
+        """
+        Extract a metric measurement from the text of an infobox field, e.g., 1.8 from "5\xa0ft 11\xa0in (180\xa0cm)"
+        for a height in metres.
+
+        Args:
+            text (str, None): The field text.
+            regex (re.Pattern): The regex matching the value and unit, e.g., HEIGHT_REGEX.
+            units (dict): The factor converting each unit the regex matches to the measurement's unit.
+
+        Returns:
+            (float): The measurement, NaN if there is no text or it could not be parsed.
+        """
+        match = regex.search(text) if isinstance(text, str) else None
+        if not match:
+            return float("nan")
+        try:
+            return float(match.group(1)) * units[match.group(2)]
+        except ValueError:
+            return float("nan")
+
+    def get_birthday(self, formatted_birthday):
+        """
+        Parse a formatted infobox birthday.
+
+        Args:
+            formatted_birthday (str, None): The birthday, in YYYY-MM-DD format.
+
+        Returns:
+            (datetime.date, None): The birthday, None if it is missing or invalid.
+        """
+        try:
+            return date.fromisoformat(formatted_birthday)
+        except (TypeError, ValueError):
+            return None
+
     def canonicalize_name(self, full_name):
         """
-        Turn a name containing foreign characters into a name containing all ASCII chars.
+        Turn a name containing foreign characters into a name containing all ASCII chars. See
+        mmai.data.names.canonicalize_name.
 
         Accented characters are turned into their ASCII equivalents.
 
@@ -167,24 +393,7 @@ class WikiFightersProcessed(DataBase):
         Returns:
             modified_name (str): The ASCII-compatible name.
         """
-        allowed_letters = ascii_letters + " -`'"
-        if all([letter in allowed_letters for letter in full_name]):
-            return full_name
-        else:
-            modified_name = ""
-            warnings.warn(f"Processing full name {full_name} with non-allowed letters.")
-            normalized_name = "".join(
-                c
-                for c in unicodedata.normalize("NFD", full_name)
-                if unicodedata.category(c) != "Mn"
-            )
-            for letter in normalized_name:
-                if letter in allowed_letters:
-                    modified_name += letter
-                else:
-                    pass
-            modified_name = " ".join(modified_name.split(" "))  # getting rid of multiple whitespace
-            return modified_name.strip()
+        return canonicalize_name(full_name)
 
 
 class WikiFightersRaw(DataBase):
@@ -198,29 +407,153 @@ class WikiFightersRaw(DataBase):
         data_filename (str): A string of the full path where this class's output is saved.
     """
 
-    def __init__(self):
+    def __init__(self, max_per_host=8, cache=None, session=None, parser=None):
+        """
+        Args:
+            max_per_host (int): The maximum number of concurrent requests to wikipedia when scraping with workers.
+            cache (mmai.data.cache.ResponseCache, None): An on-disk cache to fetch pages through. If None, every page
+                is downloaded.
+            session (requests.Session, None): The session to fetch pages with. If None, a new one is made.
+            parser (str, None): The BeautifulSoup tree builder to parse pages with. If None, uses lxml if it is
+                installed and html.parser otherwise.
+        """
+        super().__init__(max_per_host=max_per_host, cache=cache, session=session, parser=parser)
         self.data = None
         self.data_filename = os.path.join(THIS_DIR, "static/wiki_fighters_raw.json")
 
-    def scrape(self, report=True):
+    def scrape(self, report=True, workers=1, resume=False, processes=0):
         """
         Scrape wikipedia for all relevant fighter data.
 
+        Each fighter is appended to a journal next to data_filename as soon as it is scraped, so a crashed scrape can
+        be picked up again with resume=True.
+
         Args:
             report (bool): If True, saves a report of the good, bad, and ugly parsings based on warning level.
+            workers (int): The number of threads fetching fighter pages concurrently. Requests to a single host are
+                additionally limited by max_per_host. The fighters are returned in link order regardless of the
+                number of workers.
+            resume (bool): If True, skips links already in the journal from a previous scrape and reuses their data.
+                If False, the journal is started over.
+            processes (int): The number of processes parsing the fetched pages. If 0, pages are parsed in the fetching
+                threads.
 
         Returns:
         """
         links = self.get_fighter_links()
+
+        journal = self.get_journal()
+        if resume:
+            done = journal.read()
+            print(f"Resuming scrape with {len(done)} fighters already in the journal.")
+        else:
+            journal.clear()
+            done = {}
+        remaining = [link for link in links if str(link) not in done]
+
+        if processes:
+            parse = ScraperMethod(
+                WikiFightersRaw,
+                "get_fighter_record_and_info_from_html",
+                scraper_kwargs={"parser": self.parser},
+                quiet=True,
+                silent=False,
+            )
+        else:
+            parse = partial(self.get_fighter_record_and_info_from_html, quiet=True, silent=False)
+        results = ordered_pipeline(
+            remaining, self.fetch_fighter_page, parse, io_workers=workers, cpu_workers=processes
+        )
+
+        return self.collect_fighters(links, results, done=done, journal=journal, report=report)
+
+    def scrape_from_dump(self, dump_path, links=None, report=True, processes=0):
+        """
+        Get all relevant fighter data from a local wikipedia html dump instead of from en.wikipedia.org.
+
+        The dump is streamed, so only the pages of the fighters in links are parsed and memory stays bounded by the
+        size of the output. The output is in the same format (and order) as scrape. See mmai.data.dump.iter_html_dump
+        for the supported dump formats; the MediaWiki xml dumps contain wikitext rather than html, so they can't be
+        used.
+
+        Args:
+            dump_path (str): The path to the dump.
+            links ([BeautifulSoup text]): The fighter links to get, as from get_fighter_links. If None, the links are
+                fetched with get_fighter_links.
+            report (bool): If True, saves a report of the good, bad, and ugly parsings based on warning level.
+            processes (int): The number of processes parsing the pages from the dump. If 0, pages are parsed in this
+                process.
+
+        Returns:
+            ([dict]): The fighters, as from scrape. Fighters whose pages are not in the dump have no record or info.
+        """
+        if links is None:
+            links = self.get_fighter_links()
+
+        title_links = {}
+        for link in links:
+            title_links.setdefault(self.get_title_from_relative_link(link), []).append(str(link))
+
+        if processes:
+            parse = ScraperMethod(
+                WikiFightersRaw,
+                "get_fighter_record_and_info_from_html",
+                scraper_kwargs={"parser": self.parser},
+                quiet=True,
+                silent=False,
+            )
+        else:
+            parse = partial(self.get_fighter_record_and_info_from_html, quiet=True, silent=False)
+
+        pages, page_titles = itertools.tee(iter_html_dump(dump_path, titles=set(title_links.keys())))
+        parsed = ordered_pipeline(
+            pages, lambda page: (page[1], page[0]), parse, io_workers=1, cpu_workers=processes
+        )
+        page_fighters = {}
+        for (title, _), fighter_data in tqdm.tqdm(zip(page_titles, parsed)):
+            page_fighters[title] = fighter_data
+
+        print(f"Found {len(page_fighters)}/{len(title_links)} fighter pages in {dump_path}.")
+
+        def get_results():
+            for link in links:
+                title = self.get_title_from_relative_link(link)
+                if title in page_fighters:
+                    yield dict(page_fighters[title])
+                else:
+                    yield self.get_fighter_record_and_info_from_html(b"", str(link), quiet=True, silent=True)
+
+        return self.collect_fighters(links, get_results(), report=report)
+
+    def collect_fighters(self, links, results, done=None, journal=None, report=True):
+        """
+        Collect the scraped data for each fighter link, summarizing how well each was parsed.
+
+        Args:
+            links ([BeautifulSoup text]): The fighter links.
+            results (iterator): The fighter data dicts for each link not in done, in link order.
+            done (dict): Fighter data already scraped in a previous run, in {str(link): data} format.
+            journal (mmai.data.journal.Journal, None): If given, each newly scraped fighter is appended to it.
+            report (bool): If True, saves a report of the good, bad, and ugly parsings based on warning level.
+
+        Returns:
+            ([dict]): The fighters, in link order.
+        """
+        done = done or {}
         good = []
         bad = []
         ugly = []
         fighters = []
 
         for link in tqdm.tqdm(links):
-            fighter_data = self.get_fighter_record_and_info_from_relative_link(
-                link, quiet=True, silent=False
-            )
+            if str(link) in done:
+                fighter_data = done[str(link)]
+            else:
+                fighter_data = next(results)
+                fighter_data["link"] = str(link)
+                fighter_data["title"] = link.text
+                if journal:
+                    journal.append(str(link), fighter_data)
 
             w = fighter_data["warning_level"]
             if w == 0:
@@ -232,9 +565,6 @@ class WikiFightersRaw(DataBase):
             else:
                 raise ValueError("Warning value not [0-2]!")
 
-            fighter_data["link"] = str(link)
-            fighter_data["title"] = link.text
-
             # pprint.pprint(fighter_data)
             fighters.append(fighter_data)
 
@@ -259,6 +589,28 @@ class WikiFightersRaw(DataBase):
         self.data = fighters
         return fighters
 
+    def to_tables(self):
+        """
+        Flatten the raw fighters into a "fighters" table (with the infobox fields as columns) and a "records" table
+        with one row per fight. Records and infos which weren't condensed to one are left out.
+
+        Returns:
+            (dict): The tables in {table name: {column name: [values]}} format.
+        """
+        fighters = []
+        records = []
+        for f in self.data:
+            fighter = {"link": f["link"], "title": f["title"], "warning_level": f["warning_level"]}
+            if isinstance(f["info"], dict):
+                fighter.update(f["info"])
+            fighters.append(fighter)
+
+            record = f["record"]
+            if record and isinstance(record[0], dict):
+                for fight in record:
+                    records.append({"link": f["link"], **fight})
+        return {"fighters": records_to_columns(fighters), "records": records_to_columns(records)}
+
     ################################################################################################################
     # Auxiliary methods
     ################################################################################################################
@@ -278,9 +630,9 @@ class WikiFightersRaw(DataBase):
             a list of links: either fighters as determined by screning or a list of garbage links
 
         """
-        r = requests.get(src)
+        r = self.fetch(src)
         fighter_hmtl = r.content
-        soup = BeautifulSoup(fighter_hmtl, features="html.parser")
+        soup = self.make_soup(fighter_hmtl)
         fighters = []
         garbage = []
         for link in soup.find_all("a"):
@@ -294,8 +646,22 @@ class WikiFightersRaw(DataBase):
         else:
             return fighters
 
+    def fetch_fighter_page(self, relative_link):
+        """
+        Fetch the html of a fighter's wikipedia page, ready for get_fighter_record_and_info_from_html.
+
+        Args:
+            relative_link: A BeautifulSoup text object determined to contain a relative link, e.g., containing
+                href="/wiki/Some_Fighter" or a (str) relative link, e.g., "/wiki/Some_Fighter"
+
+        Returns:
+            (bytes, str): The raw html page content and the relative link as a string.
+        """
+        request = self.get_page_content_by_wiki_relative_link(relative_link)
+        return request.content, str(relative_link)
+
     def get_fighter_record_and_info_from_relative_link(
-            self, relative_link, condense=True, quiet=True, silent=False
+            self, relative_link, condense=True, quiet=True, silent=False, exhaustive=False
     ):
         """
         Get a fighter's record and info from a relative wikipedia link.
@@ -307,6 +673,38 @@ class WikiFightersRaw(DataBase):
             quiet (bool): If False, prints when parsing either record or info fails any table!
             silent (bool): If False, warns when either multiple records or infos are found, or if no record or no info is
                 found.
+            exhaustive (bool): If True, parses every table on the page, even once the outcome can't change anymore.
+                The output is the same either way.
+
+        Returns:
+            (dict): See get_fighter_record_and_info_from_html.
+        """
+        content, _ = self.fetch_fighter_page(relative_link)
+        return self.get_fighter_record_and_info_from_html(
+            content, relative_link, condense=condense, quiet=quiet, silent=silent, exhaustive=exhaustive
+        )
+
+    def get_fighter_record_and_info_from_html(
+            self, content, relative_link, condense=True, quiet=True, silent=False, exhaustive=False
+    ):
+        """
+        Get a fighter's record and info from the html of their wikipedia page.
+
+        Each table on the page is classified once, from its class attribute (the infobox) or its header cells (the
+        record). Only the first infobox is parsed, so pages with several infoboxes are not warned about. Every record
+        table is checked though, so pages with several different records (e.g., amateur, kickboxing, and professional)
+        still get a warning. The remaining tables are only skipped once the infobox has been found and two records
+        that can't be condensed have been, since further tables can't change the output then.
+
+        Args:
+            content (bytes, str): The raw html page content.
+            relative_link: The relative link of the page, used in warnings.
+            condense (bool): Checks to see if multiple info/records are identical and if they all are, returns one.
+            quiet (bool): If False, prints when parsing either record or info fails any table!
+            silent (bool): If False, warns when either multiple records or infos are found, or if no record or no info is
+                found.
+            exhaustive (bool): If True, parses every table on the page, even once the outcome can't change anymore.
+                The output is the same either way.
 
         Returns:
             (dict): Contains "record" and "info" fields. If all the parsing went well, each field's value should be a dict.
@@ -315,23 +713,27 @@ class WikiFightersRaw(DataBase):
                 both record and info were likely messed up.
 
         """
-        request = self.get_page_content_by_wiki_relative_link(relative_link)
-        soup = BeautifulSoup(request.content, features="html.parser")
+        soup = self.make_soup(content, only_tables=True)
         fighter_data = {"record": None, "info": None}
         warning_level = 0
 
         records = []
         infos = []
-        for t, table in enumerate(soup.find_all("table")):
+        for table in soup.find_all("table"):
             try:
-                record = self.get_record_from_table(table, quiet=quiet)
-                info = self.get_fighter_info_from_table(soup, quiet=quiet)
+                if not infos and self.is_fighter_bio(table):
+                    info = self.get_fighter_info_from_table(table, quiet=quiet)
+                    if info:
+                        infos.append(info)
+                elif self.is_fighter_record(table):
+                    record = self.get_record_from_table(table, quiet=quiet)
+                    if record:
+                        records.append(record)
             except AttributeError:
                 break
-            if record:
-                records.append(record)
-            if info:
-                infos.append(info)
+
+            if infos and len(records) > 1 and (not condense or records[-1] != records[0]) and not exhaustive:
+                break
 
         if len(records) == 1:
             fighter_data["record"] = records[0]
@@ -474,7 +876,7 @@ class WikiFightersRaw(DataBase):
             table_body = None
             for tb in table.find_all("tbody"):
                 # Make sure it is the right tbody from all of the possible tables!
-                if 'class="fn"' in str(tb):
+                if tb.find(class_="fn"):
                     table_body = tb
             if not table_body:
                 if not quiet:
@@ -517,7 +919,8 @@ class WikiFightersRaw(DataBase):
 
             rows = table_body.find_all("tr")
             for row in rows:
-                if any([r in row.text for r in row_keys]):
+                row_text = row.text
+                if any([r in row_text for r in row_keys]):
                     header = row.find("th").text.strip()
                     value = row.find("td").text.strip()
                     info[header] = value
@@ -542,11 +945,28 @@ class WikiFightersRaw(DataBase):
             The raw html page content.
         """
         try:
-            r = requests.get(base_link + relative_link.get("href"))
+            r = self.fetch(base_link + relative_link.get("href"))
         except AttributeError:
-            r = requests.get(base_link + relative_link)
+            r = self.fetch(base_link + relative_link)
         return r
 
+    def get_title_from_relative_link(self, relative_link):
+        """
+        Get the title of a wikipedia page from its relative link, e.g., "/wiki/Jos%C3%A9_Aldo" -> "José Aldo".
+
+        Args:
+            relative_link: A BeautifulSoup text object determined to contain a relative link, e.g., containing
+                href="/wiki/Some_Fighter" or a (str) relative link, e.g., "/wiki/Some_Fighter"
+
+        Returns:
+            (str): The page title.
+        """
+        try:
+            href = relative_link.get("href")
+        except AttributeError:
+            href = relative_link
+        return unquote(href.split("#")[0].replace("/wiki/", "", 1)).replace("_", " ")
+
     def is_fighter(self, link):
         """
         Determine whether a link from a wikipedia table represents a fighter or is just garbage.
@@ -608,7 +1028,7 @@ class WikiFightersRaw(DataBase):
 
     def is_fighter_record(self, table):
         """
-        Determine if a table is a fighter's bio.
+        Determine if a table is a fighter's record, from the header cells of its first row.
 
         Args:
             table: Beautiful soup text from html table.
@@ -617,14 +1037,17 @@ class WikiFightersRaw(DataBase):
             (bool): true, if the table is a fighter record
 
         """
-        if "Location" not in str(table):
+        header_row = table.find("tr")
+        if not header_row:
             return False
-        else:
-            return True
+        for header in header_row.find_all("th", recursive=False):
+            if "Location" in header.text:
+                return True
+        return False
 
     def is_fighter_bio(self, table):
         """
-        Determine if a table is a fighter's bio.
+        Determine if a table is a fighter's bio, from its class attribute.
 
         Args:
             table: Beautiful soup text from html table.
@@ -633,10 +1056,8 @@ class WikiFightersRaw(DataBase):
             (bool): true, if the table is a fighter bio
 
         """
-        if 'class="infobox vcard"' in str(table):
-            return True
-        else:
-            return False
+        classes = table.get("class") or []
+        return "infobox" in classes and "vcard" in classes
 
 
 if __name__ == "__main__":
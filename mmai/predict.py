@@ -0,0 +1,176 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from mmai.data.base import DataBase, THIS_DIR
+from mmai.data.bout_utils import to_dates
+from mmai.data.bouts import BoutTable, LOSS, WIN
+from mmai.data.features import FeatureStore
+from mmai.data.ratings import RatingEngine
+
+
+# The point-in-time values of each fighter the model compares, the first from the rating engine and the rest from the
+# feature store
+MODEL_COLUMNS = ["rating", "fights", "wins", "losses", "win_streak", "loss_streak", "finish_rate", "days_since_last",
+                 "age_days"]
+
+
+class MatchupScorer(DataBase):
+    """
+    Scores matchups in batches: the probability of fighter a beating fighter b on a date.
+
+    The model is a logistic regression on the differences between the two fighters' point-in-time ratings and
+    features, without an intercept, so that scoring (a, b) and (b, a) always gives probabilities summing to 1. The
+    features of a whole batch are assembled at once, with one point-in-time lookup per source, rather than fight by
+    fight.
+
+    Attrs:
+        data (dict): The model in {"columns": [str], "scales": [float], "coefficients": [float]} format. Differences
+            are divided by their scales before being weighted by the coefficients.
+        data_filename (str): A string of the full path where this class's output is saved.
+        bout_table (mmai.data.bouts.BoutTable): The bout table fighters are looked up in.
+        feature_store (mmai.data.features.FeatureStore): The point-in-time features.
+        rating_engine (mmai.data.ratings.RatingEngine): The point-in-time ratings.
+    """
+
+    def __init__(self, bout_table=None, feature_store=None, rating_engine=None):
+        super().__init__()
+        self.data = None
+        self.data_filename = os.path.join(THIS_DIR, "static/matchup_model.json")
+        self.bout_table = bout_table
+        self.feature_store = feature_store
+        self.rating_engine = rating_engine
+
+    def load_all(self):
+        """
+        Load the bout table, feature store, rating engine, and model from their static files.
+
+        Returns:
+            (dict): The model.
+        """
+        self.bout_table = BoutTable()
+        self.bout_table.load()
+        self.feature_store = FeatureStore()
+        self.feature_store.load()
+        self.rating_engine = RatingEngine()
+        self.rating_engine.load()
+        return self.load()
+
+    def fit(self, l2=1.0, max_iterations=50):
+        """
+        Fit the model on every bout with a win or loss, from each bout's point-in-time features going into it.
+
+        Args:
+            l2 (float): The strength of the L2 penalty on the coefficients.
+            max_iterations (int): The most Newton iterations to run.
+
+        Returns:
+            (dict): The model, also set as the data attr.
+        """
+        features = self.feature_store.data["features"]
+        ratings = self.rating_engine.data["ratings"]
+        if not (np.array_equal(features["bout"], ratings["bout"]) and
+                np.array_equal(features["fighter"], ratings["fighter"])):
+            raise ValueError("The feature store and rating engine must be built from the same bout table.")
+
+        # Rows come in pairs, fighter_1's then fighter_2's
+        decided = np.isin(features["result"][::2], (WIN, LOSS))
+        values = {c: ratings["rating_before"] if c == "rating" else features[c] for c in MODEL_COLUMNS}
+        x = np.stack([values[c][::2][decided].astype(np.float64) - values[c][1::2][decided] for c in MODEL_COLUMNS],
+                     axis=1)
+        y = (features["result"][::2][decided] == WIN).astype(np.float64)
+
+        scales = pd.DataFrame(x).std(ddof=0).to_numpy()
+        scales = np.where(np.isnan(scales) | (scales == 0), 1, scales)
+        x = np.nan_to_num(x / scales)
+        coefficients = np.zeros(len(MODEL_COLUMNS))
+        for _ in range(max_iterations):
+            p = 1 / (1 + np.exp(-x @ coefficients))
+            hessian = x.T @ (x * (p * (1 - p))[:, None]) + l2 * np.eye(len(MODEL_COLUMNS))
+            step = np.linalg.solve(hessian, x.T @ (y - p) - l2 * coefficients)
+            coefficients += step
+            if np.abs(step).max() < 1e-8:
+                break
+
+        p = np.clip(1 / (1 + np.exp(-x @ coefficients)), 1e-9, 1 - 1e-9)
+        log_loss = -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+        self.data = {"columns": MODEL_COLUMNS, "scales": scales.tolist(), "coefficients": coefficients.tolist()}
+        print(f"Fit the matchup model on {len(y)} bouts, with a log loss of {log_loss:.4f}.")
+        return self.data
+
+    def predict(self, fighters_a, fighters_b, dates=None):
+        """
+        Get the probabilities of fighters beating their opponents, for a whole batch of matchups at once.
+
+        Args:
+            fighters_a (list, np.ndarray): The fighters, as names or ids in the bout table.
+            fighters_b (list, np.ndarray): Their opponents, as names or ids in the bout table.
+            dates (list, np.ndarray, str, None): The dates of the matchups (datetime64, or anything pd.to_datetime
+                takes), or a single date for all of them. If None (or for missing dates), today.
+
+        Returns:
+            (np.ndarray): The float32 probability of each fighter_a beating fighter_b, NaN if either fighter is not
+                in the bout table.
+        """
+        ids_a = self.get_fighter_ids(fighters_a)
+        ids_b = self.get_fighter_ids(fighters_b)
+        if dates is None or isinstance(dates, str):
+            date = pd.Timestamp(dates) if dates else pd.Timestamp.today()
+            dates = np.full(len(ids_a), date.to_datetime64(), dtype="datetime64[D]")
+        else:
+            dates = to_dates(dates)
+            dates = np.where(np.isnat(dates), np.datetime64(pd.Timestamp.today().date(), "D"), dates)
+
+        known = (ids_a >= 0) & (ids_b >= 0)
+        x = self.get_matchup_features(np.where(known, ids_a, 0), np.where(known, ids_b, 0), dates)
+        x = np.nan_to_num(x / np.array(self.data["scales"]))
+        probabilities = 1 / (1 + np.exp(-x @ np.array(self.data["coefficients"])))
+        return np.where(known, probabilities, np.nan).astype(np.float32)
+
+    ################################################################################################################
+    # Auxiliary methods
+    ################################################################################################################
+
+    def get_fighter_ids(self, fighters):
+        """
+        Get the ids of fighters given by name or id.
+
+        Args:
+            fighters (list, np.ndarray): The fighter names or ids.
+
+        Returns:
+            (np.ndarray): The int64 ids, -1 for fighters not in the bout table.
+        """
+        n_fighters = len(self.bout_table.data["fighters"]["name"])
+        if isinstance(fighters, np.ndarray) and np.issubdtype(fighters.dtype, np.integer):
+            return np.where((fighters >= 0) & (fighters < n_fighters), fighters, -1).astype(np.int64)
+        fighters = np.asarray(fighters, dtype=object)
+        ids = np.full(len(fighters), -1, dtype=np.int64)
+        for i, fighter in enumerate(fighters):
+            if isinstance(fighter, (int, np.integer)):
+                ids[i] = fighter if 0 <= fighter < n_fighters else -1
+            elif isinstance(fighter, str):
+                fighter_id = self.bout_table.get_fighter_id(fighter)
+                ids[i] = -1 if fighter_id is None else fighter_id
+        return ids
+
+    def get_matchup_features(self, ids_a, ids_b, dates):
+        """
+        Get the differences between the point-in-time MODEL_COLUMNS of fighters and their opponents, looking up both
+        sides of every matchup at once.
+
+        Args:
+            ids_a (np.ndarray): The fighter ids.
+            ids_b (np.ndarray): The opponent ids.
+            dates (np.ndarray): The datetime64[D] dates of the matchups.
+
+        Returns:
+            (np.ndarray): The float64 differences, one row per matchup and one column per MODEL_COLUMNS.
+        """
+        n = len(ids_a)
+        ids = np.concatenate([ids_a, ids_b])
+        both_dates = np.concatenate([dates, dates])
+        values = self.feature_store.get_state(ids, both_dates)
+        values["rating"] = self.rating_engine.get_ratings(ids, both_dates)["rating"]
+        return np.stack([values[c][:n].astype(np.float64) - values[c][n:] for c in MODEL_COLUMNS], axis=1)
@@ -0,0 +1,102 @@
+"""
+A local HTTP service for matchup predictions, which keeps the model, features, ratings, and fighter index in memory.
+
+Endpoints:
+    GET /health: {"status": "ok", "fighters": number of fighters}
+    POST /predict: Either a single matchup, {"fighter_a": str, "fighter_b": str, "date": "YYYY-MM-DD"}, answered with
+        {"probability": float or null}, or a batch, {"fights": [matchups]}, answered with {"probabilities": [...]}.
+        Fighters are names or ids in the bout table, the date is optional (today by default), and the probability is
+        null if either fighter is unknown.
+
+Usage:
+    python -m mmai.serve [port]
+"""
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from mmai.predict import MatchupScorer
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of a prediction server, scoring every request (single or batch) with one batch call.
+
+    Attrs:
+        scorer (mmai.predict.MatchupScorer): The loaded scorer, shared by all requests.
+    """
+
+    scorer = None
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self.send_json(200, {"status": "ok", "fighters": len(self.scorer.bout_table.data["fighters"]["name"])})
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/predict":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            single = "fights" not in body
+            fights = [body] if single else body["fights"]
+            probabilities = self.scorer.predict(
+                [f["fighter_a"] for f in fights], [f["fighter_b"] for f in fights], [f.get("date") for f in fights]
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_json(400, {"error": f"Bad request: {e!r}"})
+            return
+        probabilities = [None if np.isnan(p) else round(float(p), 6) for p in probabilities]
+        self.send_json(200, {"probability": probabilities[0]} if single else {"probabilities": probabilities})
+
+    def send_json(self, status, obj):
+        """
+        Send a json response.
+
+        Args:
+            status (int): The HTTP status code.
+            obj (dict): The response body.
+
+        Returns:
+            None
+        """
+        content = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Logging every request would dominate the latency of small requests
+        pass
+
+
+def make_server(scorer, host="127.0.0.1", port=8000):
+    """
+    Make a threaded prediction server around a loaded scorer.
+
+    Args:
+        scorer (mmai.predict.MatchupScorer): The scorer, with its bout table, feature store, rating engine, and model
+            loaded.
+        host (str): The host to bind to. Only localhost by default.
+        port (int): The port to bind to, 0 for any free port.
+
+    Returns:
+        (ThreadingHTTPServer): The server, ready to serve_forever.
+    """
+    handler = type("BoundPredictionHandler", (PredictionHandler,), {"scorer": scorer})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    scorer = MatchupScorer()
+    scorer.load_all()
+    server = make_server(scorer, port=port)
+    print(f"Serving predictions on http://127.0.0.1:{port}")
+    server.serve_forever()
@@ -1,4 +1,18 @@
+import gzip
+import hashlib
+import io
 import json
+import os
+import tempfile
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSION_EXTENSIONS = (".gz", ".zst")
 
 
 def load_json(datapath):
@@ -6,12 +20,190 @@ def load_json(datapath):
     Load the raw fighter data from wikipedia.
 
     Args:
-        datapath (str): The path to find the wiki_fighters_raw.json file at.
+        datapath (str): The path to find the wiki_fighters_raw.json file at. If it ends in .gz or .zst, it is
+            decompressed while reading.
 
     Returns:
         [dict]: A list of fighter dicts from wikipedia data.
     """
 
-    with open(datapath, "r") as f:
-        loaded = json.load(f)
+    with open_compressed(datapath, "rb") as f:
+        loaded = json.load(io.TextIOWrapper(f, encoding="utf-8"))
     return loaded
+
+
+def dump_json(obj, datapath, chunk_size=1 << 20):
+    """
+    Stream an object to a json file atomically, compressing it if the path ends in .gz or .zst.
+
+    The json is written to a temporary file next to datapath, which replaces datapath only once it is complete and
+    flushed to disk, so a crash mid-write leaves any previous file intact. Compression is deterministic (no timestamps)
+    so the same data always gives the same bytes.
+
+    Args:
+        obj: The json-serializable object.
+        datapath (str): The path to write to.
+        chunk_size (int): The number of bytes of encoded json buffered before each write.
+
+    Returns:
+        (str, int): The sha256 hex digest and size in bytes of the uncompressed json.
+    """
+    directory = os.path.dirname(os.path.abspath(datapath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(datapath))
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with compressed_writer(raw, datapath) as f:
+                buffer = []
+                buffered = 0
+                for chunk in iter_json_chunks(obj):
+                    chunk = chunk.encode("utf-8")
+                    buffer.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= chunk_size:
+                        block = b"".join(buffer)
+                        digest.update(block)
+                        f.write(block)
+                        size += buffered
+                        buffer = []
+                        buffered = 0
+                block = b"".join(buffer)
+                digest.update(block)
+                f.write(block)
+                size += buffered
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, datapath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), size
+
+
+def iter_json_chunks(obj):
+    """
+    Encode an object to json in chunks, one per item of a top level dict or list, each encoded by the C encoder.
+
+    The chunks join to exactly the output of json.dumps(obj), without holding all of it in memory at once.
+
+    Args:
+        obj: The json-serializable object.
+
+    Yields:
+        (str): The chunks of json.
+    """
+    if isinstance(obj, dict):
+        yield "{"
+        for i, (k, v) in enumerate(obj.items()):
+            yield ("" if i == 0 else ", ") + json.dumps({k: v})[1:-1]
+        yield "}"
+    elif isinstance(obj, list):
+        yield "["
+        for i, v in enumerate(obj):
+            yield ("" if i == 0 else ", ") + json.dumps(v)
+        yield "]"
+    else:
+        yield json.dumps(obj)
+
+
+def open_compressed(datapath, mode="rb"):
+    """
+    Open a file for binary reading, decompressing it if the path ends in .gz or .zst.
+
+    Args:
+        datapath (str): The path of the file.
+        mode (str): Only "rb" is supported.
+
+    Returns:
+        A binary file object.
+    """
+    if mode != "rb":
+        raise ValueError(f"Mode {mode} is not supported, use dump_json for writing.")
+    if datapath.endswith(".gz"):
+        return gzip.open(datapath, "rb")
+    elif datapath.endswith(".zst"):
+        _check_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(datapath, "rb"), closefd=True)
+    else:
+        return open(datapath, "rb")
+
+
+def compressed_writer(raw, datapath):
+    """
+    Wrap a binary file object for writing, compressing what is written if the path ends in .gz or .zst. Closing the
+    wrapper finishes the compressed stream but leaves raw open.
+
+    Args:
+        raw: The binary file object to write to.
+        datapath (str): The path, used only to pick the compression.
+
+    Returns:
+        A binary file object.
+    """
+    if datapath.endswith(".gz"):
+        return gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+    elif datapath.endswith(".zst"):
+        _check_zstandard()
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    else:
+        return _UnclosedWriter(raw)
+
+
+def strip_compression_extension(datapath):
+    """
+    Remove a .gz or .zst compression extension from a path, e.g., "fighters.json.gz" -> "fighters.json".
+
+    Args:
+        datapath (str): The path.
+
+    Returns:
+        (str): The path without the compression extension.
+    """
+    for ext in COMPRESSION_EXTENSIONS:
+        if datapath.endswith(ext):
+            return datapath[:-len(ext)]
+    return datapath
+
+
+def _check_zstandard():
+    if zstandard is None:
+        raise ImportError("Reading and writing .zst files requires zstandard, install it with pip install zstandard.")
+
+
+class _UnclosedWriter(io.RawIOBase):
+    # Passes writes through to a file object without closing it, like the compressing writers
+    def __init__(self, raw):
+        self.raw = raw
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self.raw.write(b)
+
+
+WIKI_DATE_FORMATS = ["%B %d, %Y", "%d %B %Y", "%b %d, %Y", "%d %b %Y", "%Y-%m-%d", "%B %Y"]
+
+
+def parse_wiki_date(date_raw):
+    """
+    Parse a date as written in wikipedia fight records, e.g., "July 13, 2019" or "13 July 2019".
+
+    Args:
+        date_raw (str): The date text.
+
+    Returns:
+        (datetime, None): The date, or None if it could not be parsed.
+    """
+    if not isinstance(date_raw, str):
+        return None
+    date_raw = " ".join(date_raw.split()).split("[")[0].strip()
+    for fmt in WIKI_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_raw, fmt)
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,8 @@
+from mmai.data.index import FighterNameIndex
+
+
+def test_storage_only_subclasses_make_no_session():
+    index = FighterNameIndex()
+    index.add("Jon Jones", "/fighters/Jon-Jones-819")
+    assert index._session is None
+    assert index.session is index.session
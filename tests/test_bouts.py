@@ -0,0 +1,76 @@
+import numpy as np
+
+from mmai.data.bouts import BoutTable, LOSS, WIN
+
+
+def fight(result, opponent, date=None, event=None):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Event": event, "Round": "1", "Time": "1:00"}
+
+
+def fighter(link, *record):
+    return {"link": link, "record": list(record)}
+
+
+def build(processed_data):
+    bout_table = BoutTable()
+    bout_table.build(processed_data)
+    return bout_table
+
+
+def test_bouts_listed_on_both_pages_are_kept_once():
+    bout_table = build({
+        "Jon Jones": fighter(
+            "/wiki/Jon_Jones",
+            fight("Win", "Daniel Cormier", "January 3, 2015", "UFC 182"),
+            fight("Win", "Glover Teixeira", "April 26, 2014", "UFC 172"),
+        ),
+        "Daniel Cormier": fighter("/wiki/Daniel_Cormier", fight("Loss", "Jon Jones", "January 3, 2015", "UFC 182")),
+    })
+    bouts = bout_table.data["bouts"]
+    assert bout_table.data["fighters"]["name"] == ["Jon Jones", "Daniel Cormier", "Glover Teixeira"]
+    assert len(bouts["fighter_1"]) == 2
+    assert bouts["fighter_1"].tolist() == [0, 0] and bouts["fighter_2"].tolist() == [1, 2]
+    assert bouts["result"].tolist() == [WIN, WIN]
+    assert bouts["date"][0] == np.datetime64("2015-01-03")
+
+
+def test_orientation_flips_results():
+    # Daniel Cormier's page comes first, but Jon Jones gets the lower id from his own page being listed first
+    bout_table = build({
+        "Jon Jones": fighter("/wiki/Jon_Jones"),
+        "Daniel Cormier": fighter("/wiki/Daniel_Cormier", fight("Loss", "Jon Jones", "January 3, 2015", "UFC 182")),
+    })
+    bouts = bout_table.data["bouts"]
+    assert (bouts["fighter_1"][0], bouts["fighter_2"][0], bouts["result"][0]) == (0, 1, WIN)
+    assert bout_table.get_fighter_id("jon jones") == 0
+
+
+def test_undated_bouts_are_told_apart_by_event():
+    bout_table = build({
+        "Jon Jones": fighter(
+            "/wiki/Jon_Jones",
+            fight("Win", "Daniel Cormier", None, "UFC 182"),
+            fight("Loss", "Daniel Cormier", None, "UFC 214"),
+            # Neither a date nor an event, which must not be taken for the bout on 1970-01-01 (date 0)
+            fight("Win", "Daniel Cormier", None, None),
+            fight("Win", "Daniel Cormier", "January 1, 1970", "UFC 182"),
+        ),
+        "Daniel Cormier": fighter("/wiki/Daniel_Cormier", fight("Win", "Jon Jones", None, "UFC 214")),
+    })
+    bouts = bout_table.data["bouts"]
+    assert bouts["result"].tolist() == [WIN, LOSS, WIN, WIN]
+    assert np.isnat(bouts["date"][:3]).all()
+
+
+def test_bouts_without_an_opponent_are_dropped():
+    bout_table = build({
+        "Jon Jones": fighter(
+            "/wiki/Jon_Jones",
+            fight("Win", "Daniel Cormier", "January 3, 2015", "UFC 182"),
+            fight("Win", "", "April 26, 2014", "UFC 172"),
+            fight("Win", None, "April 23, 2016", "UFC 197"),
+        ),
+    })
+    bouts = bout_table.data["bouts"]
+    assert bouts["fighter_1"].tolist() == [0] and bouts["fighter_2"].tolist() == [1]
+    assert bout_table.data["fighters"]["name"] == ["Jon Jones", "Daniel Cormier"]
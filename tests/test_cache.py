@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from mmai.data.cache import CacheMissError, ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class FakeServer:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, headers=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        content, etag = self.pages[url]
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, content, {"ETag": etag, "Last-Modified": "Sat, 03 Jan 2015 00:00:00 GMT"})
+
+
+def test_cached_page_is_revalidated_with_its_validators(tmp_path):
+    server = FakeServer({"https://example.com/a": (b"page a", '"v1"')})
+    cache = ResponseCache(str(tmp_path))
+    assert cache.fetch("https://example.com/a", server.get).content == b"page a"
+
+    r = cache.fetch("https://example.com/a", server.get)
+    assert r.from_cache and r.content == b"page a"
+    assert server.requests[-1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Sat, 03 Jan 2015 00:00:00 GMT"}
+
+    server.pages["https://example.com/a"] = (b"page a, edited", '"v2"')
+    r = cache.fetch("https://example.com/a", server.get)
+    assert not getattr(r, "from_cache", False) and r.content == b"page a, edited"
+    # The cache is persistent, and the replaced page's body is gone
+    reloaded = ResponseCache(str(tmp_path), cache_only=True)
+    assert reloaded.fetch("https://example.com/a", server.get).content == b"page a, edited"
+    assert reloaded.size == len(b"page a, edited") and len(os.listdir(tmp_path / "blobs")) == 1
+
+
+def test_cache_only_mode_does_not_fetch(tmp_path):
+    cache = ResponseCache(str(tmp_path), cache_only=True)
+    with pytest.raises(CacheMissError):
+        cache.fetch("https://example.com/a", FakeServer({}).get)
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.put("https://example.com/a", b"aaaa")
+    cache.put("https://example.com/b", b"bbbb")
+    # Identical bodies are stored once
+    cache.put("https://example.com/b2", b"bbbb")
+    assert cache.size == 8
+    cache.get_response("https://example.com/a")
+    cache.put("https://example.com/c", b"cccc")
+    assert "https://example.com/a" in cache and "https://example.com/c" in cache
+    assert "https://example.com/b" not in cache and "https://example.com/b2" not in cache
+    assert cache.size == 8 and len(os.listdir(tmp_path / "blobs")) == 2
+
+
+def test_blobs_without_entries_are_deleted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.put("https://example.com/a", b"aaaa")
+    cache.put("https://example.com/a", b"a, edited")
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+    cache.put("https://example.com/b", b"bbbb")
+    assert "https://example.com/a" not in cache and len(os.listdir(tmp_path / "blobs")) == 1
+
+    # A crash after writing a page but before its entry, and one mid-write
+    with open(tmp_path / "blobs" / ("0" * 64), "wb") as f:
+        f.write(b"orphan")
+    with open(tmp_path / "entries" / "partial.json.1.tmp", "wb") as f:
+        f.write(b"{")
+    reloaded = ResponseCache(str(tmp_path), max_bytes=10)
+    assert reloaded.get_response("https://example.com/b").content == b"bbbb"
+    assert reloaded.size == 4 and len(os.listdir(tmp_path / "blobs")) == 1
+    assert len(os.listdir(tmp_path / "entries")) == 1
@@ -0,0 +1,63 @@
+import json
+import os
+import warnings
+
+from bs4 import BeautifulSoup
+
+from mmai.data.dump import iter_html_dump
+from mmai.data.wikipedia import WikiFightersRaw
+
+
+DUMP_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "wiki_html_dump.ndjson")
+LINKS_HTML = (
+    '<a href="/wiki/Jon_Jones">Jon Jones</a>'
+    '<a href="/wiki/Jos%C3%A9_Aldo">José Aldo</a>'
+    '<a href="/wiki/Glover_Teixeira">Glover Teixeira</a>'
+    '<a href="/wiki/Not_In_The_Dump">Not In The Dump</a>'
+)
+
+
+def get_links():
+    return BeautifulSoup(LINKS_HTML, "html.parser").find_all("a")
+
+
+def get_dump_html():
+    with open(DUMP_PATH, encoding="utf-8") as f:
+        return {article["name"]: article["article_body"]["html"] for article in map(json.loads, f)}
+
+
+def test_iter_html_dump_selects_by_top_level_name():
+    pages = dict(iter_html_dump(DUMP_PATH, titles={"Jon_Jones", "José Aldo"}))
+    # Jon Jones' nested "namespace" and "is_part_of" names come first, and Daniel Cormier has a nested object named
+    # "Jon Jones", neither of which may decide the page's title
+    assert sorted(pages) == ["Jon Jones", "José Aldo"]
+    assert pages["Jon Jones"] == get_dump_html()["Jon Jones"]
+
+
+def test_iter_html_dump_without_titles_yields_every_page():
+    assert [title for title, _ in iter_html_dump(DUMP_PATH)] == list(get_dump_html())
+
+
+def test_scrape_from_dump_matches_parsing_the_pages():
+    scraper = WikiFightersRaw()
+    links = get_links()
+    html = get_dump_html()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        fighters = scraper.scrape_from_dump(DUMP_PATH, links=links, report=False)
+
+        assert [f["link"] for f in fighters] == [str(link) for link in links]
+        for link, fighter in zip(links, fighters):
+            title = scraper.get_title_from_relative_link(link)
+            content = html.get(title, "").encode()
+            expected = scraper.get_fighter_record_and_info_from_html(content, str(link), quiet=True, silent=True)
+            assert {k: fighter[k] for k in ("record", "info", "warning_level")} == expected
+            assert fighter["title"] == link.text
+
+    jones, aldo, teixeira, missing = fighters
+    assert jones["warning_level"] == 0
+    assert jones["info"]["Full name"] == "Jon Jones"
+    assert [fight["Opponent"] for fight in jones["record"]] == ["Daniel Cormier", "Glover Teixeira"]
+    assert aldo["record"][0]["Method"] == "KO (punch)"
+    assert teixeira["info"] is None and teixeira["warning_level"] == 1
+    assert missing["record"] is None and missing["info"] is None and missing["warning_level"] == 2
@@ -0,0 +1,72 @@
+import numpy as np
+
+from mmai.data.bouts import BoutTable
+from mmai.data.features import FeatureStore
+
+
+def fight(result, opponent, date, method):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Method": method, "Event": None}
+
+
+def build_bout_table():
+    # Listed in date order, so the first bouts of the table are a bout table of their own to update from
+    bout_table = BoutTable()
+    bout_table.build({
+        "Jon Jones": {
+            "link": "/wiki/Jon_Jones",
+            "birthday": "1987-07-19",
+            "record": [
+                fight("Win", "Vladimir Matyushenko", "August 9, 2010", "TKO (elbows)"),
+                fight("Win", "Ryan Bader", "February 5, 2011", "Submission (guillotine choke)"),
+                fight("Loss", "Matt Hamill", "December 5, 2011", "Disqualification (elbows)"),
+            ],
+        },
+        "Ryan Bader": {
+            "link": "/wiki/Ryan_Bader",
+            "record": [fight("Win", "Matt Hamill", "March 1, 2012", "Decision (unanimous)")],
+        },
+    })
+    return bout_table
+
+
+def build_features(bout_table):
+    features = FeatureStore()
+    features.build(bout_table)
+    return features
+
+
+def test_features_are_from_earlier_bouts_only():
+    features = build_features(build_bout_table()).to_frame()
+    jones = features[features["fighter"] == 0]
+    assert jones["fights"].tolist() == [0, 1, 2]
+    assert jones["wins"].tolist() == [0, 1, 2]
+    assert jones["ko_wins"].tolist() == [0, 1, 1] and jones["submission_wins"].tolist() == [0, 0, 1]
+    assert jones["win_streak"].tolist() == [0, 1, 2]
+    assert jones["finish_rate"].tolist()[1:] == [1.0, 1.0] and np.isnan(jones["finish_rate"].iloc[0])
+    assert np.isnan(jones["days_since_last"].iloc[0]) and jones["days_since_last"].iloc[1] == 180
+    assert jones["age_days"].iloc[0] == (np.datetime64("2010-08-09") - np.datetime64("1987-07-19")).astype(int)
+    bader = features[features["fighter"] == 1]
+    assert bader["fights"].tolist() == [0, 1] and bader["losses"].tolist() == [0, 1]
+
+
+def test_get_state_does_not_leak_the_bout_on_the_date():
+    features = build_features(build_bout_table())
+    fighter_ids = [0, 0, 0, 1]
+    state = features.get_state(fighter_ids, ["2011-02-05", "2011-02-06", "2030-01-01", "2011-02-05"])
+    assert state["fights"].tolist() == [1, 2, 3, 0]
+    assert state["wins"].tolist() == [1, 2, 2, 0]
+    assert state["win_streak"].tolist() == [1, 2, 0, 0] and state["loss_streak"].tolist() == [0, 0, 1, 0]
+    assert state["days_since_last"][:2].tolist() == [180, 1] and np.isnan(state["days_since_last"][3])
+
+
+def test_update_matches_build():
+    bout_table = build_bout_table()
+    first = BoutTable()
+    first.data = {**bout_table.data, "bouts": {c: v[:2] for c, v in bout_table.data["bouts"].items()}}
+    updated = build_features(first)
+    updated.update(bout_table)
+    built = build_features(bout_table)
+    for column, values in built.data["features"].items():
+        np.testing.assert_array_equal(updated.data["features"][column], values)
+    for column, values in built.data["state"].items():
+        np.testing.assert_array_equal(updated.data["state"][column], values)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+
+from mmai.data.bouts import BoutTable
+from mmai.data.graph import OpponentGraph
+
+
+def fight(result, opponent, date):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Event": None}
+
+
+def build_graph():
+    # Fighter ids are A=0, B=1, C=2, D=3, E=4, and the bout with D has no date
+    bout_table = BoutTable()
+    bout_table.build({
+        "A": {
+            "link": "/wiki/A",
+            "record": [
+                fight("Win", "B", "January 1, 2010"),
+                fight("Loss", "C", "January 1, 2012"),
+                fight("Win", "D", None),
+            ],
+        },
+        "B": {
+            "link": "/wiki/B",
+            "record": [fight("Win", "C", "January 1, 2011"), fight("Win", "E", "January 1, 2013")],
+        },
+    })
+    graph = OpponentGraph()
+    graph.build(bout_table)
+    return graph
+
+
+def test_build():
+    graph = build_graph()
+    # Undated bouts are left out, so D has no edges, and each fighter's edges are sorted by date
+    assert graph.data["indptr"].tolist() == [0, 2, 5, 7, 7, 8]
+    assert graph.data["neighbor"].tolist() == [1, 2, 0, 2, 4, 1, 0, 1]
+    assert graph.data["bout"].tolist() == [0, 1, 0, 3, 4, 3, 1, 4]
+    assert (np.diff(graph.data["date"][2:5]) > np.timedelta64(0, "D")).all()
+    assert not np.isnat(graph.data["date"]).any()
+
+
+def test_get_opponents():
+    graph = build_graph()
+    assert graph.get_opponents(0).tolist() == [1, 2]
+    assert graph.get_opponents(0, before="2012-01-01").tolist() == [1]
+    assert graph.get_opponents(0, wins_only=True).tolist() == [1]
+    assert graph.get_opponents(1, wins_only=True).tolist() == [2, 4]
+    assert graph.get_opponents(1, before="2011-06-01", wins_only=True).tolist() == [2]
+    assert graph.get_opponents(3).tolist() == []
+
+
+def test_count_common_opponents():
+    graph = build_graph()
+    ids = np.array([0, 0, 1, 2, 3])
+    other_ids = np.array([1, 1, 2, 4, 0])
+    dates = np.array(["2014-01-01", "2011-06-01", "2014-01-01", "2014-01-01", "2014-01-01"], dtype="datetime64[D]")
+    expected = [len(graph.get_common_opponents(i, j, before=d)) for i, j, d in zip(ids, other_ids, dates)]
+    assert graph.count_common_opponents(ids, other_ids, dates).tolist() == expected == [1, 0, 1, 1, 0]
+    assert graph.get_common_opponents(0, 1).tolist() == [2]
+    assert graph.count_common_opponents(ids, other_ids).tolist() == [1, 1, 1, 1, 0]
+
+
+def test_get_win_paths():
+    graph = build_graph()
+    # A beat B who beat C, and B beat E, but C beat A
+    hops = graph.get_win_paths([0, 0, 0, 0, 2], [1, 2, 4, 4, 0])
+    assert hops.tolist() == [1, 2, 2, 2, 1]
+    # B only beat E in 2013, so there is no chain from A to E before then
+    dates = ["2011-06-01", "2011-06-01", "2012-06-01", "2013-06-01", "2011-06-01"]
+    assert graph.get_win_paths([0, 0, 0, 0, 2], [1, 2, 4, 4, 0], dates).tolist() == [1, 2, 0, 2, 0]
+    assert graph.get_win_paths([0], [4], max_hops=1).tolist() == [0]
+
+
+def test_save_and_load(tmp_path):
+    graph = build_graph()
+    graph.data_filename = os.path.join(tmp_path, "opponent_graph.json")
+    graph.save()
+
+    loaded = OpponentGraph()
+    loaded.data_filename = graph.data_filename
+    loaded.load()
+    for column, values in graph.data.items():
+        assert loaded.data[column].dtype == values.dtype
+        np.testing.assert_array_equal(loaded.data[column], values)
+    assert loaded.get_win_paths([0], [2], ["2011-06-01"]).tolist() == [2]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from mmai.data.implied import (
+    ImpliedOdds,
+    american_to_probability,
+    parse_american_odds,
+    remove_vig_proportional,
+    remove_vig_shin,
+)
+from mmai.data.odds import ODDS_COLUMNS
+
+
+def odds_record(*rows):
+    return {
+        "warning_level": 0,
+        "odds_record": {h: {str(i): row[j] for i, row in enumerate(rows)} for j, h in enumerate(ODDS_COLUMNS)},
+    }
+
+
+def test_parse_american_odds():
+    parsed = parse_american_odds(["+150", "-200", "−200", "EV", None, "50"])
+    np.testing.assert_array_equal(parsed, [150, -200, -200, np.nan, np.nan, np.nan])
+    np.testing.assert_array_equal(parse_american_odds([150, -200, None]), [150, -200, np.nan])
+
+
+def test_american_to_probability():
+    probabilities = american_to_probability([-200, 150, 100, np.nan])
+    np.testing.assert_allclose(probabilities[:3], [2 / 3, 0.4, 0.5])
+    assert np.isnan(probabilities[3])
+
+
+def test_remove_vig_proportional():
+    p_1, p_2 = remove_vig_proportional(np.array([2 / 3]), np.array([0.4]))
+    np.testing.assert_allclose(p_1 + p_2, 1)
+    np.testing.assert_allclose(p_1 / p_2, (2 / 3) / 0.4)
+
+
+def test_remove_vig_shin():
+    implied_1 = np.array([2 / 3, 0.5, 0.8])
+    implied_2 = np.array([0.4, 0.5, 0.25])
+    p_1, p_2, z = remove_vig_shin(implied_1, implied_2)
+    np.testing.assert_allclose(p_1 + p_2, 1)
+    # The closed form solves Shin's equations for the fitted z
+    booksum = implied_1 + implied_2
+    for p, implied in ((p_1, implied_1), (p_2, implied_2)):
+        shin = (np.sqrt(z ** 2 + 4 * (1 - z) * implied ** 2 / booksum) - z) / (2 * (1 - z))
+        np.testing.assert_allclose(shin, p)
+    assert z[1] == 0 and (z[[0, 2]] > 0).all()
+    # More of the margin comes off the longshot than with proportional removal
+    assert p_2[0] < remove_vig_proportional(implied_1, implied_2)[1][0]
+
+
+@pytest.mark.parametrize("method", ["proportional", "shin"])
+def test_bouts_listed_on_both_pages_are_kept_once(method, capsys):
+    odds_data = {
+        "Jon Jones": odds_record(
+            ("Jon Jones", -200, -250, -180, "Daniel Cormier", 150, 210, 150, "2015-01-03"),
+            ("Jon Jones", -300, None, None, "Glover Teixeira", 250, None, None, "2022-04-23"),
+        ),
+        "Daniel Cormier": odds_record(
+            ("Daniel Cormier", 150, 210, 150, "Jon Jones", -200, -250, -180, "2015-01-03"),
+        ),
+        "Not Found": {"warning_level": 2, "odds_record": None},
+    }
+    implied = ImpliedOdds(method=method)
+    bouts = implied.build(odds_data)
+    assert bouts["fighter_2"].tolist() == ["Daniel Cormier", "Glover Teixeira"]
+    assert bouts["date"].tolist() == [np.datetime64("2015-01-03", "D"), np.datetime64("2022-04-23", "D")]
+    np.testing.assert_allclose(bouts["fighter_1_prob_open"] + bouts["fighter_2_prob_open"], 1, rtol=1e-6)
+    np.testing.assert_allclose(bouts["margin_open"][0], 2 / 3 + 0.4 - 1, rtol=1e-6)
+    assert np.isnan(bouts["fighter_1_prob_close_best"][1]) and np.isnan(bouts["margin_close_best"][1])
+    assert "1 duplicates removed" in capsys.readouterr().out
+
+    with pytest.raises(ValueError):
+        ImpliedOdds(method="power")
@@ -0,0 +1,11 @@
+from mmai.data.index import FighterNameIndex
+
+
+def test_lookup_exact_and_fuzzy():
+    index = FighterNameIndex()
+    index.add("Jon Jones", "/fighters/Jon-Jones-819")
+    index.add("José Aldo", "/fighters/Jose-Aldo-223")
+    assert index.lookup("jon  jones") == ["/fighters/jon-jones-819"]
+    assert index.lookup("Jose Aldoo") == ["/fighters/jose-aldo-223"]
+    assert index.lookup("Daniel Cormier") == []
+    assert (index.hits, index.misses) == (2, 1)
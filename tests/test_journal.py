@@ -0,0 +1,24 @@
+from mmai.data.journal import Journal
+
+
+def test_journal_resumes_from_appended_entries(tmp_path):
+    journal = Journal(str(tmp_path / "fighters.json.journal"))
+    assert journal.read() == {}
+    journal.append("/wiki/Jon_Jones", {"warning_level": 0})
+    journal.append("/wiki/Jose_Aldo", {"warning_level": 1})
+    journal.append("/wiki/Jon_Jones", {"warning_level": 2})
+    entries = Journal(journal.filename).read()
+    assert entries == {"/wiki/Jon_Jones": {"warning_level": 2}, "/wiki/Jose_Aldo": {"warning_level": 1}}
+    journal.clear()
+    assert journal.read() == {}
+
+
+def test_journal_truncates_incomplete_last_line(tmp_path):
+    journal = Journal(str(tmp_path / "fighters.json.journal"))
+    journal.append("a", 1)
+    with open(journal.filename, "a") as f:
+        f.write('["b", {"crashed": ')
+    assert journal.read() == {"a": 1}
+    # Appending after the truncation must not join the new entry to the partial line
+    journal.append("c", 3)
+    assert journal.read() == {"a": 1, "c": 3}
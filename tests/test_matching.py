@@ -0,0 +1,39 @@
+import pytest
+
+from mmai.data.matching import FighterMatcher, get_blocking_keys, soundex
+from mmai.data.names import get_join_keys, get_trigrams
+
+
+def test_matcher_scores_with_the_shared_trigrams():
+    matcher = FighterMatcher(min_score=0.5)
+    matches = matcher.match(["Jon Jones", "José Aldo"], ["Jon Jonës", "Joze Aldo"], "other")
+    assert dict(zip(matches["name"], matches["other_name"])) == {"Jon Jones": "Jon Jonës", "José Aldo": "Joze Aldo"}
+    keys, other = get_trigrams("jose-aldo"), get_trigrams("joze-aldo")
+    score = matches.set_index("name").loc["José Aldo", "score"]
+    assert round(len(keys & other) / len(keys | other), 4) == score
+
+
+def test_soundex():
+    assert soundex("nurmagomedov") == soundex("nurmagomedof") == "N652"
+    assert soundex("jones") == soundex("jonez") == "J520"
+    assert soundex("ashcraft") == "A261" and soundex("") == ""
+
+
+def test_blocking_keys():
+    assert get_blocking_keys("jon-jones") == ["s:jones", "p:J500J520", "i:jJ520"]
+    assert get_blocking_keys("") == []
+
+
+def test_candidate_pairs_share_a_block():
+    matcher = FighterMatcher()
+    keys = get_join_keys(["Khabib Nurmagomedov", "Jon Jones", "José Aldo"])
+    other_keys = get_join_keys(["Khabib Nurmagomedof", "Daniel Cormier", "Jon Jonez", "Jon Smith"])
+    left, right = matcher.get_candidate_pairs(keys, other_keys)
+    # Different spellings of the same fighter land in the same block, unrelated names (even with the same first name)
+    # don't
+    assert sorted(zip(left.tolist(), right.tolist())) == [(0, 0), (1, 2)]
+
+    scores = matcher.score_pairs(keys, other_keys, left, right)
+    for i, j, score in zip(left, right, scores):
+        trigrams, other = get_trigrams(keys[i]), get_trigrams(other_keys[j])
+        assert score == pytest.approx(len(trigrams & other) / len(trigrams | other))
@@ -0,0 +1,106 @@
+import json
+import warnings
+
+import pytest
+import requests
+
+from mmai.data.index import FighterNameIndex
+from mmai.data.odds import ODDS_COLUMNS, OddsScrapeAndProcess
+from mmai.data.parsing import is_parser_available
+
+
+def odds_row(name, odds, date=None):
+    cells = "".join(f"<td><span>{o}</span></td>" for o in odds)
+    cells += "<td><span>+5.2%</span></td><td></td>"
+    if date:
+        cells += f"<td>{date}</td>"
+    return f'<tr><th><a href="/fighters/{name.replace(" ", "-")}"><div>{name}</div></a></th>{cells}</tr>'
+
+
+def odds_page(*bouts):
+    rows = "".join(odds_row(f1, o1, date) + odds_row(f2, o2) for f1, o1, f2, o2, date in bouts)
+    header = "<tr><th>Matchup</th><th>Open</th><th>Closing range</th><th></th><th>Movement</th><th>Event</th></tr>"
+    return f"<html><body><table>{header}{rows}</table></body></html>".encode()
+
+
+def parse(content, parser="html.parser"):
+    scraper = OddsScrapeAndProcess(parser=parser)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return scraper.get_fighter_odds_from_page("Jon Jones", ["/fighters/Jon-Jones"], content)
+
+
+def test_parses_odds_and_dates():
+    fighter = parse(odds_page(
+        ("Jon Jones", ["-200", "−250", "-180"], "Daniel Cormier", ["+170", "+210", "+150"], "Jan 3rd 2015"),
+    ))
+    assert fighter["warning_level"] == 0
+    record = fighter["odds_record"]
+    assert list(record) == ODDS_COLUMNS
+    assert [record[h][0] for h in ODDS_COLUMNS] == [
+        "Jon Jones", -200, -250, -180, "Daniel Cormier", 170, 210, 150, "2015-01-03"
+    ]
+    assert set(fighter["fighter_links"]) == {"Jon Jones", "Daniel Cormier"}
+
+
+def test_unparseable_odds_cells_are_missing_not_the_whole_fighter():
+    fighter = parse(odds_page(
+        ("Jon Jones", ["EV", "PK", ""], "Daniel Cormier", ["+170", "EV", "+150"], "Jan 3rd 2015"),
+        ("Jon Jones", ["-300", "-320", "-280"], "Glover Teixeira", ["+250", "+270", "+230"], "Apr 23rd 2022"),
+    ))
+    assert fighter["warning_level"] == 0
+    record = fighter["odds_record"]
+    assert [record["fighter_1_odds_open"][i] for i in range(2)] == [100, -300]
+    assert record["fighter_1_odds_close_best"][0] is None
+    assert record["fighter_1_odds_close_worst"][0] is None
+    assert record["fighter_2_odds_close_best"][0] == 100
+    assert record["date"][1] == "2022-04-23"
+    json.dumps(record)
+
+
+def test_parse_odds_cell():
+    scraper = OddsScrapeAndProcess(parser="html.parser")
+    parsed = [scraper.parse_odds_cell(c) for c in ("+150", "-200", "−200", "EV", "even", "PK", "", "n/a")]
+    assert parsed == [150, -200, -200, 100, 100, None, None, None]
+
+
+@pytest.mark.parametrize("parser", [p for p in ("lxml", "html5lib") if is_parser_available(p)])
+def test_parsers_agree(parser):
+    content = odds_page(
+        ("Jon Jones", ["-200", "EV", ""], "Daniel Cormier", ["+170", "+210", "+150"], "Jan 3rd 2015"),
+        ("Jon Jones", ["-300", "-320", "-280"], "Glover Teixeira", ["+250", "+270", "+230"], "Apr 23rd 2022"),
+    )
+    assert json.dumps(parse(content, parser=parser)) == json.dumps(parse(content))
+
+
+class FailingSession:
+    def __init__(self, error):
+        self.error = error
+
+    def get(self, url, **kwargs):
+        raise self.error
+
+
+def fetch(error):
+    name_index = FighterNameIndex()
+    name_index.add("Jon Jones", "/fighters/Jon-Jones-819")
+    scraper = OddsScrapeAndProcess(session=FailingSession(error), parser="html.parser", name_index=name_index)
+    return scraper.fetch_fighter_odds_page("Jon Jones")
+
+
+def test_network_errors_are_warned_about_with_the_url():
+    with pytest.warns(UserWarning, match="https://www.bestfightodds.com/fighters/jon-jones-819"):
+        name, links, content = fetch(requests.ConnectionError("refused"))
+    assert content is None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert parse(content)["warning_level"] == 2
+
+
+def test_programming_errors_are_not_swallowed():
+    with pytest.raises(TypeError):
+        fetch(TypeError("not a network error"))
+
+
+def test_page_without_an_odds_table():
+    assert parse(b"<html><body><p>Not found</p></body></html>")["warning_level"] == 2
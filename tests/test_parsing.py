@@ -0,0 +1,23 @@
+import pytest
+
+from mmai.data.parsing import FAST_PARSER, get_parser_backend, is_parser_available, make_soup
+
+
+PARSERS = [p for p in ("html.parser", "lxml", "html5lib") if is_parser_available(p)]
+PAGE = "<html><body><p>Not a table</p><table><tr><td>Jon Jones</td></tr></table></body></html>"
+
+
+def test_get_parser_backend():
+    assert get_parser_backend("html.parser") == "html.parser"
+    expected = FAST_PARSER if is_parser_available(FAST_PARSER) else "html.parser"
+    assert get_parser_backend() == expected
+    with pytest.raises(ValueError):
+        get_parser_backend("not-a-parser")
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_make_soup_only_tables(parser):
+    soup = make_soup(PAGE, parser, only_tables=True)
+    assert soup.find("td").text == "Jon Jones"
+    # html5lib ignores only_tables and builds the whole page
+    assert (soup.find("p") is None) == (parser != "html5lib")
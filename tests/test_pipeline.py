@@ -0,0 +1,40 @@
+import random
+import time
+
+from mmai.data.pipeline import ordered_pipeline
+
+
+def fetch(item):
+    # Later items often finish fetching first
+    time.sleep(random.random() / 1000)
+    return item, item * 2
+
+
+def parse(item, doubled):
+    return item, doubled + 1
+
+
+def test_results_are_in_item_order():
+    items = range(200)
+    expected = [(i, i * 2 + 1) for i in items]
+    assert list(ordered_pipeline(items, fetch, parse, io_workers=8, max_pending=16)) == expected
+
+
+def test_results_are_in_item_order_with_parsing_processes():
+    items = range(50)
+    expected = [(i, i * 2 + 1) for i in items]
+    assert list(ordered_pipeline(items, fetch, parse, io_workers=4, cpu_workers=2)) == expected
+
+
+def test_pending_items_are_bounded():
+    fetched = []
+
+    def recording_fetch(item):
+        fetched.append(item)
+        return (item,)
+
+    results = ordered_pipeline(range(1000), recording_fetch, str, io_workers=2, max_pending=4)
+    assert next(results) == "0"
+    time.sleep(0.05)
+    assert len(fetched) <= 5
+    results.close()
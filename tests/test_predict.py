@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from mmai.data.bouts import BoutTable
+from mmai.data.features import FeatureStore
+from mmai.data.ratings import RatingEngine
+from mmai.predict import MatchupScorer
+
+
+def fight(result, opponent, date, method):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Method": method, "Event": None}
+
+
+def build_scorer():
+    bout_table = BoutTable()
+    bout_table.build({
+        "Jon Jones": {
+            "link": "/wiki/Jon_Jones",
+            "birthday": "1987-07-19",
+            "record": [
+                fight("Win", "Vladimir Matyushenko", "August 9, 2010", "TKO (elbows)"),
+                fight("Win", "Ryan Bader", "February 5, 2011", "Submission (guillotine choke)"),
+                fight("Loss", "Matt Hamill", "December 5, 2011", "Disqualification (elbows)"),
+                fight("Win", "Daniel Cormier", "January 3, 2015", "Decision (unanimous)"),
+            ],
+        },
+        "Daniel Cormier": {
+            "link": "/wiki/Daniel_Cormier",
+            "birthday": "1979-03-20",
+            "record": [
+                fight("Win", "Josh Barnett", "May 19, 2012", "Decision (unanimous)"),
+                fight("Win", "Frank Mir", "April 20, 2013", "Decision (unanimous)"),
+            ],
+        },
+        "Ryan Bader": {
+            "link": "/wiki/Ryan_Bader",
+            "record": [fight("Win", "Matt Hamill", "March 1, 2012", "Decision (unanimous)")],
+        },
+    })
+    feature_store = FeatureStore()
+    feature_store.build(bout_table)
+    rating_engine = RatingEngine()
+    rating_engine.build(bout_table)
+    scorer = MatchupScorer(bout_table, feature_store, rating_engine)
+    scorer.fit()
+    return scorer
+
+
+def test_predictions_are_symmetric():
+    scorer = build_scorer()
+    fighters = ["Jon Jones", "Jon Jones", "Ryan Bader", "Daniel Cormier"]
+    opponents = ["Daniel Cormier", "Matt Hamill", "Matt Hamill", "Frank Mir"]
+    dates = ["2016-01-01", "2011-06-01", "2016-01-01", None]
+    p = scorer.predict(fighters, opponents, dates)
+    assert p.dtype == np.float32
+    assert not np.isnan(p).any()
+    np.testing.assert_allclose(p, 1 - scorer.predict(opponents, fighters, dates), atol=1e-6)
+    assert scorer.predict(["Jon Jones"], ["Jon Jones"], "2016-01-01").tolist() == pytest.approx([0.5])
+
+
+def test_unknown_fighters_are_nan():
+    scorer = build_scorer()
+    p = scorer.predict(["Jon Jones", "Unknown Fighter", "Jon Jones", 100], ["Daniel Cormier", "Jon Jones", None, 0])
+    assert not np.isnan(p[0])
+    assert np.isnan(p[1:]).all()
+    assert np.isnan(scorer.predict(np.array([0, -1]), np.array([100, 1]))).all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from mmai.data.bouts import BoutTable
+from mmai.data.ratings import RatingEngine
+
+
+def fight(result, opponent, date):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Event": None}
+
+
+def build_bout_table():
+    bout_table = BoutTable()
+    bout_table.build({
+        "Jon Jones": {
+            "link": "/wiki/Jon_Jones",
+            "record": [
+                fight("Win", "Daniel Cormier", "January 3, 2015"),
+                fight("Draw", "Glover Teixeira", "April 23, 2016"),
+                fight("NC", "Daniel Cormier", "July 29, 2017"),
+            ],
+        },
+    })
+    return bout_table
+
+
+def build_ratings(bout_table, **kwargs):
+    ratings = RatingEngine(**kwargs)
+    ratings.build(bout_table)
+    return ratings
+
+
+def test_elo_updates():
+    ratings = build_ratings(build_bout_table(), k=32)
+    rows = ratings.to_frame()
+    assert rows["rating"].tolist()[:2] == [1516, 1484]
+    assert rows["expected"].tolist()[:2] == [0.5, 0.5]
+
+    # A draw moves the favourite down, and a no contest changes nothing
+    expected = 1 / (1 + 10 ** (-16 / 400))
+    change = 32 * (0.5 - expected)
+    assert rows["rating"].tolist()[2:4] == pytest.approx([1516 + change, 1500 - change])
+    assert rows["rating"].tolist()[4:] == rows["rating_before"].tolist()[4:] == pytest.approx([1516 + change, 1484])
+    np.testing.assert_allclose(ratings.data["state"]["rating"], [1516 + change, 1484, 1500 - change])
+
+
+def test_get_ratings_are_from_earlier_bouts_only():
+    ratings = build_ratings(build_bout_table())
+    result = ratings.get_ratings([0, 0, 1, 2], ["2015-01-03", "2015-01-04", "2015-01-04", "2016-04-23"])
+    assert result["rating"].tolist() == [1500, 1516, 1484, 1500]
+    assert ratings.get_expected([0], [1], ["2015-01-03"]).tolist() == [0.5]
+
+
+def test_glicko_updates():
+    ratings = build_ratings(build_bout_table(), method="glicko")
+    rows = ratings.to_frame()
+    winner, loser = rows["rating"].tolist()[:2]
+    # Equal ratings and deviations move by the same amount, and the deviations shrink after a bout
+    assert winner > 1500 and winner - 1500 == pytest.approx(1500 - loser)
+    assert (rows["rd"].iloc[:2] < 350).all() and (rows["rd_before"].iloc[:2] == 350).all()
+    # The deviation grows back with the time since the fighter's last bout
+    rd = ratings.get_ratings([0, 0], ["2015-01-04", "2016-01-04"])["rd"]
+    assert rd[0] < rd[1] <= 350
+
+
+@pytest.mark.parametrize("method", ["elo", "glicko"])
+def test_update_matches_build(method):
+    bout_table = build_bout_table()
+    first = BoutTable()
+    first.data = {**bout_table.data, "bouts": {c: v[:1] for c, v in bout_table.data["bouts"].items()}}
+    updated = build_ratings(first, method=method)
+    updated.update(bout_table)
+    built = build_ratings(bout_table, method=method)
+    for column, values in built.data["ratings"].items():
+        np.testing.assert_array_equal(updated.data["ratings"][column], values)
+
+    earlier = BoutTable()
+    earlier.data = {**bout_table.data, "bouts": {c: v[[0, 0]] for c, v in bout_table.data["bouts"].items()}}
+    earlier.data["bouts"]["date"] = np.array(["2014-01-01", "2014-01-01"], dtype="datetime64[D]")
+    with pytest.raises(ValueError):
+        built.update(earlier, start=1)
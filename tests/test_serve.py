@@ -0,0 +1,81 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from mmai.data.bouts import BoutTable
+from mmai.data.features import FeatureStore
+from mmai.data.ratings import RatingEngine
+from mmai.predict import MatchupScorer
+from mmai.serve import make_server
+
+
+def fight(result, opponent, date):
+    return {"Res": result, "Opponent": opponent, "Date": date, "Method": "Decision (unanimous)", "Event": None}
+
+
+@pytest.fixture(scope="module")
+def url():
+    bout_table = BoutTable()
+    bout_table.build({
+        "Jon Jones": {
+            "link": "/wiki/Jon_Jones",
+            "record": [
+                fight("Win", "Ryan Bader", "February 5, 2011"),
+                fight("Loss", "Matt Hamill", "December 5, 2011"),
+                fight("Win", "Daniel Cormier", "January 3, 2015"),
+            ],
+        },
+    })
+    feature_store = FeatureStore()
+    feature_store.build(bout_table)
+    rating_engine = RatingEngine()
+    rating_engine.build(bout_table)
+    scorer = MatchupScorer(bout_table, feature_store, rating_engine)
+    scorer.fit()
+
+    server = make_server(scorer, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def post(url, body):
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_predict(url):
+    status, body = post(url, json.dumps({"fighter_a": "Jon Jones", "fighter_b": "Ryan Bader"}).encode())
+    assert status == 200 and 0 < body["probability"] < 1
+
+    fights = [{"fighter_a": "Jon Jones", "fighter_b": "Ryan Bader", "date": "2012-01-01"},
+              {"fighter_a": "Unknown Fighter", "fighter_b": "Ryan Bader"}]
+    status, body = post(url, json.dumps({"fights": fights}).encode())
+    assert status == 200 and body["probabilities"][1] is None
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b"[1, 2]",
+    json.dumps({"fighter_a": "Jon Jones"}).encode(),
+    json.dumps({"fights": [{"fighter_b": "Ryan Bader"}]}).encode(),
+    json.dumps({"fights": 3}).encode(),
+])
+def test_bad_requests(url, body):
+    status, response = post(url, body)
+    assert status == 400
+    assert response["error"].startswith("Bad request")
+
+    # The server keeps serving after a bad request
+    status, _ = post(url, json.dumps({"fighter_a": "Jon Jones", "fighter_b": "Ryan Bader"}).encode())
+    assert status == 200
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+from mmai.data.storage import LazyJsonlMapping, read_columnar_table, write_columnar_table, write_jsonl
+
+
+def test_columnar_round_trip(tmp_path):
+    directory = str(tmp_path / "fighters")
+    table = {
+        "name": ["Jon Jones", "José Aldo", None, "Jon Jones"],
+        "wins": [27, 32, 0, 27],
+        "height_m": [1.93, None, float("nan"), 1.93],
+    }
+    write_columnar_table(directory, table)
+
+    loaded = read_columnar_table(directory, as_frame=False)
+    assert loaded["name"].codes[2] == -1
+    assert list(loaded["name"][[0, 1, 3]]) == ["Jon Jones", "José Aldo", "Jon Jones"]
+    assert loaded["wins"].dtype == np.int64 and loaded["wins"].tolist() == table["wins"]
+    assert loaded["height_m"][0] == 1.93 and np.isnan(loaded["height_m"][1:3]).all()
+
+    frame = read_columnar_table(directory, columns=["wins"])
+    assert list(frame.columns) == ["wins"] and frame["wins"].sum() == 86
+    with pytest.raises(KeyError):
+        read_columnar_table(directory, columns=["reach_cm"])
+
+
+def test_write_jsonl_round_trip(tmp_path):
+    filename = str(tmp_path / "fighters.jsonl")
+    items = {"Jon Jones": {"wins": 27, "record": [1, 2]}, "José Aldo": {"wins": 32, "record": None}}
+    write_jsonl(filename, items.items())
+    mapping = LazyJsonlMapping(filename, cache_size=1)
+    assert list(mapping) == list(items)
+    assert {k: mapping[k] for k in mapping} == items
+    assert mapping["José Aldo"] == items["José Aldo"]
+    mapping.close()
+
+
+def test_write_jsonl_failure_keeps_previous_file(tmp_path):
+    filename = str(tmp_path / "fighters.jsonl")
+    write_jsonl(filename, [("a", 1)])
+
+    def items():
+        yield "b", 2
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        write_jsonl(filename, items())
+    mapping = LazyJsonlMapping(filename)
+    assert dict(mapping) == {"a": 1}
+    mapping.close()
+    assert sorted(os.listdir(tmp_path)) == ["fighters.jsonl", "fighters.jsonl.idx.json"]
@@ -0,0 +1,51 @@
+from mmai.data.store import FighterStore
+
+
+def fighter(*opponents, reach_cm=None):
+    record = [{"Res": "Win", "Opponent": o, "Date": "January 3, 2015", "Round": "1"} for o in opponents]
+    return {"name_raw": None, "link": None, "warning_level": 0, "reach_cm": reach_cm, "record": record}
+
+
+def test_opponents_are_resolved_to_fighter_ids(tmp_path):
+    store = FighterStore(str(tmp_path / "fighters.sqlite"))
+    store.insert_processed({
+        "Jon Jones": fighter("Daniel Cormier", "Jose Aldo", "Unknown Fighter", reach_cm=215),
+        "Daniel Cormier": fighter("Jon Jones", reach_cm=184),
+    })
+    bouts = store.query(
+        "SELECT b.opponent, o.name AS opponent_name, o.reach_cm FROM bouts b "
+        "LEFT JOIN fighters o ON o.id = b.opponent_id ORDER BY b.id"
+    )
+    assert bouts["opponent_name"].fillna("").tolist() == ["Daniel Cormier", "", "", "Jon Jones"]
+    assert bouts["reach_cm"].tolist()[0] == 184
+
+    # Inserting José Aldo later resolves the existing bout against him, and replacing Daniel Cormier keeps his
+    # opponents' bouts pointing at him
+    store.insert_processed({"José Aldo": fighter(), "Daniel Cormier": fighter("Jon Jones")}, replace=False)
+    bouts = store.query(
+        "SELECT f.name, o.name AS opponent_name FROM bouts b JOIN fighters f ON f.id = b.fighter_id "
+        "LEFT JOIN fighters o ON o.id = b.opponent_id ORDER BY f.name, b.opponent"
+    )
+    assert bouts.fillna("").values.tolist() == [
+        ["Daniel Cormier", "Jon Jones"],
+        ["Jon Jones", "Daniel Cormier"],
+        ["Jon Jones", "José Aldo"],
+        ["Jon Jones", ""],
+    ]
+    store.close()
+
+
+def test_numeric_fighter_columns_are_indexed(tmp_path):
+    store = FighterStore(str(tmp_path / "fighters.sqlite"))
+    plan = store.query("EXPLAIN QUERY PLAN SELECT name FROM fighters WHERE reach_cm > 200")
+    assert "fighters_reach_cm" in " ".join(plan["detail"])
+    store.close()
+
+
+def test_bouts_against_unresolved_opponents_are_indexed(tmp_path):
+    store = FighterStore(str(tmp_path / "fighters.sqlite"))
+    store.insert_processed({"Jon Jones": fighter("Unknown Fighter")})
+    plan = store.query("EXPLAIN QUERY PLAN SELECT * FROM bouts WHERE opponent = ?", ("Unknown Fighter",))
+    assert "USING INDEX bouts_opponent (opponent=?)" in " ".join(plan["detail"])
+    assert len(store.query("SELECT * FROM bouts WHERE opponent = ?", ("Unknown Fighter",))) == 1
+    store.close()
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import pytest
+
+from mmai.data.base import DataBase
+from mmai.util import dump_json, load_json
+
+
+DATA = {"Jon Jones": {"wins": 27, "record": [{"Opponent": "Daniel Cormier"}]}, "José Aldo": {"wins": 32}}
+
+
+@pytest.mark.parametrize("filename", ["fighters.json", "fighters.json.gz"])
+def test_dump_json_round_trip(tmp_path, filename):
+    datapath = str(tmp_path / filename)
+    sha256, size = dump_json(DATA, datapath, chunk_size=8)
+    assert load_json(datapath) == DATA
+    expected = json.dumps(DATA).encode("utf-8")
+    assert (sha256, size) == (hashlib.sha256(expected).hexdigest(), len(expected))
+    assert os.listdir(tmp_path) == [filename]
+
+
+def test_dump_json_compression_is_deterministic(tmp_path):
+    dump_json(DATA, str(tmp_path / "a.json.gz"))
+    dump_json(DATA, str(tmp_path / "b.json.gz"))
+    with open(tmp_path / "a.json.gz", "rb") as a, open(tmp_path / "b.json.gz", "rb") as b:
+        assert a.read() == b.read()
+    with gzip.open(tmp_path / "a.json.gz") as f:
+        assert json.load(f) == DATA
+
+
+def test_dump_json_failure_keeps_previous_file(tmp_path):
+    datapath = str(tmp_path / "fighters.json")
+    dump_json(DATA, datapath)
+    with pytest.raises(TypeError):
+        dump_json({"Jon Jones": object()}, datapath)
+    assert load_json(datapath) == DATA
+    assert os.listdir(tmp_path) == ["fighters.json"]
+
+
+def test_save_records_content_hash_in_manifest(tmp_path, capsys):
+    data = DataBase()
+    data.data = DATA
+    data.data_filename = str(tmp_path / "fighters.json.gz")
+    data.save()
+    sha256 = data.get_content_hash()
+    assert sha256 == hashlib.sha256(json.dumps(DATA).encode("utf-8")).hexdigest()
+    data.save()
+    assert "(unchanged" in capsys.readouterr().out.splitlines()[-1]
+    data.data = {**DATA, "Daniel Cormier": {"wins": 22}}
+    data.save()
+    assert data.get_content_hash() != sha256
+    assert sorted(os.listdir(tmp_path)) == ["fighters.json.gz", "manifest.json"]
+
+
+def test_concurrent_saves_are_all_recorded(tmp_path):
+    savers = []
+    for i in range(8):
+        data = DataBase()
+        data.data = {"i": i}
+        data.data_filename = str(tmp_path / f"artifact_{i}.json")
+        savers.append(data)
+    assert savers[0].get_manifest() is savers[1].get_manifest()
+
+    threads = [threading.Thread(target=data.save) for data in savers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(data.get_content_hash() for data in savers)
+    assert len(load_json(str(tmp_path / "manifest.json"))) == 8
+
+
+class Columns(DataBase):
+    def to_tables(self):
+        return {"fighters": {"name": self.data["name"]}, "bouts": {"wins": self.data["wins"]}}
+
+    def save(self):
+        self.save_columnar()
+
+
+def test_columnar_save_records_content_hash(tmp_path):
+    data = Columns()
+    data.data = {"name": ["Jon Jones", "José Aldo"], "wins": [27, 32]}
+    data.data_filename = str(tmp_path / "columns.json")
+    assert data.get_content_hash() is None
+    data.save()
+    sha256 = data.get_content_hash()
+    assert sha256 is not None and not os.path.exists(data.data_filename)
+    data.save()
+    assert data.get_content_hash() == sha256
+    data.data["wins"] = [27, 33]
+    data.save()
+    assert data.get_content_hash() != sha256
@@ -0,0 +1,225 @@
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from urllib.parse import unquote
+
+import pytest
+
+from mmai.data.parsing import is_parser_available
+from mmai.data.wikipedia import PROCESSED_VERSION, WikiFightersProcessed, WikiFightersRaw
+from mmai.util import dump_json, load_json
+
+
+DUMP_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "wiki_html_dump.ndjson")
+RECORD_HEADERS = ["Res.", "Record", "Opponent", "Method", "Event", "Date", "Round", "Time", "Location", "Notes"]
+INFOBOX = (
+    '<table class="infobox vcard"><tbody>'
+    '<tr><th colspan="2"><span class="fn">Jon Jones</span></th></tr>'
+    '<tr><th>Born</th><td>Jon Jones <span class="bday">1987-07-19</span></td></tr>'
+    '<tr><th>Height</th><td>6 ft 4 in (1.93 m)</td></tr>'
+    "</tbody></table>"
+)
+
+
+def record_table(opponent):
+    header = "".join(f"<th>{h}</th>" for h in RECORD_HEADERS)
+    row = [
+        "Win", "1–0", opponent, "KO (punches)", "UFC 1", "January 3, 2015", "1", "1:00", "Las Vegas, Nevada", ""
+    ]
+    cells = "".join(f"<td>{c}</td>" for c in row)
+    return f'<table class="wikitable"><tbody><tr>{header}</tr><tr>{cells}</tr></tbody></table>'
+
+
+def parse(*tables, parser="html.parser", **kwargs):
+    html = f'<html><head><meta charset="utf-8"></head><body>{"".join(tables)}</body></html>'.encode()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        scraper = WikiFightersRaw(parser=parser)
+        return scraper.get_fighter_record_and_info_from_html(html, "/wiki/Jon_Jones", **kwargs)
+
+
+def test_single_record_and_info():
+    fighter = parse(INFOBOX, record_table("Daniel Cormier"))
+    assert fighter["warning_level"] == 0
+    assert fighter["info"]["Full name"] == "Jon Jones"
+    assert fighter["record"][0]["Opponent"] == "Daniel Cormier"
+
+
+def test_second_different_record_table_is_warned_about():
+    # e.g., an amateur record after the professional one
+    fighter = parse(INFOBOX, record_table("Daniel Cormier"), record_table("Someone Amateur"))
+    assert fighter["warning_level"] == 1
+    assert fighter["record"] is None
+    assert fighter == parse(INFOBOX, record_table("Daniel Cormier"), record_table("Someone Amateur"), exhaustive=True)
+
+
+def test_different_record_table_after_identical_ones_is_warned_about():
+    tables = (INFOBOX, record_table("Daniel Cormier"), record_table("Daniel Cormier"), record_table("Someone Else"))
+    assert parse(*tables)["warning_level"] == 1
+
+
+def test_identical_record_tables_are_condensed():
+    fighter = parse(INFOBOX, record_table("Daniel Cormier"), record_table("Daniel Cormier"))
+    assert fighter["warning_level"] == 0
+    assert fighter["record"][0]["Opponent"] == "Daniel Cormier"
+
+
+def test_missing_record_and_info():
+    assert parse("<table><tr><td>Not a record</td></tr></table>")["warning_level"] == 2
+
+
+def raw_fighter(name, warning_level=0, **info):
+    info = {"Full name": name, **info}
+    record = [{"Res": "Win", "Opponent": "Someone"}]
+    return {"title": name, "link": f"/wiki/{name}", "warning_level": warning_level, "info": info, "record": record}
+
+
+def test_process_fighters_measurements():
+    raw = [
+        raw_fighter(
+            "José Aldo", **{"Height": "5\xa0ft 7\xa0in (1.70\xa0m)", "Weight": "145\xa0lb (66\xa0kg; 10.4\xa0st)",
+                            "Reach": "70\xa0in (178\xa0cm)", "Formatted birthday": "1986-09-09"}
+        ),
+        raw_fighter("Jon Jones", **{"Height": "6\xa0ft 4\xa0in (193\xa0cm)", "Formatted birthday": "not a date"}),
+        raw_fighter("No Parentheses", **{"Height": "6 ft 4 in", "Reach": "(unknown)"}),
+        raw_fighter("Too Many Warnings", warning_level=2),
+    ]
+    aldo, jones, no_parentheses, omitted = WikiFightersProcessed().process_fighters(raw, today=datetime(2026, 9, 9))
+
+    assert aldo["name"] == "Jose Aldo" and aldo["name_raw"] == "José Aldo"
+    assert (aldo["height_m"], aldo["weight_kg"], aldo["reach_cm"]) == (1.70, 66.0, 178.0)
+    assert aldo["birthday"] == "1986-09-09" and aldo["age_days"] == 14610.0
+    assert math.isclose(jones["height_m"], 1.93)
+    assert jones["birthday"] is None and math.isnan(jones["age_days"]) and math.isnan(jones["weight_kg"])
+    assert all(math.isnan(no_parentheses[k]) for k in ("height_m", "weight_kg", "reach_cm"))
+    assert omitted is None
+
+
+@pytest.mark.parametrize("parser", [p for p in ("lxml", "html5lib") if is_parser_available(p)])
+def test_parsers_agree(parser):
+    pages = [
+        (INFOBOX, record_table("Daniel Cormier")),
+        (INFOBOX, record_table("Daniel Cormier"), record_table("Someone Amateur")),
+        ("<table><tr><td>Not a record</td></tr></table>",),
+    ]
+    for tables in pages:
+        assert parse(*tables, parser=parser) == parse(*tables)
+
+
+# Serves the pages of the dump fixture, recording the most requests in flight at once
+class FakeWikipedia:
+    def __init__(self):
+        with open(DUMP_PATH, encoding="utf-8") as f:
+            self.pages = {article["name"]: article["article_body"]["html"] for article in map(json.loads, f)}
+        self.links = "".join(f'<a href="/wiki/{name.replace(" ", "_")}">{name}</a>' for name in self.pages)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        title = unquote(url.rsplit("/", 1)[-1]).replace("_", " ")
+        content = self.links if title == "List of male mixed martial artists" else self.pages.get(title, "")
+        return SimpleNamespace(status_code=200, content=content.encode())
+
+
+def scrape(tmp_path, workers, max_per_host=8):
+    wikipedia = FakeWikipedia()
+    scraper = WikiFightersRaw(session=wikipedia, max_per_host=max_per_host, parser="html.parser")
+    scraper.data_filename = str(tmp_path / f"wiki_fighters_raw_{workers}.json")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return scraper.scrape(report=False, workers=workers), wikipedia
+
+
+def test_threaded_scrape_matches_serial_scrape(tmp_path):
+    serial, _ = scrape(tmp_path, workers=1)
+    threaded, wikipedia = scrape(tmp_path, workers=4, max_per_host=2)
+    assert threaded == serial
+    assert [fighter["title"] for fighter in threaded] == list(wikipedia.pages)
+    assert wikipedia.max_in_flight == 2
+
+
+def incremental_raw(*names, changed=()):
+    raw = []
+    for name in names:
+        fighter = raw_fighter(name, **{"Height": "6\xa0ft 4\xa0in (1.93\xa0m)", "Formatted birthday": "1987-07-19"})
+        if name in changed:
+            fighter["record"].append({"Res": "Loss", "Opponent": "Someone Else"})
+        raw.append(fighter)
+    return raw
+
+
+def same(fighters, other):
+    # NaN measurements don't compare equal, but their json does
+    return json.dumps(fighters) == json.dumps(other)
+
+
+def process_incrementally(tmp_path, raw, capsys):
+    processed = WikiFightersProcessed()
+    processed.data_filename = str(tmp_path / "wiki_fighters_processed.json")
+    fighters = processed.process(raw, incremental=True)
+    counts = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Reused")]
+    return fighters, counts[0]
+
+
+def test_incremental_processing(tmp_path, capsys, monkeypatch):
+    raw = incremental_raw("Jon Jones", "José Aldo", "Glover Teixeira")
+    fighters, counts = process_incrementally(tmp_path, raw, capsys)
+    assert counts == "Reused 0, recomputed 3, and removed 0 fighters."
+
+    # José Aldo's record changed, Glover Teixeira's page is gone, and Daniel Cormier's is new
+    raw = incremental_raw("Jon Jones", "José Aldo", "Daniel Cormier", changed={"José Aldo"})
+    fighters, counts = process_incrementally(tmp_path, raw, capsys)
+    assert counts == "Reused 1, recomputed 2, and removed 1 fighters."
+    assert same(fighters, WikiFightersProcessed().process(raw))
+    assert list(fighters) == ["Jon Jones", "Jose Aldo", "Daniel Cormier"]
+    assert len(fighters["Jose Aldo"]["record"]) == 2
+
+    assert process_incrementally(tmp_path, raw, capsys)[1] == "Reused 3, recomputed 0, and removed 0 fighters."
+
+    # A different version of the processed format, or fingerprints that don't match, recompute the fighters
+    monkeypatch.setattr("mmai.data.wikipedia.PROCESSED_VERSION", PROCESSED_VERSION + 1)
+    assert process_incrementally(tmp_path, raw, capsys)[1] == "Reused 0, recomputed 3, and removed 0 fighters."
+    filename = str(tmp_path / "wiki_fighters_processed.json.fingerprints")
+    fingerprints = load_json(filename)
+    fingerprints["fighters"]["/wiki/Jon Jones"][0] = "0" * 64
+    dump_json(fingerprints, filename)
+    fighters, counts = process_incrementally(tmp_path, raw, capsys)
+    assert counts == "Reused 2, recomputed 1, and removed 0 fighters."
+    assert same(fighters, WikiFightersProcessed().process(raw))
+
+
+def test_parallel_processing_matches_serial_processing():
+    raw = []
+    for i in range(40):
+        info = {"Height": f"6\xa0ft {i % 12}\xa0in ({170 + i}\xa0cm)", "Formatted birthday": f"{1960 + i}-01-01"}
+        raw.append(raw_fighter(f"Fighter {i}", warning_level=i % 3, **info))
+    raw.append(raw_fighter("José Aldo", **{"Reach": "70\xa0in (178\xa0cm)"}))
+    processed = WikiFightersProcessed()
+    today = datetime(2026, 9, 9)
+    serial = processed.process_fighters(raw, today=today)
+    assert same(processed.process_fighters_in_parallel(raw, workers=3, today=today), serial)
+    assert same(WikiFightersProcessed().process(raw, workers=3), WikiFightersProcessed().process(raw))
+
+
+def test_reused_ages_are_shifted_to_today(tmp_path, capsys):
+    raw = incremental_raw("Jon Jones", "José Aldo")
+    processed = WikiFightersProcessed()
+    processed.data_filename = str(tmp_path / "wiki_fighters_processed.json")
+    processed.process(raw, incremental=True)
+
+    later = datetime.today() + timedelta(days=30)
+    reused, _ = processed.process_incremental(raw, today=later)
+    assert "Reused 2, recomputed 0" in capsys.readouterr().out
+    assert [f["age_days"] for f in reused] == [f["age_days"] for f in processed.process_fighters(raw, today=later)]